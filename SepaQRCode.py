@@ -5,282 +5,157 @@
 
 from PySide6.QtWidgets import (
     QApplication, QWidget, QFormLayout, QLineEdit, QHBoxLayout,
-    QPushButton, QFileDialog, QMessageBox, QComboBox, QLabel, QVBoxLayout
+    QPushButton, QFileDialog, QMessageBox, QComboBox, QCompleter, QLabel, QVBoxLayout
 )
-from PySide6.QtCore import Qt
-from datetime import datetime
+from PySide6.QtCore import (
+    QAbstractListModel, QModelIndex, QObject, QRunnable, QStringListModel, QThreadPool, QTimer, Qt, Signal,
+)
+from PySide6.QtGui import QImage, QPixmap
 from pathlib import Path
 from typing import Optional
 import sys
-import re
-import json
 import os
-import qrcode
+import time
+
+from epc_core import (
+    AUTO_CHARSET, BASE_OUT, EPC_CHARSETS, EPC_MAX_BYTES, QUIET_ZONE, EpcFields, encode_payload, png_filename,
+    qr_matrix, render_bytes, save_bytes, validate_epc,
+)
+from epc_i18n import I18N
+from epc_payees import PayeeStore, open_payee_store
+import epc_trace
 
 APP_STATE = Path.home() / ".epc_qr_payees.json"
-BASE_OUT = Path.home() / "Documents" / "EPC_QR"  # default output folder for PNGs
-
-# ------------------ i18n dictionaries ------------------
-I18N = {
-    "de": {
-        "app_title": "EPC (SEPA) QR Generator",
-        "lang_label": "Sprache",
-        "saved_payees": "Gespeicherte Empfänger",
-        "btn_load": "Laden",
-        "btn_save": "Speichern/Aktualisieren",
-        "btn_delete": "Löschen",
-        "lbl_name": "Name des Zahlungsempfängers *",
-        "lbl_iban": "IBAN *",
-        "lbl_bic": "BIC (optional in v002)",
-        "lbl_amount": "Betrag (EUR) *",
-        "lbl_purpose": "Verwendungszweck (optional, 4 Buchstaben)",
-        "lbl_structured": "Strukturierte Referenz (RF…)",
-        "lbl_unstructured": "Unstrukturierter Verwendungszweck",
-        "lbl_info": "Zusatzinformation (optional)",
-        "lbl_version": "Version",
-        "lbl_charset": "Zeichensatz",
-        "btn_save_png": "PNG speichern",
-        "btn_preview_payload": "Payload anzeigen",
-        "btn_copy_payload": "Payload kopieren",
-        "btn_open_folder": "Ordner öffnen",
-        "legend_required": "* Pflichtfelder",
-        "ph_name": "z. B. Fabian Hiller",
-        "ph_iban": "DE.. (ohne Leerzeichen)",
-        "ph_bic": "z. B. DEUTDEFF (optional in v002)",
-        "ph_amount": "10.00",
-        "ph_purpose": "CHAR / GDDS / RENT…",
-        "ph_structured": "RF… strukturierte Referenz (ISO 11649)",
-        "ph_unstructured": "Freitext (≤140 Zeichen)",
-        "ph_info": "Zusatzinfo (≤70 Zeichen)",
-        "tt_name": "(Pflicht) Name des Zahlungsempfängers – max. 70 Zeichen.",
-        "tt_iban": "(Pflicht) IBAN ohne Leerzeichen, 15–34 Zeichen.",
-        "tt_bic": "BIC (8 oder 11 alphanumerisch). Nur für Version 001 erforderlich.",
-        "tt_amount": "(Pflicht) Punkt als Dezimaltrennzeichen (z. B. 12.34). Muss > 0 sein.",
-        "tt_purpose": "Optionaler ISO‑20022‑Code (4 Buchstaben). ? für Beispiele klicken.",
-        "tt_structured": "Strukturierte Referenz (beginnt mit RF). Freitext leer lassen, wenn genutzt.",
-        "tt_unstructured": "Freitext‑Alternative zur strukturierten Referenz. Max. ~140 Zeichen.",
-        "tt_info": "Optionale Notiz an den Empfänger. Max. ~70 Zeichen.",
-        "tt_version": "002 empfohlen (BIC optional). 001 erfordert BIC.",
-        "tt_charset": "1 = UTF‑8 (empfohlen).",
-        "dlg_validation": "Validierung",
-        "err_name_req": "Name des Zahlungsempfängers ist erforderlich.",
-        "err_iban_req": "IBAN ist erforderlich.",
-        "err_iban_fmt": "IBAN-Format scheint ungültig.",
-        "err_bic_req": "Version 001 erfordert eine BIC. Verwenden Sie 002 oder geben Sie eine BIC ein.",
-        "err_amount_req": "Betrag ist erforderlich.",
-        "err_amount_pos": "Betrag muss eine positive Zahl sein (z. B. 10 oder 10.00).",
-        "err_purpose_fmt": "Verwendungszweck muss genau 4 Buchstaben haben (z. B. CHAR).",
-        "err_name_len": "Name des Zahlungsempfängers darf höchstens 70 Zeichen haben.",
-        "err_bic_fmt": "BIC muss 8 oder 11 alphanumerische Zeichen haben.",
-        "err_text_len": "Unstrukturierter Verwendungszweck muss ≤ 140 Zeichen sein.",
-        "err_info_len": "Zusatzinformation muss ≤ 70 Zeichen sein.",
-        "qr_error": "QR-Fehler",
-        "folder_error": "Ordnerfehler",
-        "msg_folder_err": "Ordner konnte nicht erstellt werden:\n{path}\n{err}",
-        "saved": "Gespeichert",
-        "msg_saved_qr": "QR wurde gespeichert unter:\n{path}",
-        "save_error": "Speicherfehler",
-        "copied": "Kopiert",
-        "msg_copied": "EPC-Payload in die Zwischenablage kopiert.",
-        "open_folder_error": "Ordner öffnen",
-        "msg_open_folder_err": "Ordner konnte nicht geöffnet werden:\n{path}\n{err}",
-        "payload_preview": "EPC-Payload-Vorschau",
-        "payload_length": "(Länge = {n} Zeichen)",
-        "purpose_help_title": "Verwendungszweck-Codes",
-        "purpose_help": (
-            "Verwendungszweck (optional, 4 Buchstaben) klassifiziert die Zahlung.\n"
-            "Er verwendet ISO 20022 Codes. Beispiele:\n\n"
-            "  CHAR = Spende\n"
-            "  GDDS = Waren/Dienstleistungen\n"
-            "  RENT = Miete\n"
-            "  SALA = Gehalt\n"
-            "  PENS = Rente\n"
-            "  DEPT = Einzahlung\n"
-            "  BENE = Arbeitslosenunterstützung\n"
-            "  MTUP = Handyaufladung\n"
-            "  TRAD = Handel\n\n"
-            "Leer lassen, wenn nicht benötigt. Viele Banking-Apps ignorieren es."
-        ),
-    },
-    "en": {
-        "app_title": "EPC (SEPA) QR Generator",
-        "lang_label": "Language",
-        "saved_payees": "Saved payees",
-        "btn_load": "Load",
-        "btn_save": "Save/Update",
-        "btn_delete": "Delete",
-        "lbl_name": "Creditor name *",
-        "lbl_iban": "IBAN *",
-        "lbl_bic": "BIC (optional in v002)",
-        "lbl_amount": "Amount (EUR) *",
-        "lbl_purpose": "Purpose (opt., 4 letters)",
-        "lbl_structured": "Structured ref (RF…)",
-        "lbl_unstructured": "Unstructured text",
-        "lbl_info": "Additional info (opt.)",
-        "lbl_version": "Version",
-        "lbl_charset": "Charset",
-        "btn_save_png": "Save PNG",
-        "btn_preview_payload": "Preview Payload",
-        "btn_copy_payload": "Copy Payload",
-        "btn_open_folder": "Open Folder",
-        "legend_required": "* Required fields",
-        "ph_name": "e.g. Fabian Hiller",
-        "ph_iban": "DE.. (no spaces)",
-        "ph_bic": "e.g. DEUTDEFF (optional in v002)",
-        "ph_amount": "10.00",
-        "ph_purpose": "CHAR / GDDS / RENT…",
-        "ph_structured": "RF… structured reference (ISO 11649)",
-        "ph_unstructured": "Unstructured remittance text (≤140 chars)",
-        "ph_info": "Additional info (≤70 chars)",
-        "tt_name": "(Required) Payee (creditor) name – max 70 characters.",
-        "tt_iban": "(Required) IBAN without spaces, 15–34 characters.",
-        "tt_bic": "BIC (8 or 11 alphanumeric). Required only for Version 001.",
-        "tt_amount": "(Required) Use dot as decimal separator (e.g., 12.34). Must be > 0.",
-        "tt_purpose": "Optional 4-letter ISO 20022 purpose code. Click ? for examples.",
-        "tt_structured": "Structured reference (starts with RF). Leave Unstructured text empty if you use this.",
-        "tt_unstructured": "Free text alternative to structured reference. Max ~140 characters.",
-        "tt_info": "Optional note to the recipient. Max ~70 characters.",
-        "tt_version": "002 recommended (BIC optional). 001 requires BIC.",
-        "tt_charset": "1 = UTF‑8 (recommended).",
-        "dlg_validation": "Validation",
-        "err_name_req": "Creditor name is required.",
-        "err_iban_req": "IBAN is required.",
-        "err_iban_fmt": "IBAN format looks invalid.",
-        "err_bic_req": "Version 001 requires a BIC. Use 002 or enter a BIC.",
-        "err_amount_req": "Amount is required.",
-        "err_amount_pos": "Amount must be a positive number (e.g., 10 or 10.00).",
-        "err_purpose_fmt": "Purpose must be exactly 4 letters (e.g., CHAR).",
-        "err_name_len": "Creditor name must be at most 70 characters.",
-        "err_bic_fmt": "BIC must be 8 or 11 alphanumeric characters.",
-        "err_text_len": "Unstructured text must be ≤ 140 characters.",
-        "err_info_len": "Additional info must be ≤ 70 characters.",
-        "qr_error": "QR error",
-        "folder_error": "Folder error",
-        "msg_folder_err": "Could not create folder:\n{path}\n{err}",
-        "saved": "Saved",
-        "msg_saved_qr": "Saved QR to:\n{path}",
-        "save_error": "Save error",
-        "copied": "Copied",
-        "msg_copied": "EPC payload copied to clipboard.",
-        "open_folder_error": "Open Folder",
-        "msg_open_folder_err": "Could not open folder:\n{path}\n{err}",
-        "payload_preview": "EPC Payload Preview",
-        "payload_length": "(len = {n} chars)",
-        "purpose_help_title": "Purpose codes",
-        "purpose_help": (
-            "Purpose (optional, 4 letters) tells banks why the payment is made.\n"
-            "It uses ISO 20022 purpose codes. Examples:\n\n"
-            "  CHAR = Donation\n"
-            "  GDDS = Goods/Services\n"
-            "  RENT = Rent\n"
-            "  SALA = Salary\n"
-            "  PENS = Pension\n"
-            "  DEPT = Deposit\n"
-            "  BENE = Unemployment benefit\n"
-            "  MTUP = Mobile top-up\n"
-            "  TRAD = Trade\n\n"
-            "Leave empty if you don't need it. Many banking apps ignore it."
-        ),
-    },
-}
-
-# ------------------ EPC payload builder ------------------
-def build_epc_payload(
-    name: str,
-    iban: str,
-    amount_eur: Optional[str],
-    bic: Optional[str],
-    purpose_code: Optional[str],
-    remittance_ref: Optional[str],
-    remittance_text: Optional[str],
-    info: Optional[str],
-    version: str = "002",
-    charset: str = "1",
-) -> str:
-    def v(x):
-        return "" if x is None else str(x)
-
-    amt = ""
-    if amount_eur:
-        try:
-            val = round(float(str(amount_eur).replace(",", ".")), 2)
-            if val <= 0:
-                raise ValueError
-            amt = f"EUR{val:.2f}"
-        except Exception:
-            raise ValueError("Amount must be a positive number (e.g., 10.00)")
-
-    ref = (remittance_ref or "").strip()
-    txt = (remittance_text or "").strip()
-    if ref and txt:
-        txt = ""
-
-    lines = [
-        "BCD",
-        version,
-        charset,
-        "SCT",
-        v((bic or "").upper()),
-        v(name).strip(),
-        v(iban).replace(" ", "").upper(),
-        amt,
-        v((purpose_code or "").upper()),
-        ref,
-        txt,
-        v(info),
-    ]
-    return "\n".join(lines)
-
-# ------------------ Saved Payees ------------------
-class PayeeStore:
-    def __init__(self, path: Path):
-        self.path = path
-        self.data = {"payees": []}
-        self.load()
+PREVIEW_SIZE = 240  # px, side of the live preview
+PREVIEW_DELAY_MS = 200  # debounce: render once typing pauses this long
+PAYEE_FETCH = 500  # saved payee names handed to the drop-down list at a time
+
 
-    def load(self):
+# ------------------ Live preview ------------------
+class PreviewTask(QRunnable):
+    # Builds the QR image for one payload on a pool thread. QImage (unlike
+    # QPixmap) may be created off the GUI thread.
+    def __init__(self, renderer: "PreviewRenderer", generation: int, payload: str):
+        super().__init__()
+        self.setAutoDelete(False)  # the renderer keeps it for tryTake()
+        self.renderer = renderer
+        self.generation = generation
+        self.payload = payload
+
+    def run(self):
+        if self.generation != self.renderer.generation:
+            return  # superseded while queued
         try:
-            if self.path.exists():
-                self.data = json.loads(self.path.read_text(encoding="utf-8"))
-            else:
-                self.save()
-        except Exception:
-            self.data = {"payees": []}
+            matrix = qr_matrix(self.payload, border=QUIET_ZONE)
+            n = len(matrix)
+            stride = (n + 3) & ~3  # QImage scanlines are 32-bit aligned
+            pad = bytes(stride - n)
+            data = b"".join(bytes(0 if dark else 255 for dark in row) + pad for row in matrix)
+            image = QImage(data, n, n, stride, QImage.Format_Grayscale8).copy()
+            self.renderer.done.emit(self.generation, self.payload, image, "")
+        except Exception as e:
+            self.renderer.done.emit(self.generation, self.payload, None, str(e) or e.__class__.__name__)
+
+
+class PreviewRenderer(QObject):
+    # One render at a time on a private pool; a newer request drops the
+    # queued one and stale results are ignored, so only the latest payload
+    # ever reaches the screen.
+    done = Signal(int, str, object, str)  # generation, payload, QImage or None, error
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.generation = 0
+        self.queued: Optional[PreviewTask] = None
+
+    def request(self, payload: str) -> int:
+        self.cancel()
+        task = PreviewTask(self, self.generation, payload)
+        self.queued = task
+        self.pool.start(task)
+        return self.generation
+
+    def cancel(self) -> None:
+        self.generation += 1
+        if self.queued is not None:
+            self.pool.tryTake(self.queued)
+            self.queued = None
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self.pool.waitForDone(2000)
+
+
+# ------------------ Saved payees ------------------
+class PayeeLoadTask(QRunnable):
+    # Opens the payee store on a pool thread: parsing a large JSON file would
+    # otherwise hold up the first paint of the window.
+    def __init__(self, loader: "PayeeLoader", path: Path):
+        super().__init__()
+        self.loader = loader
+        self.path = path
 
-    def save(self):
+    def run(self):
         try:
-            self.path.write_text(
-                json.dumps(self.data, ensure_ascii=False, indent=2),
-                encoding="utf-8"
-            )
+            store = open_payee_store(self.path)
+            names, error = store.list_names(), ""
         except Exception as e:
-            QMessageBox.warning(
-                None, "Save error",
-                f"Could not save payees to {self.path}:\n{e}"
-            )
+            store, names, error = None, [], str(e) or e.__class__.__name__
+        self.loader.loaded.emit(store, names, error)
+
+
+class PayeeLoader(QObject):
+    loaded = Signal(object, object, str)  # store or None, names, error
 
-    def list_names(self):
-        return [p.get("name", "") for p in self.data.get("payees", [])]
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
 
-    def get(self, name: str):
-        for p in self.data.get("payees", []):
-            if p.get("name", "") == name:
-                return p
+    def start(self, path: Path) -> None:
+        self.pool.start(PayeeLoadTask(self, path))
+
+    def shutdown(self) -> None:
+        # a load cannot be interrupted; let it finish before the window goes
+        self.pool.waitForDone()
+
+
+class PayeeNameModel(QAbstractListModel):
+    # Names for the saved payee drop-down. The view gets them PAYEE_FETCH at a
+    # time as it scrolls (canFetchMore/fetchMore): a combo box filled with
+    # 100k items up front spends seconds measuring them before it can paint.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.names: list = []
+        self.shown = 0
+
+    def set_names(self, names: list) -> None:
+        self.beginResetModel()
+        self.names = names
+        self.shown = min(len(names), PAYEE_FETCH)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.shown
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.EditRole) and 0 <= index.row() < self.shown:
+            return self.names[index.row()]
         return None
 
-    def upsert(self, payee: dict):
-        existing = self.get(payee.get("name", ""))
-        if existing is not None:
-            existing.update(payee)
-        else:
-            self.data.setdefault("payees", []).append(payee)
-        self.save()
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.shown < len(self.names)
+
+    def fetchMore(self, parent):
+        count = min(PAYEE_FETCH, len(self.names) - self.shown)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.shown, self.shown + count - 1)
+        self.shown += count
+        self.endInsertRows()
 
-    def delete(self, name: str):
-        self.data["payees"] = [
-            p for p in self.data.get("payees", []) if p.get("name", "") != name
-        ]
-        self.save()
 
 # ------------------ GUI ------------------
 class MainWindow(QWidget):
@@ -291,7 +166,7 @@ class MainWindow(QWidget):
         self.setWindowTitle(self.t["app_title"])
         self.setMinimumWidth(640)
 
-        self.store = PayeeStore(APP_STATE)
+        self.store = None  # set once PayeeLoader has read APP_STATE
 
         layout = QVBoxLayout(self)
 
@@ -304,12 +179,27 @@ class MainWindow(QWidget):
         lang_row.addStretch(1)
         layout.addLayout(lang_row)
 
+        body = QHBoxLayout()
         form = QFormLayout()
-        layout.addLayout(form)
+        body.addLayout(form, 1)
+        layout.addLayout(body)
 
         # Saved payees row
         saved_row = QHBoxLayout()
-        self.saved = QComboBox(); self.refresh_saved()
+        # editable for type-ahead search: the completer matches any part of the
+        # name over the whole list, the drop-down itself fills in lazily
+        self.saved = QComboBox(); self.saved.setEditable(True)
+        self.saved.setInsertPolicy(QComboBox.NoInsert)
+        self.saved.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+        self.saved.setMinimumContentsLength(24)
+        self.payee_names = PayeeNameModel(self)
+        self.saved.setModel(self.payee_names)
+        self.payee_search = QStringListModel(self)
+        completer = QCompleter(self.payee_search, self)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setFilterMode(Qt.MatchContains)
+        self.saved.setCompleter(completer)
+        self.saved.setToolTip(self.t["tt_saved"])
         self.btn_load = QPushButton(self.t["btn_load"])
         self.btn_save = QPushButton(self.t["btn_save"])
         self.btn_delete = QPushButton(self.t["btn_delete"])
@@ -342,7 +232,7 @@ class MainWindow(QWidget):
 
         self.version = QComboBox(); self.version.addItems(["002", "001"])  # 002 recommended
         self.version.setToolTip(self.t["tt_version"]) 
-        self.charset = QComboBox(); self.charset.addItems(["1"])  # UTF-8
+        self.charset = QComboBox(); self.charset.addItems([*EPC_CHARSETS, AUTO_CHARSET])  # "1" = UTF-8
         self.charset.setToolTip(self.t["tt_charset"]) 
 
         # Purpose with help button
@@ -377,6 +267,14 @@ class MainWindow(QWidget):
         adv_row.addWidget(self.lbl_charset); adv_row.addWidget(self.charset)
         form.addRow(adv_row)
 
+        # Live preview next to the form
+        self.preview = QLabel(self.t["preview_empty"])
+        self.preview.setFixedSize(PREVIEW_SIZE, PREVIEW_SIZE)
+        self.preview.setAlignment(Qt.AlignCenter)
+        self.preview.setWordWrap(True)
+        self.preview.setStyleSheet("color: gray;")
+        body.addWidget(self.preview, 0, Qt.AlignTop)
+
         # Action buttons + legend
         btns = QHBoxLayout()
         self.btn_preview = QPushButton(self.t["btn_save_png"]) 
@@ -404,6 +302,24 @@ class MainWindow(QWidget):
         self.btn_open_folder.clicked.connect(self.open_output_folder)
         self.lang_box.currentIndexChanged.connect(self.change_language)
 
+        self.set_payees_enabled(False)
+        self.saved.lineEdit().setPlaceholderText(self.t["payees_loading"])
+        self.payee_loader = PayeeLoader(self)
+        self.payee_loader.loaded.connect(self.payees_loaded)
+        self.payee_loader.start(APP_STATE)
+
+        self.preview_payload: Optional[str] = None  # payload currently shown (or being rendered)
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.update_preview)
+        self.renderer = PreviewRenderer(self)
+        self.renderer.done.connect(self.show_preview)
+        for edit in (self.name, self.iban, self.bic, self.amount, self.purpose, self.ref, self.text, self.info):
+            edit.textChanged.connect(self.preview_timer.start)
+        self.version.currentIndexChanged.connect(self.preview_timer.start)
+        self.charset.currentIndexChanged.connect(self.preview_timer.start)
+
     # ---------- i18n helpers ----------
     def change_language(self):
         self.lang = "de" if self.lang_box.currentIndex() == 0 else "en"
@@ -416,6 +332,8 @@ class MainWindow(QWidget):
         self.btn_load.setText(self.t["btn_load"]) 
         self.btn_save.setText(self.t["btn_save"]) 
         self.btn_delete.setText(self.t["btn_delete"]) 
+        self.saved.setToolTip(self.t["tt_saved"])
+        self.saved.lineEdit().setPlaceholderText(self.t["payees_none" if self.store is not None else "payees_loading"])
         # Labels
         self.lbl_name.setText(self.t["lbl_name"]) 
         self.lbl_iban.setText(self.t["lbl_iban"]) 
@@ -452,16 +370,50 @@ class MainWindow(QWidget):
         self.btn_copy.setText(self.t["btn_copy_payload"]) 
         self.btn_open_folder.setText(self.t["btn_open_folder"]) 
         self.legend.setText(self.t["legend_required"]) 
+        if self.preview_payload is None:
+            self.update_preview()  # re-translate the validation hint
 
     # ---------- Saved payees helpers ----------
+    def payees_loaded(self, store, names: list, error: str):
+        if store is None:
+            QMessageBox.warning(self, "Load error", f"Could not read payees from {APP_STATE}:\n{error}")
+            # go on with an empty list, as before payees were loaded in the background
+            store, names = PayeeStore(APP_STATE, load=False), []
+        self.store = store
+        self.show_saved(names)
+        self.saved.lineEdit().setPlaceholderText(self.t["payees_none"])
+        self.set_payees_enabled(True)
+        if store.duplicates:
+            dups = ", ".join(sorted({p.get("name", "") for p in store.duplicates}))
+            QMessageBox.information(self, self.t["saved_payees"], (
+                f"{APP_STATE} has more than one payee named: {dups}\n"
+                "The first one of each is shown; the others stay in the file."
+                if self.lang == "en" else
+                f"{APP_STATE} enthält mehrere Empfänger mit dem Namen: {dups}\n"
+                "Angezeigt wird jeweils der erste; die anderen bleiben in der Datei."))
+
+    def set_payees_enabled(self, enabled: bool):
+        for widget in (self.saved, self.btn_load, self.btn_save, self.btn_delete):
+            widget.setEnabled(enabled)
+
     def refresh_saved(self):
-        self.saved = getattr(self, 'saved', QComboBox())
-        names = self.store.list_names()
-        self.saved.clear()
-        if names:
-            self.saved.addItems(names)
-        else:
-            self.saved.addItem("(none)")
+        self.show_saved(self.store.list_names())
+
+    def show_saved(self, names: list):
+        self.payee_names.set_names(names)
+        self.payee_search.setStringList(names)
+        self.saved.setCurrentIndex(0 if names else -1)
+
+    def persist_payees(self, action, arg) -> bool:
+        try:
+            action(arg)
+            return True
+        except Exception as e:
+            QMessageBox.warning(
+                self, "Save error",
+                f"Could not save payees to {APP_STATE}:\n{e}"
+            )
+            return False
 
     def current_payee_from_fields(self) -> dict:
         return {
@@ -485,8 +437,10 @@ class MainWindow(QWidget):
         if not p["name"] or not p["iban"]:
             QMessageBox.warning(self, self.t["saved_payees"], "Name and IBAN are required to save a payee." if self.lang=="en" else "Name und IBAN sind zum Speichern erforderlich.")
             return
-        self.store.upsert(p)
+        ok = self.persist_payees(self.store.upsert, p)
         self.refresh_saved()
+        if not ok:
+            return
         QMessageBox.information(self, self.t["saved"], (f"Saved/updated '{p['name']}'.\nFile: {APP_STATE}" if self.lang=="en" else f"Gespeichert/Aktualisiert: '{p['name']}'.\nDatei: {APP_STATE}"))
 
     def delete_selected_payee(self):
@@ -495,49 +449,15 @@ class MainWindow(QWidget):
         if not p:
             QMessageBox.information(self, self.t["saved_payees"], "No saved payee selected." if self.lang=="en" else "Kein gespeicherter Empfänger ausgewählt.")
             return
-        self.store.delete(name)
+        ok = self.persist_payees(self.store.delete, name)
         self.refresh_saved()
+        if not ok:
+            return
         QMessageBox.information(self, self.t["saved"], (f"Deleted '{name}'." if self.lang=="en" else f"Gelöscht: '{name}'."))
 
     # ---------- Core features ----------
-    def validate(self) -> tuple[bool, str]:
-        t = self.t
-        name = self.name.text().strip()
-        iban = self.iban.text().replace(" ", "").upper().strip()
-        if not name:
-            return False, t["err_name_req"]
-        if not iban:
-            return False, t["err_iban_req"]
-        if not re.fullmatch(r"[A-Z]{2}[0-9A-Z]{13,32}", iban):
-            return False, t["err_iban_fmt"]
-        if self.version.currentText() == "001" and not self.bic.text().strip():
-            return False, t["err_bic_req"]
-        amt = self.amount.text().strip()
-        if not amt:
-            return False, t["err_amount_req"]
-        try:
-            val = float(amt.replace(",", "."))
-            if val <= 0:
-                raise ValueError
-        except Exception:
-            return False, t["err_amount_pos"]
-        purp = self.purpose.text().strip()
-        if purp and not re.fullmatch(r"[A-Za-z]{4}", purp):
-            return False, t["err_purpose_fmt"]
-        if len(name) > 70:
-            return False, t["err_name_len"]
-        # optional BIC format check
-        bic = self.bic.text().strip()
-        if bic and not re.fullmatch(r"[A-Za-z0-9]{8}([A-Za-z0-9]{3})?", bic):
-            return False, t["err_bic_fmt"]
-        if len(self.text.text()) > 140:
-            return False, t["err_text_len"]
-        if len(self.info.text()) > 70:
-            return False, t["err_info_len"]
-        return True, ""
-
-    def current_payload(self) -> str:
-        return build_epc_payload(
+    def current_fields(self) -> EpcFields:
+        return EpcFields(
             name=self.name.text(),
             iban=self.iban.text(),
             amount_eur=self.amount.text(),
@@ -550,54 +470,91 @@ class MainWindow(QWidget):
             charset=self.charset.currentText(),
         )
 
+    def validate(self) -> tuple[bool, str]:
+        ok, key = validate_epc(self.current_fields())
+        return ok, (self.t[key] if key else "")
+
+    def current_payload(self) -> str:
+        return self.current_fields().payload()
+
+    # ---------- Live preview ----------
+    def update_preview(self):
+        # Runs on the GUI thread after the debounce; validation and the
+        # payload are cheap, only the QR matrix goes to the pool.
+        ok, msg = self.validate()
+        if not ok:
+            self.renderer.cancel()
+            self.preview_payload = None
+            self.preview.clear()
+            empty = not (self.name.text().strip() or self.iban.text().strip())
+            self.preview.setText(self.t["preview_empty"] if empty else msg)
+            return
+        payload = self.current_payload()
+        if payload == self.preview_payload:
+            return  # same code as on screen (e.g. "12,3" -> "12.30")
+        self.preview_payload = payload
+        self.renderer.request(payload)
+
+    def show_preview(self, generation: int, payload: str, image: Optional[QImage], error: str):
+        if generation != self.renderer.generation:
+            return
+        self.renderer.queued = None
+        if image is None:
+            self.preview.clear()
+            self.preview.setText(error)
+            return
+        # whole pixels per module keep the preview sharp
+        side = PREVIEW_SIZE // image.width() * image.width() or PREVIEW_SIZE
+        self.preview.setPixmap(QPixmap.fromImage(image).scaled(side, side, Qt.KeepAspectRatio, Qt.FastTransformation))
+
+    def closeEvent(self, event):
+        self.preview_timer.stop()
+        self.renderer.shutdown()
+        self.payee_loader.shutdown()
+        super().closeEvent(event)
+
     def save_png(self):
+        if not epc_trace.active:
+            self._save_png()
+            return
+        recorder = epc_trace.recorder()
+        recorder.start()
+        started = time.perf_counter()
+        error, path = self._save_png()
+        epc_trace.emit("item", time.perf_counter() - started, source="gui", ok=error is None,
+                       error=error, path=path, stages=recorder.stop())
+
+    def _save_png(self) -> tuple[Optional[str], Optional[str]]:
+        # returns (error, saved path) for the "item" trace event
         ok, msg = self.validate()
         if not ok:
             QMessageBox.warning(self, self.t["dlg_validation"], msg)
-            return
+            return msg, None
         payload = self.current_payload()
         try:
-            qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M)
-            qr.add_data(payload)
-            qr.make(fit=True)
-            img = qr.make_image()
+            data = render_bytes(payload, "png")
         except Exception as e:
             QMessageBox.critical(self, self.t["qr_error"], str(e))
-            return
+            return str(e), None
 
         # Ensure output folder exists
         try:
             BASE_OUT.mkdir(parents=True, exist_ok=True)
         except Exception as e:
             QMessageBox.critical(self, self.t["folder_error"], self.t["msg_folder_err"].format(path=BASE_OUT, err=e))
-            return
-
-        # Build auto filename: <amount>_<last10digitsIBAN>_<YYYY-MM-DD>.png
-        amt_txt = self.amount.text().strip()
-        if amt_txt:
-            try:
-                val = float(amt_txt.replace(",", "."))
-                amt_part = f"{val:.2f}"
-            except Exception:
-                amt_part = "NA"
-        else:
-            amt_part = "NA"
-
-        iban_raw = self.iban.text()
-        digits = ''.join(ch for ch in iban_raw if ch.isdigit())
-        last10 = digits[-10:] if digits else iban_raw.replace(' ', '')[-10:]
-
-        date_part = datetime.now().strftime("%Y-%m-%d")
-        fname = f"{amt_part}_{last10}_{date_part}.png"
+            return str(e), None
 
-        safe_name = ''.join(c for c in fname if c not in '\\/:*?"<>|')
-        out_path = BASE_OUT / safe_name
+        # Auto filename: <amount>_<last10digitsIBAN>_<YYYY-MM-DD>.png, with a
+        # _2, _3, ... suffix instead of overwriting an earlier code of the same day
+        out_path = BASE_OUT / png_filename(self.amount.text(), self.iban.text())
 
         try:
-            img.save(str(out_path))
+            out_path = save_bytes(data, out_path)
             QMessageBox.information(self, self.t["saved"], self.t["msg_saved_qr"].format(path=out_path))
         except Exception as e:
             QMessageBox.critical(self, self.t["save_error"], str(e))
+            return str(e), None
+        return None, str(out_path)
 
     def copy_payload(self):
         ok, msg = self.validate()
@@ -628,7 +585,8 @@ class MainWindow(QWidget):
         payload = self.current_payload()
         lines = payload.split("\n")
         preview = "\n".join(f"{i+1:02d}: {ln}" for i, ln in enumerate(lines))
-        preview += f"\n\n" + self.t["payload_length"].format(n=len(payload))
+        preview += f"\n\n" + self.t["payload_length"].format(n=len(encode_payload(payload)), max=EPC_MAX_BYTES,
+                                                             chars=len(payload))
         QMessageBox.information(self, self.t["payload_preview"], preview)
 
     def show_purpose_help(self):
@@ -636,6 +594,9 @@ class MainWindow(QWidget):
 
 
 def main():
+    # EPC_TRACE_LOG=path appends one JSON line per saved code with stage timings
+    if os.environ.get("EPC_TRACE_LOG"):
+        epc_trace.add_hook(epc_trace.JsonLinesLogger(os.environ["EPC_TRACE_LOG"]))
     app = QApplication(sys.argv)
     w = MainWindow()
     w.show()
@@ -0,0 +1,86 @@
+# Amount parsing: the old float path vs. exact integer cents, single values
+# and whole columns.
+# Run: python benchmarks/bench_amount.py [--count 1000000] [--distinct 5000]
+
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+import argparse
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from epc_amount import format_cents, normalize_amount, parse_amounts, parse_cents  # noqa: E402
+
+
+def legacy_amount(value) -> str:
+    # the former build_epc_payload code
+    val = round(float(str(value).replace(",", ".")), 2)
+    if val <= 0:
+        raise ValueError
+    return f"EUR{val:.2f}"
+
+
+def exact_amount(value) -> str:
+    # what epc_transfer_lines does now
+    return "EUR" + normalize_amount(value)
+
+
+def make_amount(rnd: random.Random) -> str:
+    cents = rnd.randrange(1, 500_000)
+    whole, frac = divmod(cents, 100)
+    style = rnd.random()
+    if style < 0.6:
+        return f"{whole}.{frac:02d}"
+    if style < 0.9:
+        return f"{whole},{frac:02d}"
+    return f"{whole:,}.{frac:02d}" if whole >= 1000 else str(whole)
+
+
+def rate(label: str, n: int, seconds: float) -> None:
+    print(f"{label:<38}{n / seconds / 1e6:8.2f} M values/s")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark amount parsing.")
+    ap.add_argument("--count", type=int, default=1_000_000)
+    ap.add_argument("--distinct", type=int, default=5_000)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(3)
+    pool = [make_amount(rnd) for _ in range(args.distinct)]
+    column = [pool[rnd.randrange(len(pool))] for _ in range(args.count)]
+    plain = [a for a in pool if "," not in a or "." not in a][:200_000]
+    single = (plain * (200_000 // max(len(plain), 1) + 1))[:200_000]
+
+    t0 = time.perf_counter()
+    for a in single:
+        legacy_amount(a)
+    rate("float path (no grouping support)", len(single), time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for a in single:
+        exact_amount(a)
+    rate("normalize_amount", len(single), time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for a in single:
+        format_cents(parse_cents(a))
+    rate("parse_cents + format_cents", len(single), time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    result = parse_amounts(column)
+    rate(f"parse_amounts ({args.distinct} distinct in column)", len(column), time.perf_counter() - t0)
+    print(f"  {len(column)} amounts, {sum(1 for _, err in result if err)} invalid")
+
+    # binary rounding artefacts of the float path: x.xx5 should round half up
+    halves = [f"{c // 1000}.{c % 1000:03d}" for c in range(5, 1_000_000, 10)]
+    wrong = sum(1 for a in halves
+                if legacy_amount(a) != "EUR" + str(Decimal(a).quantize(Decimal("0.01"), ROUND_HALF_UP)))
+    print(f"float path: {wrong} of {len(halves)} x.xx5 inputs not rounded half-up (now rejected)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# IBAN validation microbenchmark: single checks and whole columns.
+# Run: python benchmarks/bench_iban.py [--count 1000000] [--distinct 20000]
+# Millions of checks per second are only reached on columns that repeat
+# values (validate_ibans memoizes them); a single check is regex + mod-97 in
+# pure Python and stays well below 1 M/s.
+
+from pathlib import Path
+import argparse
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from epc_iban import IBAN_FORMATS, iban_error, iban_mod97, validate_ibans  # noqa: E402
+
+
+def make_iban(rnd: random.Random) -> str:
+    # random BBAN of the right shape for a random country, with valid check digits
+    cc = rnd.choice(sorted(IBAN_FORMATS))
+    length, fmt = IBAN_FORMATS[cc]
+    bban = []
+    num = ""
+    for ch in fmt:
+        if ch.isdigit():
+            num += ch
+            continue
+        alphabet = {"n": "0123456789", "a": "ABCDEFGHIJKLMNOPQRSTUVWXYZ"}.get(ch, "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        bban.extend(rnd.choice(alphabet) for _ in range(int(num)))
+        num = ""
+    bban = "".join(bban)
+    check = 98 - iban_mod97(cc + "00" + bban)
+    return f"{cc}{check:02d}{bban}"
+
+
+def rate(label: str, n: int, seconds: float) -> None:
+    print(f"{label:<40}{n / seconds / 1e6:8.2f} M checks/s")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark IBAN validation.")
+    ap.add_argument("--count", type=int, default=1_000_000)
+    ap.add_argument("--distinct", type=int, default=20_000)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(7)
+    pool = [make_iban(rnd) for _ in range(args.distinct)]
+    assert all(not iban_error(i) for i in pool)
+    column = [pool[rnd.randrange(len(pool))] for _ in range(args.count)]
+    single = pool[: min(len(pool), 200_000)]
+
+    t0 = time.perf_counter()
+    for i in single:
+        iban_error(i)
+    rate("iban_error (single, normalized)", len(single), time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    validate_ibans(pool)
+    rate("validate_ibans (all distinct)", len(pool), time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    errors = validate_ibans(column)
+    rate(f"validate_ibans ({args.distinct} distinct in column)", len(column), time.perf_counter() - t0)
+    print(f"  {len(column)} IBANs, {sum(1 for e in errors if e)} invalid")
+    print("note: millions of checks/s only on repeated columns (memoized);")
+    print("      single and all-distinct checks stay below 1 M/s in pure Python")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+# Import-time budget for the Qt-free core.
+# Starts fresh interpreters, measures `import epc_core` and fails if the median
+# is above the budget or if Qt / qrcode got imported as a side effect.
+# Run: python benchmarks/bench_import.py [--runs 15] [--budget-ms 50] [--module epc_core]
+
+from pathlib import Path
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+FORBIDDEN = ("PySide6", "qrcode", "PIL")
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t0
+print(json.dumps({{"ms": dt * 1000, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, runs: int) -> tuple[list, set]:
+    code = PROBE.format(module=module, forbidden=FORBIDDEN)
+    times, loaded = [], set()
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        res = json.loads(out)
+        times.append(res["ms"])
+        loaded.update(res["loaded"])
+    return times, loaded
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Measure the import time of a module in fresh interpreters.")
+    ap.add_argument("--module", default="epc_core")
+    ap.add_argument("--runs", type=int, default=15)
+    ap.add_argument("--budget-ms", type=float, default=50.0)
+    args = ap.parse_args(argv)
+
+    times, loaded = measure(args.module, args.runs)
+    median = statistics.median(times)
+    print(f"import {args.module}: median {median:.1f} ms, min {min(times):.1f} ms, "
+          f"max {max(times):.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    if loaded:
+        print(f"FAIL: heavy modules imported: {', '.join(sorted(loaded))}")
+        return 1
+    if median > args.budget_ms:
+        print("FAIL: over budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# Code storage: one PNG file per code vs. one pack file (epc_pack). Codes are
+# rendered once up front; only writing, random reads and disk use are timed.
+# Run: python benchmarks/bench_pack.py [--count 20000] [--distinct 500] [--dir /mnt/nas/tmp]
+
+from pathlib import Path
+import argparse
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_pipeline import make_cases  # noqa: E402
+from epc_core import make_qr, matrix_of, pack_matrix, payload_digest, render_qr  # noqa: E402
+from epc_optimize import ecc_name  # noqa: E402
+from epc_pack import PackReader, PackWriter, code_png  # noqa: E402
+
+
+def rate(label: str, n: int, seconds: float) -> None:
+    print(f"{label:<38}{n / seconds / 1e3:9.1f} k codes/s")
+
+
+def disk_usage(paths) -> int:
+    # allocated blocks, which is what small files really cost
+    return sum(p.stat().st_blocks * 512 for p in paths)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark PNG files vs. a pack file.")
+    ap.add_argument("--count", type=int, default=20_000)
+    ap.add_argument("--distinct", type=int, default=500)
+    ap.add_argument("--dir", type=Path, help="folder to write into (default: a temp folder)")
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(7)
+    rendered = []
+    for _, fields in make_cases(args.distinct):
+        payload = fields.payload()
+        qr = make_qr(payload)
+        rendered.append((render_qr(qr, "png"), pack_matrix(matrix_of(qr)), qr.version, ecc_name(qr),
+                         payload_digest(payload)))
+    codes = [rendered[rnd.randrange(len(rendered))] for _ in range(args.count)]
+    picks = [rnd.randrange(args.count) for _ in range(min(args.count, 2000))]
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        png_dir = Path(tmp) / "png"
+        png_dir.mkdir()
+        t0 = time.perf_counter()
+        paths = []
+        for i, (png, *_rest) in enumerate(codes):
+            path = png_dir / f"{i:07d}.png"
+            path.write_bytes(png)
+            paths.append(path)
+        rate("write PNG files", len(codes), time.perf_counter() - t0)
+
+        pack_path = Path(tmp) / "codes.epcpack"
+        t0 = time.perf_counter()
+        with PackWriter(pack_path) as pack:
+            for i, (_, data, version, ecc, digest) in enumerate(codes):
+                pack.add(data, version, ecc, digest, {"id": i})
+        rate("write pack", len(codes), time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        for i in picks:
+            paths[i].read_bytes()
+        rate("random read PNG files", len(picks), time.perf_counter() - t0)
+        with PackReader(pack_path) as reader:
+            t0 = time.perf_counter()
+            for i in picks:
+                reader[i]
+            rate("random read pack (packed matrix)", len(picks), time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            for i in picks[:500]:
+                code_png(reader[i])
+            rate("random read pack + rasterize PNG", min(len(picks), 500), time.perf_counter() - t0)
+
+        png_bytes, pack_bytes = disk_usage(paths), disk_usage([pack_path])
+    print(f"  disk: {len(codes)} PNG files {png_bytes / 1e6:.1f} MB, pack {pack_bytes / 1e6:.1f} MB "
+          f"({png_bytes / max(pack_bytes, 1):.0f}x less, 1 inode instead of {len(codes)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
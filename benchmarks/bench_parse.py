@@ -0,0 +1,62 @@
+# Payload archive parsing: parse_epc_payload alone, streaming a text and a
+# JSONL archive, and the full re-validate + dedupe pass.
+# Run: python benchmarks/bench_parse.py [--count 200000] [--distinct 20000]
+
+from pathlib import Path
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_pipeline import make_cases  # noqa: E402
+from epc_parse import iter_payloads, iter_records, parse_epc_payload  # noqa: E402
+
+
+def rate(label: str, n: int, seconds: float) -> None:
+    print(f"{label:<38}{n / seconds / 1e3:9.1f} k payloads/s")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark EPC payload parsing.")
+    ap.add_argument("--count", type=int, default=200_000)
+    ap.add_argument("--distinct", type=int, default=20_000)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(5)
+    pool = [fields.payload() for _, fields in make_cases(args.distinct)]
+    payloads = [pool[rnd.randrange(len(pool))] for _ in range(args.count)]
+
+    t0 = time.perf_counter()
+    for p in payloads:
+        parse_epc_payload(p)
+    rate("parse_epc_payload", len(payloads), time.perf_counter() - t0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text, jsonl = Path(tmp) / "archive.txt", Path(tmp) / "archive.jsonl"
+        text.write_text("\n".join(payloads) + "\n", encoding="utf-8")
+        jsonl.write_text("".join(json.dumps(p, ensure_ascii=False) + "\n" for p in payloads), encoding="utf-8")
+        for label, path in (("stream text archive", text), ("stream JSONL archive", jsonl)):
+            t0 = time.perf_counter()
+            n = sum(1 for _ in iter_payloads(path))
+            rate(label, n, time.perf_counter() - t0)
+            assert n == len(payloads), n
+
+        t0 = time.perf_counter()
+        records = iter_records(iter_payloads(text), validate=True, dedupe=True)
+        dupes = invalid = 0
+        for rec in records:
+            dupes += bool(rec.duplicate_of)
+            invalid += bool(rec.error)
+        rate("text archive + validate + dedupe", len(payloads), time.perf_counter() - t0)
+    print(f"  {len(payloads)} payloads, {dupes} duplicates, {invalid} invalid")
+    bad = sum(1 for p in pool if parse_epc_payload(p).payload() != p)
+    print(f"round trip: {bad} of {len(pool)} distinct payloads not rebuilt byte-identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# PayeeStore at scale: bulk import, cold load and lookups for both backends.
+# A copy of the old linear-scan get() is timed as a baseline.
+# Run: python benchmarks/bench_payees.py [--count 100000] [--lookups 10000]
+
+from pathlib import Path
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from epc_payees import open_payee_store  # noqa: E402
+
+
+def make_payees(count: int) -> list:
+    return [
+        {"name": f"Creditor {i:06d} GmbH", "iban": f"DE{i % 97:02d}{i:018d}", "bic": "COBADEFFXXX"}
+        for i in range(count)
+    ]
+
+
+def legacy_get(data: dict, name: str):
+    for p in data.get("payees", []):
+        if p.get("name", "") == name:
+            return p
+    return None
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark payee store backends.")
+    ap.add_argument("--count", type=int, default=100_000)
+    ap.add_argument("--lookups", type=int, default=10_000)
+    args = ap.parse_args(argv)
+
+    payees = make_payees(args.count)
+    rnd = random.Random(1)
+    names = [payees[rnd.randrange(args.count)]["name"] for _ in range(args.lookups)]
+    ibans = [payees[rnd.randrange(args.count)]["iban"] for _ in range(args.lookups)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fname in ("payees.json", "payees.db"):
+            path = Path(tmp) / fname
+            store = open_payee_store(path)
+            t_import, _ = timed(lambda: store.upsert_many(payees))
+            t_upsert, _ = timed(lambda: store.upsert({"name": names[0], "bic": "DEUTDEFFXXX"}))
+            if hasattr(store, "close"):
+                store.close()
+            t_load, store = timed(lambda: open_payee_store(path))
+            t_get, _ = timed(lambda: [store.get(n) for n in names])
+            t_iban, _ = timed(lambda: [store.find_by_iban(i) for i in ibans])
+            size = path.stat().st_size
+            print(f"{fname:<12} {args.count} payees, {size / 1e6:.1f} MB")
+            print(f"  bulk import   {t_import * 1000:9.1f} ms")
+            print(f"  single upsert {t_upsert * 1000:9.1f} ms (incl. persist)")
+            print(f"  cold load     {t_load * 1000:9.1f} ms")
+            print(f"  get by name   {args.lookups / t_get:9.0f} lookups/s")
+            print(f"  find by IBAN  {args.lookups / t_iban:9.0f} lookups/s")
+            if hasattr(store, "close"):
+                store.close()
+
+        data = {"payees": payees}
+        sample = names[:200]
+        t_legacy, _ = timed(lambda: [legacy_get(data, n) for n in sample])
+        print(f"legacy linear get: {len(sample) / t_legacy:9.0f} lookups/s")
+        t_dump, _ = timed(lambda: json.dumps(data, ensure_ascii=False, indent=2))
+        print(f"legacy indent=2 serialization per edit: {t_dump * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# Per-stage timing of the whole code pipeline:
+#   payload (build_epc_payload) -> encode (qr.make(fit=True)) -> image (make_image) -> save (PNG bytes)
+# over a synthetic, seeded mix of payments: short/long names, structured (RF)
+# vs. unstructured remittance, version 001/002. Reports per-stage medians,
+# codes/s, peak RSS and output sizes, overall and per payment variant.
+# Run: python benchmarks/bench_pipeline.py [--count 500] [--json out.json] [--compare base.json]
+#      [--profile out.prof] [--tracemalloc]
+
+from pathlib import Path
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from epc_core import EpcFields, build_epc_payload  # noqa: E402
+from epc_iban import iban_mod97  # noqa: E402
+
+STAGES = ("payload", "encode", "image", "save")
+SHORT_NAMES = ["Max Mustermann", "ACME AG", "Jo Li"]
+LONG_NAMES = [
+    "Stadtwerke Musterstadt GmbH & Co. KG – Abteilung Forderungsmanagement",
+    "Müller-Lüdenscheidt Gemeinnütziger Förderverein für Kultur und Sport e.V.",
+]
+IBANS = ["DE89370400440532013000", "AT611904300234573201", "FR1420041010050500013M02606", "NL91ABNA0417164300"]
+BICS = ["COBADEFFXXX", "BKAUATWW", "PSSTFRPPPAR", "ABNANL2A"]
+WORDS = "Rechnung Miete Beitrag Kundennummer Vertrag Abschlag Monat November Objekt Gartenstraße".split()
+
+
+def rf_reference(rnd: random.Random) -> str:
+    # ISO 11649 creditor reference with valid check digits
+    body = "".join(rnd.choice("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rnd.randint(6, 21)))
+    return f"RF{98 - iban_mod97('RF00' + body):02d}{body}"
+
+
+def make_cases(count: int, seed: int = 42) -> list:
+    # (variant label, EpcFields); every combination appears about equally often
+    rnd = random.Random(seed)
+    cases = []
+    for i in range(count):
+        long_name = i % 2 == 1
+        structured = (i // 2) % 2 == 1
+        version = "001" if (i // 4) % 2 == 1 else "002"
+        k = rnd.randrange(len(IBANS))
+        name = rnd.choice(LONG_NAMES if long_name else SHORT_NAMES)[:70]
+        text = None
+        if not structured:
+            words = [rnd.choice(WORDS) for _ in range(rnd.randint(1, 18))]
+            text = (" ".join(words) + f" {rnd.randrange(10**6):06d}")[:140]
+        fields = EpcFields(
+            name=name,
+            iban=IBANS[k],
+            amount_eur=f"{rnd.randrange(1, 10**6)}.{rnd.randrange(100):02d}",
+            bic=BICS[k] if version == "001" or rnd.random() < 0.3 else None,
+            purpose_code=rnd.choice([None, None, "GDDS", "RENT"]),
+            remittance_ref=rf_reference(rnd) if structured else None,
+            remittance_text=text,
+            info=rnd.choice([None, None, "Danke!"]),
+            version=version,
+        )
+        label = f"{'long' if long_name else 'short'}-name/{'rf' if structured else 'text'}/v{version}"
+        cases.append((label, fields))
+    return cases
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_pipeline(fields: EpcFields) -> tuple:
+    # one code through all stages; returns (seconds per stage, payload bytes, PNG bytes, QR version)
+    import qrcode
+
+    t0 = time.perf_counter()
+    payload = build_epc_payload(fields.name, fields.iban, fields.amount_eur, fields.bic, fields.purpose_code,
+                                fields.remittance_ref, fields.remittance_text, fields.info,
+                                fields.version, fields.charset)
+    t1 = time.perf_counter()
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    t2 = time.perf_counter()
+    img = qr.make_image()
+    t3 = time.perf_counter()
+    buf = io.BytesIO()
+    img.save(buf)
+    t4 = time.perf_counter()
+    return (t1 - t0, t2 - t1, t3 - t2, t4 - t3), len(payload.encode("utf-8")), buf.tell(), qr.version
+
+
+def summarize(samples: list) -> dict:
+    # samples: list of per-stage tuples
+    out = {}
+    for i, stage in enumerate(STAGES):
+        values = sorted(s[i] for s in samples)
+        out[stage] = {
+            "median_ms": statistics.median(values) * 1000,
+            "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+            "mean_ms": statistics.fmean(values) * 1000,
+        }
+    totals = [sum(s) for s in samples]
+    out["total"] = {"median_ms": statistics.median(totals) * 1000, "mean_ms": statistics.fmean(totals) * 1000}
+    return out
+
+
+def run(cases: list) -> dict:
+    run_pipeline(cases[0][1])  # warm-up: imports, qrcode tables
+    samples, by_variant, sizes, versions = [], {}, [], {}
+    started = time.perf_counter()
+    for label, fields in cases:
+        stages, payload_bytes, png_bytes, version = run_pipeline(fields)
+        samples.append(stages)
+        by_variant.setdefault(label, []).append(stages)
+        sizes.append((payload_bytes, png_bytes))
+        versions[version] = versions.get(version, 0) + 1
+    elapsed = time.perf_counter() - started
+    return {
+        "codes": len(cases),
+        "seconds": elapsed,
+        "codes_per_sec": len(cases) / elapsed,
+        "stages": summarize(samples),
+        "variants": {label: summarize(s) for label, s in sorted(by_variant.items())},
+        "payload_bytes": {"mean": statistics.fmean(p for p, _ in sizes), "max": max(p for p, _ in sizes)},
+        "png_bytes": {"mean": statistics.fmean(b for _, b in sizes), "max": max(b for _, b in sizes)},
+        "qr_versions": {str(k): v for k, v in sorted(versions.items())},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def environment() -> dict:
+    try:
+        from importlib.metadata import version
+        qrcode_version = version("qrcode")
+        pillow_version = version("pillow")
+    except Exception:
+        qrcode_version = pillow_version = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "qrcode": qrcode_version,
+        "pillow": pillow_version,
+    }
+
+
+def print_report(res: dict) -> None:
+    print(f"{res['codes']} codes in {res['seconds']:.2f}s = {res['codes_per_sec']:.1f} codes/s, "
+          f"peak RSS {res['peak_rss_mb']:.1f} MB")
+    print(f"payload {res['payload_bytes']['mean']:.0f} B avg / {res['payload_bytes']['max']} B max, "
+          f"PNG {res['png_bytes']['mean']:.0f} B avg / {res['png_bytes']['max']} B max, "
+          f"QR versions {res['qr_versions']}")
+    print(f"{'stage':<10}{'median ms':>11}{'p95 ms':>9}{'share':>8}")
+    total = sum(res["stages"][s]["mean_ms"] for s in STAGES)
+    for stage in STAGES:
+        st = res["stages"][stage]
+        print(f"{stage:<10}{st['median_ms']:>11.3f}{st['p95_ms']:>9.3f}{st['mean_ms'] / total:>8.0%}")
+    print(f"\n{'variant':<24}" + "".join(f"{s:>10}" for s in STAGES) + f"{'total':>10}   (median ms)")
+    for label, st in res["variants"].items():
+        print(f"{label:<24}" + "".join(f"{st[s]['median_ms']:>10.3f}" for s in STAGES)
+              + f"{st['total']['median_ms']:>10.3f}")
+
+
+def compare(res: dict, base: dict, max_regression: float) -> int:
+    # per-stage median ratio against a saved run; 1 if any stage got slower
+    # than the allowed factor
+    print(f"\ncompared with baseline ({base.get('environment', {}).get('python', '?')}, "
+          f"{base['result']['codes']} codes):")
+    failed = 0
+    for stage in STAGES + ("total",):
+        new = res["stages"][stage]["median_ms"]
+        old = base["result"]["stages"][stage]["median_ms"]
+        ratio = new / old if old else float("inf")
+        flag = "  REGRESSION" if ratio > max_regression else ""
+        failed |= bool(flag)
+        print(f"  {stage:<10}{old:>9.3f} -> {new:>9.3f} ms  x{ratio:.2f}{flag}")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the payload -> matrix -> PNG pipeline per stage.")
+    ap.add_argument("--count", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", type=Path, help="save the results (and environment) to this file")
+    ap.add_argument("--compare", type=Path, help="earlier --json file to compare against")
+    ap.add_argument("--max-regression", type=float, default=1.15,
+                    help="fail if a stage median is this many times slower than the baseline (default: 1.15)")
+    ap.add_argument("--profile", type=Path, help="run under cProfile, write stats here and print the top entries")
+    ap.add_argument("--tracemalloc", action="store_true", help="trace allocations and print the top sites")
+    args = ap.parse_args(argv)
+
+    cases = make_cases(args.count, args.seed)
+    if args.tracemalloc:
+        import tracemalloc
+        tracemalloc.start(10)
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        res = profiler.runcall(run, cases)
+    else:
+        res = run(cases)
+    print_report(res)
+
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"\ntracemalloc: peak {peak / 1e6:.1f} MB traced, {current / 1e6:.1f} MB still allocated")
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:10]:
+            print(f"  {stat}")
+        tracemalloc.stop()
+
+    if args.profile:
+        import pstats
+        profiler.dump_stats(args.profile)
+        print(f"\ncProfile -> {args.profile} (timings above include profiler overhead)")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+    if args.json:
+        args.json.write_text(json.dumps({
+            "benchmark": "pipeline", "count": args.count, "seed": args.seed,
+            "environment": environment(), "result": res,
+        }, indent=2), encoding="utf-8")
+        print(f"\nresults -> {args.json}")
+    if args.compare:
+        if args.profile or args.tracemalloc:
+            print("note: --profile/--tracemalloc slow every stage down, compare plain runs only")
+        return compare(res, json.loads(args.compare.read_text(encoding="utf-8")), args.max_regression)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
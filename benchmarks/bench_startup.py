@@ -0,0 +1,93 @@
+# GUI cold-start budget.
+# Starts fresh interpreters, opens the main window against a generated payee
+# file and reports when the window is painted and when the saved payees are
+# usable. Fails if the median time to the first paint is above the budget.
+# Runs without a display through Qt's offscreen platform unless --native.
+# Run: python benchmarks/bench_startup.py [--runs 5] [--payees 100000] [--budget-ms 1000]
+
+from pathlib import Path
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = Path(__file__).resolve().parent.parent
+STAGES = ("import", "window", "painted", "payees")
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from pathlib import Path
+import SepaQRCode
+t_import = time.perf_counter()
+from PySide6.QtWidgets import QApplication
+SepaQRCode.APP_STATE = Path({payees!r})
+app = QApplication([])
+w = SepaQRCode.MainWindow()
+t_window = time.perf_counter()
+w.show()
+app.processEvents()
+t_painted = time.perf_counter()
+while w.store is None and time.perf_counter() - t0 < 60:
+    app.processEvents()
+    time.sleep(0.001)
+t_payees = time.perf_counter()
+ms = lambda t: (t - t0) * 1000
+print(json.dumps({{"import": ms(t_import), "window": ms(t_window), "painted": ms(t_painted),
+                  "payees": ms(t_payees), "count": len(w.store) if w.store is not None else -1}}))
+"""
+
+
+def write_payees(path: Path, count: int) -> None:
+    payees = [{"name": f"Lieferant {i:06d} GmbH", "iban": "DE89370400440532013000", "bic": "COBADEFFXXX"}
+              for i in range(count)]
+    path.write_text(json.dumps({"payees": payees}, ensure_ascii=False), encoding="utf-8")
+
+
+def measure(payees: Path, runs: int, native: bool) -> list:
+    env = dict(os.environ)
+    if not native:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    code = PROBE.format(payees=str(payees))
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    return results
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Measure GUI start-up time in fresh interpreters.")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--payees", type=int, default=100_000, help="saved payees in the generated payee file")
+    ap.add_argument("--budget-ms", type=float, default=1000.0, help="limit for the median time to first paint")
+    ap.add_argument("--native", action="store_true", help="use the real display instead of offscreen")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        payees = Path(tmp) / "payees.json"
+        write_payees(payees, args.payees)
+        results = measure(payees, args.runs, args.native)
+    for stage in STAGES:
+        times = [r[stage] for r in results]
+        print(f"{stage:<8} median {statistics.median(times):8.1f} ms, min {min(times):8.1f} ms, "
+              f"max {max(times):8.1f} ms")
+    print(f"({args.runs} runs, {args.payees} payees; times from interpreter start of the probe, "
+          f"budget {args.budget_ms:.0f} ms to first paint)")
+    if any(r["count"] != args.payees for r in results):
+        print("FAIL: payees did not load")
+        return 1
+    if statistics.median(r["painted"] for r in results) > args.budget_ms:
+        print("FAIL: over budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
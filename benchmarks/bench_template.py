@@ -0,0 +1,66 @@
+# Fixed payee, variable amount: per-code cost of the plain path
+# (build_epc_payload + make_qr) vs. a PayeeTemplate built once, per stage.
+# Run: python benchmarks/bench_template.py [--count 500]
+
+from pathlib import Path
+import argparse
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from epc_core import build_epc_payload, make_qr, matrix_of, render_qr  # noqa: E402
+from epc_template import PayeeTemplate  # noqa: E402
+
+PAYEE = {"name": "Stadtwerke Musterstadt GmbH & Co. KG", "iban": "DE89 3704 0044 0532 0130 00", "bic": "COBADEFFXXX"}
+
+
+def sample_rows(count: int) -> list:
+    return [
+        (f"{(i * 37) % 5000 + 1}.{i % 100:02d}", f"Rechnung 2025-{i:04d}")
+        for i in range(count)
+    ]
+
+
+def per_code_ms(fn, rows: list) -> float:
+    fn(*rows[0])  # warm-up (imports)
+    times = []
+    for row in rows:
+        t0 = time.perf_counter()
+        fn(*row)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def plain_payload(amount, text):
+    return build_epc_payload(PAYEE["name"], PAYEE["iban"], amount, PAYEE["bic"], None, None, text, None)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark payee templates against the plain path.")
+    ap.add_argument("--count", type=int, default=500)
+    args = ap.parse_args(argv)
+
+    rows = sample_rows(args.count)
+    tpl = PayeeTemplate.from_payee(PAYEE)
+    for amount, text in rows[:50]:
+        assert matrix_of(tpl.make_qr(amount, None, None, text), 4) == matrix_of(make_qr(plain_payload(amount, text)), 4)
+
+    stages = [
+        ("payload", lambda a, t: plain_payload(a, t), lambda a, t: tpl.payload(a, None, None, t)),
+        ("payload + matrix", lambda a, t: make_qr(plain_payload(a, t)), lambda a, t: tpl.make_qr(a, None, None, t)),
+        ("png", lambda a, t: render_qr(make_qr(plain_payload(a, t)), "png"), lambda a, t: tpl.render(a, None, None, t)),
+        ("svg", lambda a, t: render_qr(make_qr(plain_payload(a, t)), "svg"),
+         lambda a, t: tpl.render(a, None, None, t, fmt="svg")),
+    ]
+    print(f"{'stage':<18}{'plain ms':>10}{'template ms':>13}{'speedup':>9}")
+    for name, plain, templated in stages:
+        a = per_code_ms(plain, rows)
+        b = per_code_ms(templated, rows)
+        print(f"{name:<18}{a:>10.3f}{b:>13.3f}{a / b:>8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
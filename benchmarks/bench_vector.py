@@ -0,0 +1,82 @@
+# Vector vs. raster output: wall time and output size per code.
+# Compares the PNG path (QR matrix -> PIL image -> PNG) with SVG and PDF
+# generated straight from the module matrix, plus qrcode's own SVG factory.
+# Run: python benchmarks/bench_vector.py [--count 200]
+
+from pathlib import Path
+import argparse
+import io
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from epc_core import EpcFields, make_qr, render_bytes  # noqa: E402
+
+NAMES = ["Fabian Hiller", "Stadtwerke Musterstadt GmbH & Co. KG", "Müller-Lüdenscheidt e.V."]
+TEXTS = [None, "Rechnung 2025-0042", "Miete Wohnung 3. OG links, Objekt Gartenstraße 12, Monat November 2025"]
+
+
+def sample_payloads(count: int) -> list:
+    out = []
+    for i in range(count):
+        out.append(EpcFields(
+            name=NAMES[i % len(NAMES)],
+            iban="DE89370400440532013000",
+            amount_eur=f"{(i * 37) % 5000 + 1}.{i % 100:02d}",
+            bic="COBADEFFXXX" if i % 2 else None,
+            remittance_ref="RF18539007547034" if i % 3 == 0 else None,
+            remittance_text=None if i % 3 == 0 else TEXTS[i % len(TEXTS)],
+        ).payload())
+    return out
+
+
+def qrcode_svg(payload: str) -> bytes:
+    from qrcode.image.svg import SvgPathImage
+
+    buf = io.BytesIO()
+    make_qr(payload).make_image(image_factory=SvgPathImage).save(buf)
+    return buf.getvalue()
+
+
+def bench(name: str, fn, payloads: list) -> dict:
+    fn(payloads[0])  # warm-up (imports)
+    times, sizes = [], []
+    for p in payloads:
+        t0 = time.perf_counter()
+        data = fn(p)
+        times.append(time.perf_counter() - t0)
+        sizes.append(len(data))
+    total = sum(times)
+    return {
+        "name": name,
+        "ms_median": statistics.median(times) * 1000,
+        "codes_per_sec": len(payloads) / total,
+        "bytes_mean": statistics.mean(sizes),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark PNG vs. SVG/PDF output.")
+    ap.add_argument("--count", type=int, default=200)
+    args = ap.parse_args(argv)
+
+    payloads = sample_payloads(args.count)
+    cases = [
+        ("png (PIL)", lambda p: render_bytes(p, "png")),
+        ("svg (qrcode factory)", qrcode_svg),
+        ("svg (matrix)", lambda p: render_bytes(p, "svg")),
+        ("pdf (matrix)", lambda p: render_bytes(p, "pdf")),
+        ("pdf fragment", lambda p: render_bytes(p, "pdf-fragment")),
+        ("matrix only", lambda p: render_bytes(p, "raw")),
+    ]
+    print(f"{'output':<22}{'median ms':>10}{'codes/s':>10}{'avg bytes':>11}")
+    for name, fn in cases:
+        r = bench(name, fn, payloads)
+        print(f"{r['name']:<22}{r['ms_median']:>10.2f}{r['codes_per_sec']:>10.0f}{r['bytes_mean']:>11.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
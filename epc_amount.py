@@ -0,0 +1,183 @@
+# Exact EPC amounts – integer cents instead of float
+# Accepted input (all in euros):
+#   str      "12", "12.5", "12,50", "1.234,56", "1,234.56", "1 234,56", "1'234.56"
+#   int      whole euros (12 -> 12.00 EUR, the same as "12")
+#   Decimal  at most two decimal places
+# Amounts already in cents go through check_cents (EpcFields.amount_cents), so
+# the unit never depends on whether a value went through str() on the way.
+# The EPC069-12 range is 0.01 .. 999999999.99 EUR. More than two decimals,
+# exponents, nan/inf, signs and floats are rejected instead of rounded.
+# Run the microbenchmark: python benchmarks/bench_amount.py
+
+from typing import TYPE_CHECKING, Iterable, Optional, Union
+import re
+
+if TYPE_CHECKING:
+    from decimal import Decimal
+
+EPC_MAX_CENTS = 99_999_999_999  # 999999999.99 EUR
+
+Amount = Union[str, int, "Decimal"]
+
+# Patterns are compiled on first use through re's own cache, so importing
+# this module (and epc_core) stays cheap; the common input never gets here.
+# plain "123", "123.4", "123,45"
+_SIMPLE = r"([0-9]{1,9})(?:[.,]([0-9]{1,2}))?"
+# with thousands grouping; the decimal separator is the other character
+_GROUPED = r"([0-9]{1,3}([.,' ])[0-9]{3}(?:\2[0-9]{3})*)(?:([.,])([0-9]{1,2}))?"
+# only to pick the right error message
+_TOO_PRECISE = r"[0-9]+[.,][0-9]{3,}"
+_TOO_LARGE = r"[0-9]{10,}(?:[.,][0-9]{1,2})?"
+_SPACES = str.maketrans({"\u00a0": " ", "\u202f": " "})  # (narrow) NBSP as group separator
+
+
+class AmountError(ValueError):
+    # .key is the epc_i18n error key (err_amount_pos, err_amount_max, err_amount_dec)
+    def __init__(self, key: str):
+        from epc_i18n import I18N
+
+        super().__init__(I18N["en"][key])
+        self.key = key
+
+
+def _parse_str(text: str) -> int:
+    text = text.strip()
+    m = re.fullmatch(_SIMPLE, text)
+    if m is not None:
+        whole, frac = m.groups()
+        cents = int(whole) * 100
+        if frac:
+            cents += int(frac) * (10 if len(frac) == 1 else 1)
+        return cents
+
+    text = text.translate(_SPACES)
+    m = re.fullmatch(_GROUPED, text)
+    if m is not None:
+        whole, group, dec, frac = m.groups()
+        if dec == group:
+            raise AmountError("err_amount_pos")  # "1.234.56"
+        if dec is None and group in ".," and whole.count(group) == 1:
+            raise AmountError("err_amount_dec")  # "1.234" – 1234 or 1.234?
+        cents = int(whole.replace(group, "")) * 100
+        if frac:
+            cents += int(frac) * (10 if len(frac) == 1 else 1)
+        return cents
+
+    if re.fullmatch(_TOO_PRECISE, text):
+        raise AmountError("err_amount_dec")
+    if re.fullmatch(_TOO_LARGE, text):
+        raise AmountError("err_amount_max")
+    raise AmountError("err_amount_pos")
+
+
+def parse_cents(value: Amount) -> int:
+    # Amount in integer cents, within the EPC range. Raises AmountError.
+    if type(value) is str:
+        text = value.strip()
+        # fast path for "1234.56" / "1234,56": one int() call, no regex
+        if 3 < len(text) <= 12 and text[-3] in ".," and text.isascii():
+            digits = text[:-3] + text[-2:]
+            cents = int(digits) if digits.isdigit() else _parse_str(text)
+        else:
+            cents = _parse_str(text)
+    elif isinstance(value, str):
+        cents = _parse_str(value)
+    elif isinstance(value, int) and not isinstance(value, bool):
+        cents = value * 100
+    else:
+        from decimal import Decimal
+
+        if not isinstance(value, Decimal) or not value.is_finite():
+            raise AmountError("err_amount_pos")
+        cents = value * 100
+        if cents != cents.to_integral_value():
+            raise AmountError("err_amount_dec")
+        cents = int(cents)
+    if cents <= 0:
+        raise AmountError("err_amount_pos")
+    if cents > EPC_MAX_CENTS:
+        raise AmountError("err_amount_max")
+    return cents
+
+
+def check_cents(value: Union[int, str]) -> int:
+    # An amount given in cents: an int or a string of digits ("1234" from a
+    # CSV column), within the EPC range. Raises AmountError.
+    if type(value) is str:
+        text = value.strip()
+        if not (text.isascii() and text.isdigit()):
+            raise AmountError("err_amount_pos")
+        cents = int(text)
+    elif isinstance(value, int) and not isinstance(value, bool):
+        cents = value
+    else:
+        raise AmountError("err_amount_pos")
+    if cents <= 0:
+        raise AmountError("err_amount_pos")
+    if cents > EPC_MAX_CENTS:
+        raise AmountError("err_amount_max")
+    return cents
+
+
+def amount_error(value: Optional[Amount], cents: Optional[Union[int, str]] = None) -> str:
+    # "" if valid, otherwise the epc_i18n error key; with cents set, checks
+    # that one instead (value must then be empty, see optional_cents)
+    try:
+        if cents is None:
+            parse_cents(value)
+        else:
+            optional_cents(value, cents)
+    except AmountError as e:
+        return e.key
+    return ""
+
+
+def format_cents(cents: int) -> str:
+    # 123456 -> "1234.56" (EPC notation: "." as decimal separator, no grouping)
+    return "%d.%02d" % divmod(cents, 100)
+
+
+def normalize_amount(value: Amount) -> str:
+    # format_cents(parse_cents(value)), e.g. "1.234,56" -> "1234.56". The
+    # common "1234.56"/"1234,56" input is checked and rebuilt without the
+    # int round trip: no leading zero means > 0, 9 digits means <= the maximum.
+    if type(value) is str:
+        text = value.strip()
+        if 3 < len(text) <= 12 and text[-3] in ".," and text[0] != "0" and text.isascii():
+            whole = text[:-3]
+            frac = text[-2:]
+            if whole.isdigit() and frac.isdigit():
+                return whole + "." + frac
+    return format_cents(parse_cents(value))
+
+
+def parse_amounts(values: Iterable) -> list:
+    # Batch form for a whole column: one (cents, error key) pair per input,
+    # cents is None when invalid. Amount columns repeat a lot (fees, rents),
+    # so string results are memoized per distinct raw value for the call.
+    seen: dict = {}
+    out = []
+    append = out.append
+    for raw in values:
+        res = seen.get(raw) if type(raw) is str else None
+        if res is None:
+            try:
+                res = (parse_cents(raw), "")
+            except AmountError as e:
+                res = (None, e.key)
+            if type(raw) is str:
+                seen[raw] = res
+        append(res)
+    return out
+
+
+def optional_cents(value: Optional[Amount], cents: Optional[Union[int, str]] = None) -> Optional[int]:
+    # None for empty input (no amount line), otherwise parse_cents(value), or
+    # check_cents(cents) when the amount is given in cents. Both at once is
+    # an error rather than a guess which one is meant.
+    empty = value is None or (isinstance(value, str) and not value.strip())
+    if cents is not None:
+        if not empty:
+            raise AmountError("err_amount_both")
+        return check_cents(cents)
+    return None if empty else parse_cents(value)
@@ -0,0 +1,134 @@
+# EPC (SEPA) QR asyncio API – render codes from async code without blocking the event loop
+# Payloads are built and validated on the loop (cheap, same core as the GUI and
+# epc_batch.py); the qrcode/PIL work runs in a process or thread pool.
+#
+#   async with AsyncRenderer(max_concurrency=8) as r:
+#       png = await r.render({"name": "...", "iban": "...", "amount": "12.34"})
+#       async for res in r.render_many(rows, fmt="svg"):   # as they complete
+#           ...res.index, res.data, res.error
+#
+# Cancelling the awaiting task drops queued renders (a render that already
+# runs in a worker process finishes there and is discarded). Breaking out of
+# render_many early: wrap it in contextlib.aclosing() so the remaining renders
+# are cancelled right away instead of when the generator is collected.
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Iterable, NamedTuple, Optional, Union
+import asyncio
+import os
+
+from epc_batch import row_to_fields
+from epc_core import EpcFields, MIME_TYPES, render_bytes, validate_epc
+from epc_i18n import I18N
+
+Item = Union[EpcFields, dict, str]  # fields, a batch-style row, or a ready payload
+
+
+class InvalidFields(ValueError):
+    # .key is the epc_i18n error key of the first problem
+    def __init__(self, key: str):
+        super().__init__(I18N["en"][key])
+        self.key = key
+
+
+class AsyncResult(NamedTuple):
+    index: int
+    data: Optional[bytes] = None
+    error: Optional[str] = None  # English message; data is None then
+
+
+def item_payload(item: Item) -> str:
+    # Validates like the GUI and returns the EPC payload; raises InvalidFields.
+    if isinstance(item, str):
+        return item
+    fields = row_to_fields(item) if isinstance(item, dict) else item
+    ok, key = validate_epc(fields)
+    if not ok:
+        raise InvalidFields(key)
+    return fields.payload()
+
+
+class AsyncRenderer:
+    def __init__(self, executor: Union[str, Executor] = "process", workers: int = 0,
+                 max_concurrency: Optional[int] = None):
+        workers = workers if workers > 0 else (os.cpu_count() or 1)
+        if isinstance(executor, str):
+            pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+            self.executor = pool_cls(max_workers=workers)
+            self._owns_executor = True
+        else:
+            self.executor = executor
+            self._owns_executor = False
+        # renders submitted but not finished; keeps the pool queue short so
+        # cancellation takes effect quickly
+        self.max_concurrency = max_concurrency or workers * 2
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncRenderer":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._owns_executor:
+            # queued renders are dropped; wait for running ones off the loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.executor.shutdown(wait=True, cancel_futures=True))
+
+    async def render(self, item: Item, fmt: str = "png", optimize: bool = False) -> bytes:
+        if fmt not in MIME_TYPES:
+            raise ValueError(f"format must be one of {', '.join(MIME_TYPES)}")
+        payload = item_payload(item)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, render_bytes, payload, fmt, optimize)
+
+    async def _render_item(self, index: int, item: Item, fmt: str, optimize: bool) -> AsyncResult:
+        # Never raises (except on cancellation), so one bad item does not end the stream.
+        try:
+            return AsyncResult(index, await self.render(item, fmt, optimize))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return AsyncResult(index, None, str(e) or e.__class__.__name__)
+
+    async def render_many(self, items: Union[Iterable[Item], AsyncIterable[Item]], fmt: str = "png",
+                          optimize: bool = False) -> AsyncIterator[AsyncResult]:
+        # Yields an AsyncResult per item (index = position in items) in
+        # completion order. At most max_concurrency items are in flight, so
+        # large or endless (async) iterables are consumed lazily.
+        if hasattr(items, "__aiter__"):
+            source = items.__aiter__()
+        else:
+            source = _aiter_sync(items)
+        pending: set = set()
+        index = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < self.max_concurrency:
+                    try:
+                        item = await source.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(self._render_item(index, item, fmt, optimize)))
+                    index += 1
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for result in sorted((task.result() for task in done), key=lambda r: r.index):
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _aiter_sync(items: Iterable[Item]) -> AsyncIterator[Item]:
+    for item in items:
+        yield item
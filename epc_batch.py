@@ -0,0 +1,509 @@
+# EPC (SEPA) QR batch generator – headless, no Qt import
+# Turns a CSV or JSONL file of payments into one PNG per row.
+# Requirements:
+#   pip install qrcode[pil]
+# Run: python epc_batch.py payments.csv --out ./qr_out [--workers 0] [--chunk-size 64]
+#      python epc_batch.py payments.csv --validate-only [--report errors.jsonl]
+#      python epc_batch.py payments.csv --verify-sample 0.05   (decode a sample back, see epc_verify.py)
+#      python epc_batch.py payments.csv --manifest run.jsonl   (resumable; re-run the same command after a crash)
+#      python epc_batch.py payments.csv --pack codes.epcpack   (all codes in one file, see epc_pack.py)
+#
+# Columns / keys (CSV header or JSON object keys):
+#   name, iban, amount, bic, purpose, ref, text, info, version, charset, id
+# The long build_epc_payload argument names (amount_eur, purpose_code,
+# remittance_ref, remittance_text) are accepted as well. "id" is optional and
+# used as filename prefix instead of the row number. "amount" is in euros;
+# use an "amount_cents" (or "cents") column instead for integer cents.
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from epc_cache import DEFAULT_MAX_BYTES, RenderCache, cache_key
+from epc_core import (
+    BASE_OUT, EpcFields, iter_epc_errors, make_qr, matrix_of, pack_matrix, payload_digest, png_filename,
+    render_qr, save_bytes, validate_epc,
+)
+from epc_i18n import I18N
+from epc_manifest import Manifest
+from epc_optimize import ecc_name, plan_qr
+from epc_pack import PackWriter
+from epc_verify import file_prefix, sampled, verify_file
+import epc_trace
+
+# input column -> EpcFields / build_epc_payload argument
+FIELD_ALIASES = {
+    "name": "name",
+    "iban": "iban",
+    "amount": "amount_eur",
+    "amount_eur": "amount_eur",
+    "amount_cents": "amount_cents",
+    "cents": "amount_cents",
+    "bic": "bic",
+    "purpose": "purpose_code",
+    "purpose_code": "purpose_code",
+    "ref": "remittance_ref",
+    "remittance_ref": "remittance_ref",
+    "text": "remittance_text",
+    "remittance_text": "remittance_text",
+    "info": "info",
+    "version": "version",
+    "charset": "charset",
+}
+
+STAMP_LEN = 10  # hex digits of the payload hash in stable filenames
+
+# ------------------ Input readers ------------------
+def detect_format(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return "csv"
+
+
+def iter_rows(path: Path, fmt: Optional[str] = None) -> Iterator[dict]:
+    # Streams rows one at a time so memory stays flat for large files.
+    fmt = fmt or detect_format(path)
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        if fmt == "jsonl":
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            sample = fh.read(4096)
+            fh.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            yield from csv.DictReader(fh, dialect=dialect)
+
+
+def row_to_fields(row: dict) -> EpcFields:
+    kwargs = {}
+    for key, value in row.items():
+        arg = FIELD_ALIASES.get((key or "").strip().lower())
+        if arg is None or value is None:
+            continue
+        value = str(value).strip()
+        if value == "":
+            if arg in ("version", "charset"):
+                continue  # keep EpcFields defaults
+            value = "" if arg in ("name", "iban") else None
+        kwargs[arg] = value
+    return EpcFields(**kwargs)
+
+
+def row_id(index: int, row: dict) -> str:
+    # the row's "id" column, else its zero-padded row number
+    return str(row.get("id") or "").strip() or f"{index:06d}"
+
+
+def row_filename(index: int, row: dict, fields: EpcFields, stamp: Optional[str] = None) -> str:
+    return png_filename(fields.amount_eur, fields.iban, prefix=f"{row_id(index, row)}_", stamp=stamp,
+                        amount_cents=fields.amount_cents)
+
+
+def render_key(payload: str, opts: "BatchOptions") -> str:
+    # content hash of what gets written: same as the render cache key
+    return cache_key(payload, {"format": "png", "optimize": opts.optimize})
+
+
+# ------------------ Rendering ------------------
+@dataclass
+class BatchOptions:
+    # Picklable settings handed to every worker process.
+    out_dir: Path
+    cache_dir: Optional[Path] = None
+    cache_max_bytes: int = DEFAULT_MAX_BYTES
+    optimize: bool = False
+    trace: bool = False  # time each row and its stages (set when epc_trace hooks are active)
+    verify_sample: float = 0.0  # fraction of written PNGs decoded back and compared (epc_verify)
+    stable_names: bool = False  # payload hash instead of the date in filenames (resumable runs)
+    pack: bool = False  # hand the packed matrix back instead of writing a PNG (epc_pack)
+
+
+class RowResult(NamedTuple):
+    index: int
+    path: Optional[Path]
+    error: str = ""
+    cached: bool = False
+    version: int = 0  # QR version (size) of the code, 0 if unknown (cache hit without --optimize)
+    ecc: str = ""
+    seconds: float = 0.0  # only with BatchOptions.trace
+    stages: Optional[dict] = None  # stage -> ms, only with BatchOptions.trace
+    verified: bool = False  # decoded back with BatchOptions.verify_sample
+    verify_error: str = ""  # "<reason>: <message>" if the decoded code differs
+    packed: Optional[tuple] = None  # (matrix bytes, payload hash, meta) with BatchOptions.pack
+
+
+_caches: dict = {}  # one RenderCache per process and cache dir
+
+
+def get_cache(opts: BatchOptions) -> Optional[RenderCache]:
+    if opts.cache_dir is None:
+        return None
+    cache = _caches.get(opts.cache_dir)
+    if cache is None:
+        cache = _caches[opts.cache_dir] = RenderCache(opts.cache_dir, opts.cache_max_bytes)
+    return cache
+
+
+def render_row(index: int, row: dict, opts: BatchOptions) -> RowResult:
+    # Never raises, so one broken row does not abort the whole run.
+    if not opts.trace:
+        return _render_row(index, row, opts)
+    # workers cannot reach the parent's hooks: stage times travel with the result
+    recorder = epc_trace.recorder()
+    recorder.start()
+    started = time.perf_counter()
+    res = _render_row(index, row, opts)
+    return res._replace(seconds=time.perf_counter() - started, stages=recorder.stop())
+
+
+def _render_row(index: int, row: dict, opts: BatchOptions) -> RowResult:
+    try:
+        fields = row_to_fields(row)
+        ok, key = validate_epc(fields)
+        if not ok:
+            return RowResult(index, None, I18N["en"][key])
+        payload = fields.payload()
+        stamp = render_key(payload, opts)[:STAMP_LEN] if opts.stable_names else None
+        out_path = opts.out_dir / row_filename(index, row, fields, stamp)
+        if opts.pack:
+            qr = make_qr(payload, opts.optimize)
+            meta = {"id": row_id(index, row), "row": index, "name": out_path.name}
+            return RowResult(index, None, version=qr.version, ecc=ecc_name(qr),
+                             packed=(pack_matrix(matrix_of(qr)), payload_digest(payload), meta))
+        cache = get_cache(opts)
+        if cache is None:
+            qr = make_qr(payload, opts.optimize)
+            save_bytes(render_qr(qr, "png"), out_path, overwrite=True)
+            res = RowResult(index, out_path, version=qr.version, ecc=ecc_name(qr))
+        else:
+            out_path, hit = cache.render_png(payload, out_path, optimize=opts.optimize)
+            res = RowResult(index, out_path, cached=hit)
+            if opts.optimize:
+                plan = plan_qr(payload)  # cheap: bit counting only, no matrix
+                res = res._replace(version=plan.version, ecc=plan.ecc)
+        if opts.verify_sample and sampled(file_prefix(out_path.name), opts.verify_sample):
+            check = verify_file(out_path, payload)
+            res = res._replace(verified=True, verify_error="" if check.ok else f"{check.reason}: {check.message}")
+        return res
+    except Exception as e:
+        return RowResult(index, None, str(e) or e.__class__.__name__)
+
+
+def render_chunk(chunk: list, opts: BatchOptions) -> list:
+    # Worker entry point: renders a list of (index, row) pairs.
+    return [render_row(index, row, opts) for index, row in chunk]
+
+
+def iter_chunks(pairs: Iterable[tuple[int, dict]], size: int) -> Iterator[list]:
+    it = iter(pairs)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_results(rows: Iterable[dict], opts: BatchOptions, workers: int = 1,
+                 chunk_size: int = 64) -> Iterator[RowResult]:
+    # Yields one result per row, always in input order. With workers > 1 the
+    # rows are rendered in a process pool; only a bounded window of chunks is
+    # in flight, so the input is never read into memory as a whole.
+    return iter_indexed_results(enumerate(rows, start=1), opts, workers, chunk_size)
+
+
+def iter_indexed_results(pairs: Iterable[tuple[int, dict]], opts: BatchOptions, workers: int = 1,
+                         chunk_size: int = 64) -> Iterator[RowResult]:
+    # iter_results for (row number, row) pairs, e.g. with finished rows left out
+    if workers <= 1:
+        for index, row in pairs:
+            yield render_row(index, row, opts)
+        return
+
+    yield from iter_chunk_results(pairs, render_chunk, (opts,), lambda index, err: RowResult(index, None, err),
+                                  workers, chunk_size)
+
+
+def iter_chunk_results(pairs: Iterable[tuple[int, dict]], work, args: tuple, failed, workers: int,
+                       chunk_size: int = 64) -> Iterator:
+    # The ordered process-pool window behind iter_indexed_results, also used
+    # by epc_sheet.py: work(chunk, *args) runs in a worker for each chunk of
+    # (index, row) pairs and returns one result per pair; at most workers * 2
+    # chunks are in flight. If a worker dies (e.g. out of memory), every row
+    # of its chunk becomes failed(index, error) – the chunk fails, not the run.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in iter_chunks(pairs, chunk_size):
+            pending.append((chunk, pool.submit(work, chunk, *args)))
+            if len(pending) >= workers * 2:
+                yield from _chunk_results(*pending.popleft(), failed)
+        while pending:
+            yield from _chunk_results(*pending.popleft(), failed)
+
+
+def _chunk_results(chunk: list, future, failed) -> list:
+    try:
+        return future.result()
+    except Exception as e:
+        err = str(e) or e.__class__.__name__
+        return [failed(index, err) for index, _ in chunk]
+
+
+# ------------------ Resumable runs ------------------
+class ResumableRun:
+    # Filters rows against a Manifest: rows finished earlier (same id and
+    # payload hash, file still there) are skipped; a repeated payload is not
+    # rendered again but recorded as a duplicate of its first render.
+    def __init__(self, manifest: Manifest, opts: BatchOptions):
+        self.manifest = manifest
+        self.opts = opts
+        self.skipped = self.duplicates = 0
+        self.inflight: dict = {}  # row number -> (id, hash or None) of rows sent to render
+        self.first: dict = {}  # hash -> row number of its render in this run
+        self.waiting: dict = {}  # row number -> [(row number, id), ...] repeats of its payload
+
+    def pending(self, rows: Iterable[dict]) -> Iterator[tuple[int, dict]]:
+        for index, row in enumerate(rows, start=1):
+            rid = row_id(index, row)
+            fields = row_to_fields(row)
+            digest = None
+            if validate_epc(fields)[0]:
+                digest = render_key(fields.payload(), self.opts)
+                if self.manifest.finished(rid, digest):
+                    self.skipped += 1
+                    continue
+                earlier = self.manifest.rendered(digest)
+                if earlier is not None:
+                    self.duplicates += 1
+                    self.manifest.record_done(rid, index, digest, earlier[1], dup_of=earlier[0])
+                    continue
+                first = self.first.get(digest)
+                if first is not None:
+                    self.duplicates += 1
+                    self.waiting.setdefault(first, []).append((index, rid))
+                    continue
+                self.first[digest] = index
+            self.inflight[index] = (rid, digest)
+            yield index, row  # invalid rows too: the render reports why
+
+    def finish(self, res: RowResult) -> None:
+        rid, digest = self.inflight.pop(res.index)
+        waiting = self.waiting.pop(res.index, ())
+        if res.path is None:
+            self.first.pop(digest, None)  # later repeats try again
+            self.manifest.record_failed(rid, res.index, res.error)
+            for index, dup_id in waiting:
+                self.manifest.record_failed(dup_id, index, f"duplicate of {rid}: {res.error}")
+            return
+        self.manifest.record_done(rid, res.index, digest, str(res.path))
+        for index, dup_id in waiting:
+            self.manifest.record_done(dup_id, index, digest, str(res.path), dup_of=rid)
+
+
+def run_batch(path: Path, opts: BatchOptions, fmt: Optional[str] = None,
+              workers: int = 1, chunk_size: int = 64, render_log=None,
+              manifest: Optional[Manifest] = None, pack: Optional[PackWriter] = None) -> dict:
+    # render_log: optional text file; gets one JSON line per row with the
+    # output path, QR version and ECC level (or the error).
+    # manifest: checkpoint for resuming (see ResumableRun); implies stable filenames.
+    # pack: codes go into this pack file (written here, in order) instead of PNGs.
+    if pack is None:
+        opts.out_dir.mkdir(parents=True, exist_ok=True)
+    if epc_trace.active and not opts.trace:
+        opts = replace(opts, trace=True)
+    rows = iter_rows(path, fmt)
+    resume = None
+    if manifest is not None:
+        opts = replace(opts, stable_names=True)
+        resume = ResumableRun(manifest, opts)
+        manifest.start_run(input=str(path), out_dir=str(opts.out_dir))
+        pairs = resume.pending(rows)
+    else:
+        pairs = enumerate(rows, start=1)
+    if pack is not None:
+        opts = replace(opts, pack=True)
+    ok = failed = cached = verified = mismatches = 0
+    symbols: dict = {}  # "v5-L" -> count
+    started = time.perf_counter()
+    for res in iter_indexed_results(pairs, opts, workers, chunk_size):
+        if resume is not None:
+            resume.finish(res)
+        if res.packed is not None:
+            number = pack.add(res.packed[0], res.version, res.ecc, res.packed[1], res.packed[2])
+            res = res._replace(path=Path(f"{pack.path}#{number}"))
+        if res.path is None:
+            failed += 1
+            print(f"row {res.index}: {res.error}", file=sys.stderr)
+        else:
+            ok += 1
+            cached += res.cached
+            verified += res.verified
+            if res.verify_error:
+                mismatches += 1
+                print(f"row {res.index}: {res.path.name} does not decode to its payload ({res.verify_error})",
+                      file=sys.stderr)
+            if res.version:
+                label = f"v{res.version}-{res.ecc}"
+                symbols[label] = symbols.get(label, 0) + 1
+        if epc_trace.active:
+            epc_trace.emit("item", res.seconds, source="batch", row=res.index, ok=res.path is not None,
+                           error=res.error or None, path=str(res.path) if res.path else None,
+                           cached=res.cached, stages=res.stages)
+        if render_log is not None:
+            render_log.write(json.dumps({
+                "row": res.index, "path": str(res.path) if res.path else None,
+                "version": res.version or None, "ecc": res.ecc or None,
+                "cached": res.cached, "error": res.error or None,
+                "verified": res.verified, "verify_error": res.verify_error or None,
+            }) + "\n")
+    elapsed = time.perf_counter() - started
+    return {
+        "ok": ok,
+        "failed": failed,
+        "cache_hits": cached,
+        "verified": verified,
+        "mismatches": mismatches,
+        "skipped": resume.skipped if resume else 0,
+        "duplicates": resume.duplicates if resume else 0,
+        "symbols": symbols,
+        "seconds": elapsed,
+        "codes_per_sec": ok / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+# ------------------ Validate-only mode ------------------
+def iter_row_problems(rows: Iterable[dict]) -> Iterator[tuple[int, dict, list]]:
+    # Yields (row index, row, [(field, i18n key), ...]) for every row, in one
+    # pass and without keeping earlier rows around.
+    for index, row in enumerate(rows, start=1):
+        fields = row_to_fields(row)
+        yield index, row, list(iter_epc_errors(fields))
+
+
+def write_validation_report(rows: Iterable[dict], out, lang: str = "en") -> dict:
+    # JSON lines: one {"type": "error", ...} record per problem, then one
+    # {"type": "summary", ...} record. Returns the summary.
+    texts = I18N[lang]
+    total = invalid = 0
+    by_key: dict = {}
+    started = time.perf_counter()
+    for index, row, problems in iter_row_problems(rows):
+        total += 1
+        if not problems:
+            continue
+        invalid += 1
+        for field, key in problems:
+            by_key[key] = by_key.get(key, 0) + 1
+            rec = {"type": "error", "row": index, "field": field, "error": key, "message": texts[key]}
+            if row.get("id"):
+                rec["id"] = row["id"]
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    summary = {
+        "type": "summary",
+        "rows": total,
+        "valid": total - invalid,
+        "invalid": invalid,
+        "errors": by_key,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    out.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    return summary
+
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Render EPC (SEPA) QR PNGs from a CSV or JSONL file.")
+    ap.add_argument("input", type=Path, help="CSV or JSONL file with one payment per row")
+    ap.add_argument("--out", type=Path, default=BASE_OUT, help=f"output folder (default: {BASE_OUT})")
+    ap.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from file extension)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="render processes; 1 = in-process, 0 = one per CPU core (default: 1)")
+    ap.add_argument("--chunk-size", type=int, default=64,
+                    help="rows handed to a worker at a time (default: 64)")
+    ap.add_argument("--cache-dir", type=Path,
+                    help="reuse PNGs of identical payloads from this render cache folder")
+    ap.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                    help="cache size limit before old entries are evicted (default: %(default)s)")
+    ap.add_argument("--optimize", action="store_true",
+                    help="pick the smallest QR version over all ECC levels and segment encodings")
+    ap.add_argument("--render-log", type=Path,
+                    help="write one JSON line per row (path, QR version, ECC level, error) to this file")
+    ap.add_argument("--trace-log", type=Path,
+                    help="append one JSON line per row (latency, outcome, per-stage ms) to this file")
+    ap.add_argument("--manifest", type=Path,
+                    help="checkpoint file: resume an interrupted run, skip finished rows and repeated payloads "
+                         "(filenames then carry a payload hash instead of the date)")
+    ap.add_argument("--pack", type=Path, metavar="FILE",
+                    help="append the codes to this pack file instead of writing one PNG each (see epc_pack.py)")
+    ap.add_argument("--verify-sample", type=float, default=0.0, metavar="RATE",
+                    help="decode this fraction of the written PNGs (1.0 = all) and compare with the payload")
+    ap.add_argument("--validate-only", action="store_true",
+                    help="only check the rows and write an error report, render nothing")
+    ap.add_argument("--report", default="-",
+                    help="validation report file (JSON lines, default: stdout)")
+    ap.add_argument("--lang", choices=sorted(I18N), default="en", help="language of report messages")
+    args = ap.parse_args(argv)
+
+    if args.validate_only:
+        rows = iter_rows(args.input, args.format)
+        if args.report == "-":
+            summary = write_validation_report(rows, sys.stdout, args.lang)
+        else:
+            with open(args.report, "w", encoding="utf-8") as fh:
+                summary = write_validation_report(rows, fh, args.lang)
+            print(f"{summary['rows']} rows, {summary['invalid']} invalid -> {args.report}")
+        return 1 if summary["invalid"] else 0
+
+    if args.pack and (args.manifest or args.cache_dir or args.verify_sample):
+        ap.error("--pack cannot be combined with --manifest, --cache-dir or --verify-sample "
+                 "(check a pack with epc_pack.py --verify)")
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    opts = BatchOptions(args.out, args.cache_dir, args.cache_max_mb * 1024 * 1024, args.optimize,
+                        verify_sample=min(max(args.verify_sample, 0.0), 1.0))
+    render_log = open(args.render_log, "w", encoding="utf-8") if args.render_log else None
+    trace_log = epc_trace.add_hook(epc_trace.JsonLinesLogger(args.trace_log)) if args.trace_log else None
+    manifest = Manifest(args.manifest) if args.manifest else None
+    pack = PackWriter(args.pack) if args.pack else None
+    try:
+        stats = run_batch(args.input, opts, args.format, workers, max(1, args.chunk_size), render_log, manifest,
+                          pack)
+    finally:
+        if pack is not None:
+            pack.close()
+        if manifest is not None:
+            manifest.close()
+        if render_log is not None:
+            render_log.close()
+        if trace_log is not None:
+            trace_log.close()
+    print(
+        f"Rendered {stats['ok']} codes in {stats['seconds']:.2f}s "
+        f"({stats['codes_per_sec']:.1f} codes/s), {stats['failed']} failed -> {args.pack or args.out}"
+    )
+    if stats["symbols"]:
+        print("QR symbols: " + ", ".join(f"{k}: {v}" for k, v in sorted(stats["symbols"].items())))
+    if args.cache_dir:
+        print(f"Cache: {stats['cache_hits']} hits, {stats['ok'] - stats['cache_hits']} misses")
+    if manifest is not None:
+        print(f"Manifest: {stats['skipped']} rows already done, {stats['duplicates']} repeated payloads "
+              f"-> {args.manifest}")
+    if opts.verify_sample:
+        print(f"Verified: {stats['verified']} decoded, {stats['mismatches']} mismatches")
+    return 1 if stats["failed"] or stats["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# EPC (SEPA) QR render cache – content-addressed by payload + render options
+# Recurring invoices produce the same payload every month; with the cache a
+# repeat code is a hardlink (or copy) of an earlier render instead of a new
+# QR encode + PNG compression.
+#
+# Layout on disk:  <cache dir>/<key[:2]>/<key>.png
+# key = sha256(payload from build_epc_payload + render options)
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import os
+
+from epc_core import render_png_bytes, replace_bytes
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MEMORY_ITEMS = 256
+
+
+def cache_key(payload: str, options: Optional[dict] = None) -> str:
+    h = hashlib.sha256(payload.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(options or {}, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES,
+                 memory_items: int = DEFAULT_MEMORY_ITEMS):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.disk_bytes = sum(size for _, size, _ in self._entries())
+        if self.disk_bytes > self.max_bytes:
+            self.evict()
+
+    # ---------- lookup ----------
+    def path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.png"
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+            self._touch(self.path_for(key))  # eviction goes by file mtime
+            self.hits += 1
+            self.memory_hits += 1
+            return data
+        path = self.path_for(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        self._touch(path)
+        self._remember(key, data)
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> Path:
+        path = self.path_for(key)
+        path.parent.mkdir(exist_ok=True)
+        try:
+            replaced = path.stat().st_size  # same key again (e.g. another worker)
+        except OSError:
+            replaced = 0
+        # write-then-rename so concurrent workers never see a half-written file
+        replace_bytes(data, path)
+        self.disk_bytes += len(data) - replaced
+        self._remember(key, data)
+        if self.disk_bytes > self.max_bytes:
+            self.evict()
+        return path
+
+    # ---------- rendering ----------
+    def render_png(self, payload: str, out_path: Path, optimize: bool = False) -> tuple[Path, bool]:
+        # Writes the PNG for payload to out_path. Returns (out_path, cache hit).
+        key = cache_key(payload, {"format": "png", "optimize": optimize})
+        out_path = Path(out_path)
+        data = self.get(key)
+        hit = data is not None
+        if not hit:
+            data = render_png_bytes(payload, optimize)
+            self.put(key, data)
+        self._materialize(key, out_path, data)
+        return out_path, hit
+
+    def _materialize(self, key: str, out_path: Path, data: bytes) -> None:
+        # The output shares the cache entry's inode. Everything that writes
+        # output files (save_bytes, replace_bytes) renames a new file into
+        # place, so a later write to out_path can never reach the cache entry.
+        try:
+            if out_path.exists():
+                out_path.unlink()
+            os.link(self.path_for(key), out_path)
+        except OSError:
+            # other filesystem / no hardlink support / evicted meanwhile
+            replace_bytes(data, out_path)
+
+    # ---------- eviction ----------
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        # Removes least recently used entries (by mtime) until the cache is
+        # at or below target_bytes (default: 90 % of max_bytes).
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self.memory.pop(path.stem, None)
+            total -= size
+            removed += 1
+        self.disk_bytes = total
+        self.evictions += removed
+        return removed
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "disk_bytes": self.disk_bytes,
+            "memory_items": len(self.memory),
+        }
+
+    # ---------- helpers ----------
+    def _remember(self, key: str, data: bytes) -> None:
+        if self.memory_items <= 0:
+            return
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def _touch(self, path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        # (path, size, mtime) for every cached PNG
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(".png"):
+                    st = entry.stat()
+                    yield Path(entry.path), st.st_size, st.st_mtime
@@ -0,0 +1,581 @@
+# EPC (SEPA) QR core – payload building, validation and QR rendering without any GUI dependency
+# Requirements:
+#   pip install qrcode[pil]
+# Used by SepaQRCode.py (GUI) and epc_batch.py (headless batch runs).
+#
+# Importing this module must stay cheap: no Qt, and qrcode/PIL are only
+# imported on the first render. Check with: python benchmarks/bench_import.py
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+import io
+import os
+import re
+
+from epc_amount import Amount, amount_error, format_cents, normalize_amount, optional_cents
+from epc_iban import iban_error
+from epc_trace import traced
+
+if TYPE_CHECKING:
+    import qrcode
+
+BASE_OUT = Path.home() / "Documents" / "EPC_QR"  # default output folder for PNGs
+
+# ------------------ Payment fields ------------------
+@dataclass
+class EpcFields:
+    # Field names match the build_epc_payload arguments. amount_eur takes
+    # anything epc_amount.parse_cents does (euros; an int is whole euros),
+    # amount_cents an exact amount in cents instead (epc_amount.check_cents,
+    # so "1234" from a CSV/JSON row works too). Set at most one of them.
+    name: str = ""
+    iban: str = ""
+    amount_eur: Optional[Amount] = None
+    bic: Optional[str] = None
+    purpose_code: Optional[str] = None
+    remittance_ref: Optional[str] = None
+    remittance_text: Optional[str] = None
+    info: Optional[str] = None
+    version: str = "002"
+    charset: str = "1"  # "1"-"8" (see EPC_CHARSETS) or "auto": most compact set for the data
+    amount_cents: Optional[int] = None
+
+    def payload(self) -> str:
+        return build_epc_payload(**vars(self))  # vars(): asdict() deep-copies every field
+
+# ------------------ EPC payload builder ------------------
+EPC_VERSIONS = ("001", "002")
+# EPC069-12 character set field -> Python codec
+EPC_CHARSETS = {
+    "1": "utf-8",
+    "2": "iso-8859-1",
+    "3": "iso-8859-2",
+    "4": "iso-8859-4",
+    "5": "iso-8859-5",
+    "6": "iso-8859-7",
+    "7": "iso-8859-10",
+    "8": "iso-8859-15",
+}
+EPC_MAX_LINES = 12
+EPC_MAX_BYTES = 331  # encoded in the payload's character set
+AUTO_CHARSET = "auto"
+# pick_charset() order: the ISO 8859 sets need one byte per character, so any
+# of them beats UTF-8 for non-ASCII text; Latin-1 and Latin-9 come first.
+SINGLE_BYTE_CHARSETS = ("2", "8", "3", "4", "7", "5", "6")
+
+
+def _v(x) -> str:
+    return "" if x is None else str(x)
+
+
+def epc_header_lines(
+    name: str,
+    iban: str,
+    bic: Optional[str],
+    version: str = "002",
+    charset: str = "1",
+) -> list:
+    # Lines 1-7: everything that identifies the payee.
+    return [
+        "BCD",
+        version,
+        charset,
+        "SCT",
+        _v((bic or "").upper()),
+        _v(name).strip(),
+        _v(iban).replace(" ", "").upper(),
+    ]
+
+
+def epc_transfer_lines(
+    amount_eur: Optional[Amount],
+    purpose_code: Optional[str],
+    remittance_ref: Optional[str],
+    remittance_text: Optional[str],
+    info: Optional[str],
+    amount_cents: Optional[int] = None,
+) -> list:
+    # Lines 8-12: what changes from transfer to transfer.
+    # Raises epc_amount.AmountError (a ValueError) for a bad amount.
+    if amount_cents is not None:
+        amt = "EUR" + format_cents(optional_cents(amount_eur, amount_cents))
+    elif amount_eur is None or (isinstance(amount_eur, str) and not amount_eur.strip()):
+        amt = ""
+    else:
+        amt = "EUR" + normalize_amount(amount_eur)
+
+    ref = (remittance_ref or "").strip()
+    txt = (remittance_text or "").strip()
+    if ref and txt:
+        txt = ""
+
+    return [
+        amt,
+        _v((purpose_code or "").upper()),
+        ref,
+        txt,
+        _v(info),
+    ]
+
+
+def pick_charset(lines: list) -> str:
+    # Most compact character set that can represent every line; ASCII-only
+    # data stays on UTF-8 ("1"), which every banking app reads.
+    text = "\n".join(lines)
+    if text.isascii():
+        return "1"
+    for charset in SINGLE_BYTE_CHARSETS:
+        try:
+            text.encode(EPC_CHARSETS[charset])
+            return charset
+        except UnicodeEncodeError:
+            pass
+    return "1"
+
+
+def payload_codec(payload: str) -> str:
+    # Python codec for the character set named in line 3 (UTF-8 if unknown)
+    parts = payload.split("\n", 3)
+    return EPC_CHARSETS.get(parts[2] if len(parts) > 2 else "", "utf-8")
+
+
+def encode_payload(payload: str, errors: str = "strict") -> bytes:
+    # The bytes that go into the QR code. Raises UnicodeEncodeError (a
+    # ValueError) for characters the payload's character set lacks.
+    return payload.encode(payload_codec(payload), errors)
+
+
+def decode_payload(data: bytes) -> str:
+    # Inverse of encode_payload, for decoded QR bytes.
+    parts = data.split(b"\n", 3)
+    charset = parts[2].decode("ascii", "replace") if len(parts) > 2 else ""
+    return data.decode(EPC_CHARSETS.get(charset, "utf-8"))
+
+
+def payload_digest(payload: str) -> bytes:
+    # 16-byte content hash of a payload, e.g. for duplicate detection (epc_parse)
+    # and the record hashes of code packs (epc_pack)
+    from hashlib import blake2b  # deferred: keeps `import epc_core` cheap
+
+    return blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+
+def payload_byte_length(lines: list, codec: str = "utf-8") -> int:
+    # Exact encoded size of "\n".join(lines); ASCII lines are counted
+    # without encoding them.
+    n = len(lines) - 1
+    for line in lines:
+        n += len(line) if line.isascii() else len(line.encode(codec))
+    return n
+
+
+@traced("payload", lambda result, *args, **kwargs: {"bytes": len(encode_payload(result, "replace"))})
+def build_epc_payload(
+    name: str,
+    iban: str,
+    amount_eur: Optional[Amount],
+    bic: Optional[str],
+    purpose_code: Optional[str],
+    remittance_ref: Optional[str],
+    remittance_text: Optional[str],
+    info: Optional[str],
+    version: str = "002",
+    charset: str = "1",
+    amount_cents: Optional[int] = None,
+) -> str:
+    lines = epc_header_lines(name, iban, bic, version, charset)
+    lines += epc_transfer_lines(amount_eur, purpose_code, remittance_ref, remittance_text, info, amount_cents)
+    if charset == AUTO_CHARSET:
+        lines[2] = pick_charset(lines)
+    return "\n".join(lines)
+
+
+# ------------------ Validation ------------------
+PURPOSE_RE = re.compile(r"[A-Za-z]{4}")
+BIC_RE = re.compile(r"[A-Za-z0-9]{8}([A-Za-z0-9]{3})?")
+
+
+def _as_fields(fields: Union[EpcFields, dict, None], values: dict) -> EpcFields:
+    if fields is None:
+        return EpcFields(**values)
+    if isinstance(fields, dict):
+        return EpcFields(**fields)
+    return fields
+
+
+def iter_epc_errors(fields: Union[EpcFields, dict, None] = None, **values) -> Iterator[tuple[str, str]]:
+    # Yields every problem of one record as (field name, i18n error key),
+    # in the order the GUI reports them. Patterns are compiled at import, so
+    # this is cheap to run over large files.
+    fields = _as_fields(fields, values)
+    name = (fields.name or "").strip()
+    iban = (fields.iban or "").replace(" ", "").upper().strip()
+    bic = (fields.bic or "").strip()
+    if not name:
+        yield "name", "err_name_req"
+    if not iban:
+        yield "iban", "err_iban_req"
+    else:
+        iban_err = iban_error(iban)
+        if iban_err:
+            yield "iban", iban_err
+    if fields.version == "001" and not bic:
+        yield "bic", "err_bic_req"
+    amt = fields.amount_eur
+    if fields.amount_cents is not None:
+        amt_err = amount_error(amt, fields.amount_cents)
+        if amt_err:
+            yield ("amount_eur" if amt_err == "err_amount_both" else "amount_cents"), amt_err
+    elif amt is None or (isinstance(amt, str) and not amt.strip()):
+        yield "amount_eur", "err_amount_req"
+    else:
+        amt_err = amount_error(amt)
+        if amt_err:
+            yield "amount_eur", amt_err
+    purp = (fields.purpose_code or "").strip()
+    if purp and not PURPOSE_RE.fullmatch(purp):
+        yield "purpose_code", "err_purpose_fmt"
+    if len(name) > 70:
+        yield "name", "err_name_len"
+    # optional BIC format check
+    if bic and not BIC_RE.fullmatch(bic):
+        yield "bic", "err_bic_fmt"
+    if len(fields.remittance_text or "") > 140:
+        yield "remittance_text", "err_text_len"
+    if len(fields.info or "") > 70:
+        yield "info", "err_info_len"
+    yield from _charset_errors(fields)
+
+
+# free-text fields that may need more than ASCII, in the order they are reported
+TEXT_FIELDS = ("name", "bic", "remittance_ref", "remittance_text", "info")
+
+
+def _charset_errors(fields: EpcFields) -> Iterator[tuple[str, str]]:
+    # Characters the character set cannot encode, then the 331-byte budget.
+    charset = fields.charset or "1"
+    if charset != AUTO_CHARSET and charset not in EPC_CHARSETS:
+        yield "charset", "err_charset"
+        return
+    codec = EPC_CHARSETS.get(charset, "utf-8")
+    texts = [fields.name or "", fields.bic or "", fields.remittance_ref or "",
+             fields.remittance_text or "", fields.info or ""]  # TEXT_FIELDS order
+    joined = "".join(texts) + (fields.iban or "") + (fields.purpose_code or "") + (fields.version or "") + charset
+    ascii_only = joined.isascii()
+    if not ascii_only and charset not in ("1", AUTO_CHARSET):
+        for field, value in zip(TEXT_FIELDS, texts):
+            try:
+                value.encode(codec)
+            except UnicodeEncodeError:
+                yield field, "err_charset_chars"
+                return
+    # Upper bound first (raw fields, UTF-8 for auto, "BCD" + "SCT", longest
+    # amount line "EUR99999999999.99", 11 newlines); only payloads near the
+    # limit are built and measured exactly.
+    bound = 34 + (len(joined) if ascii_only else len(joined.encode(codec, "replace")))
+    if bound <= EPC_MAX_BYTES:
+        return
+    try:
+        lines = epc_header_lines(fields.name, fields.iban, fields.bic, fields.version, charset)
+        lines += epc_transfer_lines(fields.amount_eur, fields.purpose_code, fields.remittance_ref,
+                                    fields.remittance_text, fields.info, fields.amount_cents)
+    except ValueError:
+        return  # bad amount, reported above
+    if charset == AUTO_CHARSET:
+        lines[2] = pick_charset(lines)
+        codec = EPC_CHARSETS[lines[2]]
+    try:
+        size = payload_byte_length(lines, codec)
+    except UnicodeEncodeError:
+        return  # e.g. an IBAN with odd characters, reported above
+    if size > EPC_MAX_BYTES:
+        yield "payload", "err_payload_bytes"
+
+
+@traced("validate", lambda result, *args, **kwargs: {"ok": result[0], "error": result[1] or None})
+def validate_epc(fields: Union[EpcFields, dict, None] = None, **values) -> tuple[bool, str]:
+    # Same rules as the GUI form. Accepts an EpcFields, a dict or keyword
+    # arguments and returns (ok, first i18n error key) – see epc_i18n.I18N.
+    for _, key in iter_epc_errors(_as_fields(fields, values)):
+        return False, key
+    return True, ""
+
+
+# ------------------ QR rendering ------------------
+@traced("matrix", lambda result, *args, **kwargs: {"version": result.version})
+def make_qr(payload: str, optimize: bool = False) -> "qrcode.QRCode":
+    # optimize=True picks the smallest symbol over all ECC levels and segment
+    # encodings (see epc_optimize); otherwise ECC M with qrcode's defaults.
+    # The chosen size/level is on the result as qr.version / qr.error_correction.
+    if optimize:
+        from epc_optimize import make_optimized_qr
+
+        return make_optimized_qr(payload)
+    import qrcode  # deferred: keeps `import epc_core` fast for short-lived workers
+
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(encode_payload(payload))
+    qr.make(fit=True)
+    return qr
+
+
+def matrix_of(qr: "qrcode.QRCode", border: int = 0) -> list:
+    # Module matrix as rows of bools (True = dark), optionally with quiet zone.
+    if border == 0:
+        return qr.modules
+    qr.border = border
+    return qr.get_matrix()
+
+
+def qr_matrix(payload: str, border: int = 0, optimize: bool = False) -> list:
+    return matrix_of(make_qr(payload, optimize), border)
+
+
+def pack_matrix(matrix: list) -> bytes:
+    # 1 bit per module, row-major, MSB first, each row padded to whole bytes.
+    n = len(matrix)
+    row_bytes = (n + 7) // 8
+    pad = row_bytes * 8 - n
+    out = bytearray()
+    for row in matrix:
+        bits = 0
+        for module in row:
+            bits = (bits << 1) | (1 if module else 0)
+        out += (bits << pad).to_bytes(row_bytes, "big")
+    return bytes(out)
+
+
+def unpack_matrix(data: bytes, size: Optional[int] = None) -> list:
+    if size is None:
+        # square matrix: len(data) == size * ceil(size / 8)
+        size = next((n for n in range(1, 256) if n * ((n + 7) // 8) == len(data)), 0)
+        if not size:
+            raise ValueError(f"{len(data)} bytes is not a packed square matrix")
+    row_bytes = (size + 7) // 8
+    rows = []
+    for r in range(size):
+        bits = int.from_bytes(data[r * row_bytes:(r + 1) * row_bytes], "big")
+        shift = row_bytes * 8 - 1
+        rows.append([bool(bits >> (shift - c) & 1) for c in range(size)])
+    return rows
+
+
+def png_from_qr(qr: "qrcode.QRCode") -> bytes:
+    buf = io.BytesIO()
+    qr.make_image().save(buf)
+    return buf.getvalue()
+
+
+# ------------------ Vector output ------------------
+# SVG and PDF are drawn straight from the module matrix: no PIL image, no
+# rasterization. Dark modules are merged into horizontal runs per row.
+QUIET_ZONE = 4  # modules of white border required around a QR symbol
+
+
+def matrix_runs(matrix: list):
+    # (row, first column, length) for every horizontal run of dark modules
+    for y, row in enumerate(matrix):
+        x, n = 0, len(row)
+        while x < n:
+            if row[x]:
+                start = x
+                while x < n and row[x]:
+                    x += 1
+                yield y, start, x - start
+            else:
+                x += 1
+
+
+def svg_from_matrix(matrix: list, border: int = QUIET_ZONE, module_mm: float = 1.0) -> bytes:
+    size = len(matrix) + 2 * border
+    d = "".join(f"M{x + border},{y + border}h{w}v1h-{w}z" for y, x, w in matrix_runs(matrix))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+        f'width="{size * module_mm:g}mm" height="{size * module_mm:g}mm" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{d}" fill="#000"/></svg>\n'
+    ).encode("ascii")
+
+
+def pdf_fragment(matrix: list, x: float = 0.0, y: float = 0.0, module: float = 1.0) -> bytes:
+    # PDF content-stream operators that paint the symbol (without quiet zone)
+    # with its lower-left corner at (x, y), in PDF units (1/72 inch) per module.
+    # Wrapped in q/Q, so it can be appended to any page content stream.
+    n = len(matrix)
+    top = y + n * module
+    parts = [f"q 0 g 1 0 0 1 {x:g} {top:g} cm {module:g} 0 0 {-module:g} 0 0 cm"]
+    parts.extend(f"{cx} {cy} {w} 1 re" for cy, cx, w in matrix_runs(matrix))
+    parts.append("f Q")
+    return "\n".join(parts).encode("ascii") + b"\n"
+
+
+def pdf_document(pages: list, width: float, height: float) -> bytes:
+    # Minimal PDF: one page per content stream, no fonts or resources.
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None]
+    kids = []
+    for content in pages:
+        page_no = len(objects) + 1
+        kids.append(f"{page_no} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:g} {height:g}] "
+            f"/Contents {page_no + 1} 0 R >>".encode("ascii"))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode("ascii")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def pdf_from_qr(qr: "qrcode.QRCode", module: float = 2.835) -> bytes:
+    # Single-page PDF sized to the symbol; default module = 1 mm.
+    matrix = matrix_of(qr)
+    side = (len(matrix) + 2 * QUIET_ZONE) * module
+    content = pdf_fragment(matrix, QUIET_ZONE * module, QUIET_ZONE * module, module)
+    return pdf_document([content], side, side)
+
+
+# output format -> function(QRCode) -> bytes
+RENDERERS = {
+    "png": png_from_qr,
+    "svg": lambda qr: svg_from_matrix(matrix_of(qr)),
+    "pdf": pdf_from_qr,
+    "pdf-fragment": lambda qr: pdf_fragment(matrix_of(qr)),
+    "raw": lambda qr: pack_matrix(matrix_of(qr)),
+}
+MIME_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+    "pdf-fragment": "text/plain",
+    "raw": "application/octet-stream",
+}
+
+
+@traced("encode", lambda result, *args, **kwargs: {"format": kwargs["fmt"], "bytes": len(result)})
+def render_qr(qr: "qrcode.QRCode", fmt: str = "png") -> bytes:
+    try:
+        renderer = RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unsupported output format: {fmt}") from None
+    return renderer(qr)
+
+
+def render_bytes(payload: str, fmt: str = "png", optimize: bool = False) -> bytes:
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    return render_qr(make_qr(payload, optimize), fmt)
+
+
+def render_png_bytes(payload: str, optimize: bool = False) -> bytes:
+    return render_bytes(payload, "png", optimize)
+
+
+def render_svg_bytes(payload: str, optimize: bool = False) -> bytes:
+    return render_bytes(payload, "svg", optimize)
+
+
+def render_pdf_bytes(payload: str, optimize: bool = False) -> bytes:
+    return render_bytes(payload, "pdf", optimize)
+
+
+def render_to(payload: str, out, fmt: str = "png", optimize: bool = False) -> int:
+    # Renders into a caller-supplied target and returns the number of bytes:
+    #   - any object with .write() (BytesIO, open file, socket file, ...)
+    #   - a writable buffer (bytearray, memoryview, mmap), filled from offset 0
+    data = render_bytes(payload, fmt, optimize)
+    if hasattr(out, "write"):
+        out.write(data)
+        return len(data)
+    view = memoryview(out).cast("B")
+    if len(view) < len(data):
+        raise ValueError(f"Buffer too small: need {len(data)} bytes, got {len(view)}")
+    view[:len(data)] = data
+    return len(data)
+
+
+# ------------------ File sink ------------------
+def replace_bytes(data: bytes, path: Path) -> Path:
+    # Write-then-rename: readers never see a half-written file, and a path that
+    # is a hardlink (e.g. to a render cache entry) gets a new inode instead of
+    # being overwritten through the link.
+    import tempfile  # deferred: keeps `import epc_core` cheap
+
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+@traced("write", lambda result, *args, **kwargs: {"bytes": len(kwargs["data"]), "path": str(result)})
+def save_bytes(data: bytes, path: Path, overwrite: bool = False) -> Path:
+    # Unless overwrite is set, an existing file is never replaced:
+    # "<name>.png" becomes "<name>_2.png", "<name>_3.png", ...
+    path = Path(path)
+    if overwrite:
+        return replace_bytes(data, path)
+    n = 1
+    while True:
+        candidate = path if n == 1 else path.with_name(f"{path.stem}_{n}{path.suffix}")
+        try:
+            with open(candidate, "xb") as fh:
+                fh.write(data)
+            return candidate
+        except FileExistsError:
+            n += 1
+
+
+def write_code(payload: str, path: Path, fmt: Optional[str] = None,
+               overwrite: bool = False, optimize: bool = False) -> Path:
+    # Format defaults to the file extension. Returns the path actually written.
+    path = Path(path)
+    fmt = fmt or path.suffix.lstrip(".").lower() or "png"
+    return save_bytes(render_bytes(payload, fmt, optimize), path, overwrite)
+
+
+def render_png(payload: str, out_path: Path, optimize: bool = False) -> Path:
+    return write_code(payload, out_path, "png", overwrite=True, optimize=optimize)
+
+
+# ------------------ Output filenames ------------------
+def png_filename(amount_eur: Optional[Amount], iban: str, prefix: str = "", stamp: Optional[str] = None,
+                 amount_cents: Optional[int] = None) -> str:
+    # <prefix><amount>_<last10digitsIBAN>_<YYYY-MM-DD>.png, or <stamp> instead
+    # of the date for names that must not change between runs
+    try:
+        cents = optional_cents(amount_eur, amount_cents)
+    except ValueError:
+        cents = None
+    amt_part = "NA" if cents is None else format_cents(cents)
+
+    iban_raw = iban or ""
+    digits = ''.join(ch for ch in iban_raw if ch.isdigit())
+    last10 = digits[-10:] if digits else iban_raw.replace(' ', '')[-10:]
+
+    date_part = stamp or datetime.now().strftime("%Y-%m-%d")
+    return clean_filename(f"{prefix}{amt_part}_{last10}_{date_part}.png")
+
+
+def clean_filename(name: str) -> str:
+    # drops path separators and characters Windows does not allow in names
+    return ''.join(c for c in name if c not in '\\/:*?"<>|')
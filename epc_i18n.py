@@ -0,0 +1,46 @@
+# EPC (SEPA) QR – UI and validation texts (DE default, EN)
+# Kept free of Qt so batch tools can report validation errors in the same words as the GUI.
+#
+# The texts live in i18n/<lang>.json next to this file (UTF-8, one flat
+# key -> text object per language). I18N reads a language file the first time
+# it is used, so a batch run that only reports English errors never parses the
+# German texts. Adding a language = adding a file with the same keys.
+
+from collections.abc import Mapping
+import os
+
+I18N_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "i18n")
+
+
+class LazyTranslations(Mapping):
+    # Read-only {lang: {key: text}} mapping; languages are the file names.
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._langs = None
+        self._texts: dict = {}
+
+    def languages(self) -> list:
+        if self._langs is None:
+            self._langs = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+        return self._langs
+
+    def __getitem__(self, lang: str) -> dict:
+        texts = self._texts.get(lang)
+        if texts is None:
+            if lang not in self.languages():
+                raise KeyError(lang)
+            import json  # deferred with the first lookup, like the texts
+
+            with open(os.path.join(self.directory, f"{lang}.json"), encoding="utf-8") as fh:
+                texts = self._texts[lang] = json.load(fh)
+        return texts
+
+    def __iter__(self):
+        return iter(self.languages())
+
+    def __len__(self) -> int:
+        return len(self.languages())
+
+
+# ------------------ i18n dictionaries ------------------
+I18N = LazyTranslations(I18N_DIR)
@@ -0,0 +1,80 @@
+# Append-only checkpoint manifest for resumable batch runs
+# One JSON line per event, flushed as it is written:
+#   {"type": "run", "started", "input", "out_dir"}                 once per (re)start
+#   {"type": "done", "id", "row", "hash", "path"[, "dup_of"]}       a row's code is on disk
+#   {"type": "failed", "id", "row", "error"}                       retried on resume
+# "id" is the row's id column or zero-padded row number (the filename prefix),
+# "hash" the render-cache key of payload + render options. A resumed run skips
+# every id whose last "done" entry has the same hash and whose file exists.
+# A torn last line (killed mid-write) is ignored.
+
+from pathlib import Path
+from typing import Optional
+import json
+import time
+
+
+class Manifest:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: dict = {}  # id -> (hash, path)
+        self.by_hash: dict = {}  # hash -> (id, path) of a finished render
+        self.torn = 0  # unreadable lines skipped on load
+        self.torn_tail = False
+        if self.path.exists():
+            self._load()
+        self.fh = open(self.path, "a", encoding="utf-8", buffering=1)
+        if self.torn_tail:
+            self.fh.write("\n")  # keep the next entry off the torn line
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                self.torn_tail = not line.endswith("\n")
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    self.torn += bool(line.strip())
+                    continue
+                kind = rec.get("type")
+                if kind == "done":
+                    self.done[rec["id"]] = (rec["hash"], rec["path"])
+                    if "dup_of" not in rec:
+                        self.by_hash[rec["hash"]] = (rec["id"], rec["path"])
+                elif kind == "failed":
+                    self.done.pop(rec["id"], None)
+
+    def finished(self, row_id: str, digest: str) -> Optional[str]:
+        # output path if row_id was completed with this payload and is still there
+        entry = self.done.get(row_id)
+        if entry is not None and entry[0] == digest and Path(entry[1]).exists():
+            return entry[1]
+        return None
+
+    def rendered(self, digest: str) -> Optional[tuple[str, str]]:
+        # (id, output path) of an earlier render of the same payload, if still there
+        entry = self.by_hash.get(digest)
+        return entry if entry is not None and Path(entry[1]).exists() else None
+
+    # ---------- writing ----------
+    def _write(self, rec: dict) -> None:
+        self.fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def start_run(self, **info) -> None:
+        self._write({"type": "run", "started": time.strftime("%Y-%m-%dT%H:%M:%S"), **info})
+
+    def record_done(self, row_id: str, row: int, digest: str, path: str, dup_of: Optional[str] = None) -> None:
+        rec = {"type": "done", "id": row_id, "row": row, "hash": digest, "path": path}
+        if dup_of is not None:
+            rec["dup_of"] = dup_of
+        else:
+            self.by_hash[digest] = (row_id, path)
+        self.done[row_id] = (digest, path)
+        self._write(rec)
+
+    def record_failed(self, row_id: str, row: int, error: str) -> None:
+        self.done.pop(row_id, None)
+        self._write({"type": "failed", "id": row_id, "row": row, "error": error})
+
+    def close(self) -> None:
+        self.fh.close()
@@ -0,0 +1,123 @@
+# Smallest-symbol optimizer for EPC QR codes
+# Tries every allowed error-correction level and several segmentations of the
+# payload (one byte-mode segment vs. numeric/alphanumeric runs for IBAN, BIC,
+# amount lines ...) and picks the smallest QR version, within the EPC069-12
+# limits (version <= 13, payload <= 331 bytes). For equal versions the higher
+# ECC level wins, since it costs nothing extra.
+#
+# Planning only measures bit lengths against qrcode's capacity table; the
+# expensive matrix/mask work happens once, for the chosen plan.
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from epc_core import EPC_MAX_BYTES, encode_payload
+
+if TYPE_CHECKING:
+    import qrcode
+
+EPC_MAX_VERSION = 13
+
+ECC_LEVELS = ("L", "M", "Q", "H")
+# qrcode optimize= values to try: 0 = single byte segment, n = split out
+# numeric/alphanumeric runs of at least n characters (qrcode's default is 20)
+SEGMENT_MINIMUMS = (0, 3, 6, 10, 20)
+
+
+@dataclass(frozen=True)
+class QrPlan:
+    version: int
+    ecc: str
+    optimize: int
+    segments: int
+    data_bits: int
+
+
+def ecc_constants() -> dict:
+    # ECC level letter -> qrcode constant; also used by epc_template
+    from qrcode import constants
+
+    return {
+        "L": constants.ERROR_CORRECT_L,
+        "M": constants.ERROR_CORRECT_M,
+        "Q": constants.ERROR_CORRECT_Q,
+        "H": constants.ERROR_CORRECT_H,
+    }
+
+
+def _segments(data: bytes, minimum: int) -> list:
+    from qrcode import util
+
+    if minimum:
+        return list(util.optimal_data_chunks(data, minimum=minimum))
+    return [util.QRData(data)]
+
+
+def _data_bits(segments: list, version: int) -> int:
+    from qrcode import util
+
+    sizes = util.mode_sizes_for_version(version)
+    buffer = util.BitBuffer()
+    for seg in segments:
+        buffer.put(seg.mode, 4)
+        buffer.put(len(seg), sizes[seg.mode])
+        seg.write(buffer)
+    return len(buffer)
+
+
+def _rank(plan: QrPlan) -> tuple:
+    # smaller version first, then stronger ECC, then fewer data bits
+    return plan.version, -ECC_LEVELS.index(plan.ecc), plan.data_bits
+
+
+def plan_qr(payload: str, ecc_levels: Iterable[str] = ECC_LEVELS,
+            max_version: int = EPC_MAX_VERSION, max_bytes: int = EPC_MAX_BYTES,
+            encoding: Optional[str] = None) -> QrPlan:
+    # encoding: None = the character set named in the payload
+    from qrcode import util
+
+    data = payload.encode(encoding) if encoding else encode_payload(payload)
+    if len(data) > max_bytes:
+        raise ValueError(f"EPC payload is {len(data)} bytes, the limit is {max_bytes}")
+    ecc_consts = ecc_constants()
+    levels = sorted(set(ecc_levels), key=ECC_LEVELS.index)
+
+    best: Optional[QrPlan] = None
+    for minimum in SEGMENT_MINIMUMS:
+        segments = _segments(data, minimum)
+        # length fields only change size at version 10 (and 27, beyond EPC)
+        bits_by_class = {}
+        for ecc in levels:
+            limits = util.BIT_LIMIT_TABLE[ecc_consts[ecc]]
+            for version in range(1, max_version + 1):
+                size_class = version >= 10
+                if size_class not in bits_by_class:
+                    bits_by_class[size_class] = _data_bits(segments, version)
+                bits = bits_by_class[size_class]
+                if bits <= limits[version]:
+                    plan = QrPlan(version, ecc, minimum, len(segments), bits)
+                    if best is None or _rank(plan) < _rank(best):
+                        best = plan
+                    break
+    if best is None:
+        raise ValueError(f"EPC payload does not fit into QR version {max_version}")
+    return best
+
+
+def make_planned_qr(payload: str, plan: QrPlan, encoding: Optional[str] = None) -> "qrcode.QRCode":
+    import qrcode
+
+    qr = qrcode.QRCode(version=plan.version, error_correction=ecc_constants()[plan.ecc])
+    data = payload.encode(encoding) if encoding else encode_payload(payload)
+    for seg in _segments(data, plan.optimize):
+        qr.add_data(seg)
+    qr.make(fit=False)
+    return qr
+
+
+def make_optimized_qr(payload: str, ecc_levels: Iterable[str] = ECC_LEVELS) -> "qrcode.QRCode":
+    return make_planned_qr(payload, plan_qr(payload, ecc_levels))
+
+
+def ecc_name(qr: "qrcode.QRCode") -> str:
+    return {v: k for k, v in ecc_constants().items()}[qr.error_correction]
@@ -0,0 +1,314 @@
+# EPC QR code packs – many codes in one file instead of one PNG each
+# A pack stores the module matrix of every code as packed bits (1 bit per
+# module, see epc_core.pack_matrix) with a payload hash and a little JSON
+# metadata. Writes are sequential appends; readers mmap the file and use the
+# index at its end. PNG/SVG files are made on demand from a pack.
+# Requirements: none (PNG extraction needs Pillow, --verify needs qrcode)
+# Run: python epc_batch.py payments.csv --pack codes.epcpack   (write)
+#      python epc_pack.py codes.epcpack [--list] [--extract ./qr_out [--id 4711 ...] [--format svg]] [--verify]
+# Benchmark: python benchmarks/bench_pack.py
+#
+# File layout (little-endian):
+#   "EPCPACK\x01"
+#   records  "QR", version u8, ECC level char, meta length u16, payload hash 16 bytes,
+#            meta (UTF-8 JSON: id, row, name), matrix ((17 + 4 * version) rows of whole bytes)
+#   index    per record: offset u64, payload hash 16 bytes
+#   trailer  "EPCINDEX", index offset u64, record count u64
+# Records are never rewritten. The index and trailer are written on close;
+# reopening for append drops them and writes a new one after the new records.
+# A pack whose writer was killed has no trailer: readers then rebuild the
+# index by walking the records (a torn last record is left out).
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, NamedTuple, Optional
+import argparse
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+from epc_core import (
+    QUIET_ZONE, clean_filename, decode_payload, matrix_of, pack_matrix, payload_digest, replace_bytes,
+    svg_from_matrix, unpack_matrix,
+)
+
+if TYPE_CHECKING:
+    import qrcode
+
+MAGIC = b"EPCPACK\x01"
+RECORD = struct.Struct("<2sBcH16s")
+INDEX = struct.Struct("<Q16s")
+TRAILER = struct.Struct("<8sQQ")
+RECORD_TAG = b"QR"
+INDEX_TAG = b"EPCINDEX"
+ECC_LEVELS = ("L", "M", "Q", "H")
+
+
+class PackError(ValueError):
+    pass
+
+
+def symbol_size(version: int) -> int:
+    return 17 + 4 * version
+
+
+def matrix_bytes(version: int) -> int:
+    n = symbol_size(version)
+    return n * ((n + 7) // 8)
+
+
+# ------------------ Writing ------------------
+class PackWriter:
+    # Appends records with buffered sequential writes; call close() (or use
+    # `with`) to write the index, otherwise readers have to rebuild it.
+    def __init__(self, path: Path, buffer_size: int = 1 << 20):
+        self.path = Path(path)
+        self.index = bytearray()
+        if self.path.exists() and self.path.stat().st_size:
+            with PackReader(self.path) as old:
+                self.index += old.index
+                end = old.data_end
+            self.fh = open(self.path, "r+b", buffering=buffer_size)
+            self.fh.truncate(end)  # old index and trailer, or a torn record
+            self.fh.seek(end)
+        else:
+            self.fh = open(self.path, "wb", buffering=buffer_size)
+            self.fh.write(MAGIC)
+        self.offset = self.fh.tell()
+
+    def __len__(self) -> int:
+        return len(self.index) // INDEX.size
+
+    def add(self, data: bytes, version: int, ecc: str, digest: bytes, meta: Optional[dict] = None) -> int:
+        # data: pack_matrix() of the symbol without quiet zone. Returns the record number.
+        if len(data) != matrix_bytes(version) or ecc not in ECC_LEVELS or len(digest) != 16:
+            raise PackError(f"not a packed version {version}-{ecc} matrix ({len(data)} bytes)")
+        raw_meta = json.dumps(meta or {}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.fh.write(RECORD.pack(RECORD_TAG, version, ecc.encode("ascii"), len(raw_meta), digest))
+        self.fh.write(raw_meta)
+        self.fh.write(data)
+        self.index += INDEX.pack(self.offset, digest)
+        self.offset += RECORD.size + len(raw_meta) + len(data)
+        return len(self) - 1
+
+    def add_qr(self, qr: "qrcode.QRCode", payload: str, meta: Optional[dict] = None) -> int:
+        from epc_optimize import ecc_name
+
+        return self.add(pack_matrix(matrix_of(qr)), qr.version, ecc_name(qr), payload_digest(payload), meta)
+
+    def close(self) -> None:
+        if self.fh.closed:
+            return
+        self.fh.write(self.index)
+        self.fh.write(TRAILER.pack(INDEX_TAG, self.offset, len(self)))
+        self.fh.close()
+
+    def __enter__(self) -> "PackWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ------------------ Reading ------------------
+class PackedCode(NamedTuple):
+    number: int  # position in the pack, from 0
+    version: int
+    ecc: str
+    digest: str  # payload hash, hex
+    meta: dict
+    data: bytes  # packed matrix
+
+    @property
+    def size(self) -> int:
+        return symbol_size(self.version)
+
+    def matrix(self) -> list:
+        return unpack_matrix(self.data, self.size)
+
+
+class PackReader:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.fh = open(self.path, "rb")
+        try:
+            size = os.fstat(self.fh.fileno()).st_size
+            if size < len(MAGIC) or self.fh.read(len(MAGIC)) != MAGIC:
+                raise PackError(f"{self.path} is not an EPC QR pack")
+            self.mm = mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.fh.close()
+            raise
+        self.indexed = False  # False: index rebuilt from the records (no trailer)
+        if size >= len(MAGIC) + TRAILER.size:
+            tag, start, count = TRAILER.unpack_from(self.mm, size - TRAILER.size)
+            if tag == INDEX_TAG and start + count * INDEX.size + TRAILER.size == size:
+                self.index, self.data_end, self.indexed = self.mm[start:size - TRAILER.size], start, True
+        if not self.indexed:
+            self.index, self.data_end = self._scan(size)
+        self._by_digest: Optional[dict] = None
+
+    def _scan(self, size: int) -> tuple[bytes, int]:
+        index = bytearray()
+        pos = len(MAGIC)
+        while pos + RECORD.size <= size:
+            tag, version, ecc, meta_len, digest = RECORD.unpack_from(self.mm, pos)
+            if tag != RECORD_TAG or not 1 <= version <= 40:
+                break
+            end = pos + RECORD.size + meta_len + matrix_bytes(version)
+            if end > size:
+                break
+            index += INDEX.pack(pos, digest)
+            pos = end
+        return bytes(index), pos
+
+    def __len__(self) -> int:
+        return len(self.index) // INDEX.size
+
+    def __getitem__(self, number: int) -> PackedCode:
+        if not 0 <= number < len(self):
+            raise IndexError(f"record {number} not in pack ({len(self)} records)")
+        offset, _ = INDEX.unpack_from(self.index, number * INDEX.size)
+        tag, version, ecc, meta_len, digest = RECORD.unpack_from(self.mm, offset)
+        if tag != RECORD_TAG:
+            raise PackError(f"record {number}: bad offset {offset}")
+        start = offset + RECORD.size + meta_len
+        meta = json.loads(self.mm[offset + RECORD.size:start]) if meta_len else {}
+        return PackedCode(number, version, ecc.decode("ascii"), digest.hex(), meta,
+                          self.mm[start:start + matrix_bytes(version)])
+
+    def __iter__(self) -> Iterator[PackedCode]:
+        for number in range(len(self)):
+            yield self[number]
+
+    def find(self, digest: str) -> list:
+        # record numbers of a payload hash (hex, see payload_digest)
+        if self._by_digest is None:
+            self._by_digest = {}
+            for number, (_, raw) in enumerate(INDEX.iter_unpack(self.index)):
+                self._by_digest.setdefault(raw.hex(), []).append(number)
+        return self._by_digest.get(digest, [])
+
+    def find_ids(self, ids: set) -> Iterator[PackedCode]:
+        # codes whose meta "id" is in ids, in pack order
+        for code in self:
+            if str(code.meta.get("id")) in ids:
+                yield code
+
+    def close(self) -> None:
+        self.mm.close()
+        self.fh.close()
+
+    def __enter__(self) -> "PackReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ------------------ Rasterizing ------------------
+def code_png(code: PackedCode, box_size: int = 10, border: int = QUIET_ZONE) -> bytes:
+    # Same image as the batch PNGs (qrcode's default 10 px per module).
+    from PIL import Image
+
+    n = code.size
+    symbol = Image.frombytes("1", (n, n), code.data, "raw", "1;I")
+    img = Image.new("1", (n + 2 * border, n + 2 * border), 1)
+    img.paste(symbol, (border, border))
+    img = img.resize((img.width * box_size, img.height * box_size), Image.NEAREST)
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def code_svg(code: PackedCode, border: int = QUIET_ZONE) -> bytes:
+    return svg_from_matrix(code.matrix(), border)
+
+
+def code_filename(code: PackedCode, fmt: str = "png") -> str:
+    # The stored name comes from the pack file, so only its last part is
+    # used, cleaned like png_filename: "../x.png" or "/etc/x" cannot leave
+    # the extract folder. Raises PackError if nothing usable is left.
+    name = code.meta.get("name")
+    if not name:
+        return f"{code.number:06d}.{fmt}"
+    stem = Path(clean_filename(Path(str(name)).name)).stem
+    if not stem.strip(". "):
+        raise PackError(f"record {code.number}: unusable file name {name!r}")
+    return f"{stem}.{fmt}"
+
+
+def verify_code(code: PackedCode) -> str:
+    # "" if the matrix decodes to a payload with the stored hash, else the problem
+    from epc_verify import DecodeError, decode_matrix
+
+    try:
+        payload = decode_payload(decode_matrix(code.matrix()))
+    except (DecodeError, UnicodeDecodeError) as e:
+        return str(e)
+    return "" if payload_digest(payload).hex() == code.digest else "payload hash differs"
+
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="List, extract or check the codes in an EPC QR pack.")
+    ap.add_argument("pack", type=Path, help="pack file written by epc_batch.py --pack")
+    ap.add_argument("--list", action="store_true", help="one JSON line per code (number, id, name, version, hash)")
+    ap.add_argument("--extract", type=Path, metavar="DIR", help="write the codes as image files into this folder")
+    ap.add_argument("--id", action="append", default=[], help="only codes with this id (repeatable)")
+    ap.add_argument("--hash", action="append", default=[], help="only codes with this payload hash (repeatable)")
+    ap.add_argument("--format", choices=("png", "svg"), default="png", help="image format for --extract")
+    ap.add_argument("--box-size", type=int, default=10, help="PNG pixels per module (default: 10)")
+    ap.add_argument("--verify", action="store_true", help="decode every selected code and check its payload hash")
+    args = ap.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        pack = PackReader(args.pack)
+    except (OSError, PackError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    with pack:
+        if args.id or args.hash:
+            numbers = {n for h in args.hash for n in pack.find(h.lower())}
+            numbers.update(code.number for code in pack.find_ids(set(args.id)))
+            codes = (pack[n] for n in sorted(numbers))
+        else:
+            codes = iter(pack)
+        if args.extract:
+            args.extract.mkdir(parents=True, exist_ok=True)
+        count = bad = unnamed = 0
+        for code in codes:
+            count += 1
+            if args.list:
+                print(json.dumps({"number": code.number, "id": code.meta.get("id"), "name": code.meta.get("name"),
+                                  "version": code.version, "ecc": code.ecc, "hash": code.digest},
+                                 ensure_ascii=False))
+            if args.extract:
+                try:
+                    target = args.extract / code_filename(code, args.format)
+                except PackError as e:
+                    unnamed += 1
+                    print(e, file=sys.stderr)
+                else:
+                    data = code_png(code, max(1, args.box_size)) if args.format == "png" else code_svg(code)
+                    replace_bytes(data, target)
+            if args.verify:
+                problem = verify_code(code)
+                if problem:
+                    bad += 1
+                    print(f"record {code.number} ({code.meta.get('name')}): {problem}", file=sys.stderr)
+        elapsed = time.perf_counter() - started
+        size = args.pack.stat().st_size
+        print(f"{count} of {len(pack)} codes in {elapsed:.2f}s; pack {size} bytes "
+              f"({size / max(len(pack), 1):.0f} per code), index "
+              f"{'ok' if pack.indexed else 'rebuilt (writer did not finish)'}"
+              + (f"; {unnamed} not extracted (bad name)" if unnamed else "")
+              + (f"; {bad} failed verification" if args.verify else ""), file=sys.stderr)
+    return 1 if bad or unnamed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+# EPC payload parser – the inverse of build_epc_payload, for payload archives
+# parse_epc_payload(build_epc_payload(...)) gives back the EpcFields, and
+# EpcFields.payload() of a parsed record is the canonical payload again
+# (byte-identical for anything build_epc_payload wrote). Other tools' payloads
+# are accepted with \r\n line ends and with trailing empty lines left off.
+# Requirements: none (rendering with --render needs qrcode[pil])
+# Run: python epc_parse.py archive.txt [--out rows.jsonl] [--validate] [--dedupe] [--render ./qr_out]
+#
+# Archive formats:
+#   .jsonl  one JSON string per line, or an object with a "payload" key
+#   other   payloads one after another; a record starts at a "BCD" line that
+#           is followed by a version line (001/002)
+# Benchmark: python benchmarks/bench_parse.py
+
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+import argparse
+import json
+import os
+import sys
+import time
+
+from epc_core import EPC_CHARSETS, EPC_MAX_LINES, EPC_VERSIONS, EpcFields, iter_epc_errors, payload_digest
+from epc_i18n import I18N
+
+
+class PayloadError(ValueError):
+    # .reason: header, version, charset, identification, lines, amount, remittance
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+# ------------------ Parser ------------------
+def parse_epc_payload(payload: str) -> EpcFields:
+    # Structure only (header, version, charset, line count, amount prefix);
+    # the field rules are iter_epc_errors(). Raises PayloadError.
+    lines = payload.split("\n")
+    if len(lines) > EPC_MAX_LINES:
+        # trailing empty lines (e.g. a final newline) are not an extra field
+        while len(lines) > EPC_MAX_LINES and not lines[-1].strip("\r"):
+            lines.pop()
+        if len(lines) > EPC_MAX_LINES:
+            raise PayloadError("lines", f"{len(lines)} lines, at most {EPC_MAX_LINES} allowed")
+    if payload.find("\r") >= 0:
+        lines = [line[:-1] if line.endswith("\r") else line for line in lines]
+    if lines[0] != "BCD":
+        raise PayloadError("header", "payload does not start with BCD")
+    if len(lines) < 7:
+        raise PayloadError("lines", f"only {len(lines)} lines, name and IBAN are missing")
+    lines += [""] * (EPC_MAX_LINES - len(lines))
+    _, version, charset, ident, bic, name, iban, amount, purpose, ref, text, info = lines
+    if version not in EPC_VERSIONS:
+        raise PayloadError("version", f"unknown version {version!r}")
+    if charset not in EPC_CHARSETS:
+        raise PayloadError("charset", f"unknown character set {charset!r}")
+    if ident != "SCT":
+        raise PayloadError("identification", f"identification is {ident!r}, expected SCT")
+    if amount:
+        if not amount.startswith("EUR"):
+            raise PayloadError("amount", f"amount {amount!r} is not in EUR")
+        amount = amount[3:]
+    if ref and text:
+        raise PayloadError("remittance", "both structured reference and unstructured text are set")
+    return EpcFields(name=name, iban=iban, amount_eur=amount or None, bic=bic or None,
+                     purpose_code=purpose or None, remittance_ref=ref or None,
+                     remittance_text=text or None, info=info or None,
+                     version=version, charset=charset)
+
+
+def parse_epc_bytes(data: bytes) -> EpcFields:
+    # Raw QR payload bytes, decoded with the character set named in line 3.
+    parts = data.split(b"\n", 3)
+    charset = parts[2].strip().decode("ascii", "replace") if len(parts) > 2 else ""
+    codec = EPC_CHARSETS.get(charset)
+    if codec is None:
+        raise PayloadError("charset", f"unknown character set {charset!r}")
+    try:
+        return parse_epc_payload(data.decode(codec))
+    except UnicodeDecodeError as e:
+        raise PayloadError("charset", f"not valid {codec}: {e}")
+
+
+# ------------------ Archives ------------------
+def iter_payloads(path: Path, encoding: str = "utf-8") -> Iterator[str]:
+    # Streams the payload strings of an archive file.
+    with open(path, encoding=encoding, newline="") as fh:
+        if path.suffix.lower() in (".jsonl", ".ndjson", ".json"):
+            for line in fh:
+                line = line.strip()
+                if line:
+                    item = json.loads(line)
+                    yield item["payload"] if isinstance(item, dict) else item
+            return
+        record: list = []
+        prev = None  # a "BCD" line waiting for its version line
+        for line in fh:
+            line = line.rstrip("\r\n")
+            if prev is not None:
+                if line in EPC_VERSIONS:
+                    if record:
+                        yield _join(record)
+                    record = [prev]
+                elif record:
+                    record.append(prev)
+                prev = None
+            if line == "BCD":
+                prev = line
+                continue
+            if record:
+                record.append(line)
+        if prev is not None and record and len(record) < EPC_MAX_LINES:
+            record.append(prev)  # a name or reference that reads "BCD"
+        if record:
+            yield _join(record)
+
+
+def _join(lines: list) -> str:
+    # a record runs until the next one starts; blank separator lines go
+    while len(lines) > EPC_MAX_LINES and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
+
+
+class ParsedRecord(NamedTuple):
+    index: int  # 1-based position in the archive
+    payload: str  # as found in the archive
+    fields: Optional[EpcFields] = None
+    error: str = ""  # PayloadError reason or the first i18n key (with validate)
+    message: str = ""
+    duplicate_of: int = 0  # index of the first record with the same canonical payload
+
+
+def iter_records(payloads: Iterable[str], validate: bool = False, dedupe: bool = False,
+                 lang: str = "en") -> Iterator[ParsedRecord]:
+    # Never raises per record. dedupe keeps 16-byte digests of the distinct
+    # payloads (as found and canonical), not the payloads.
+    seen: dict = {}
+    for index, payload in enumerate(payloads, start=1):
+        try:
+            fields = parse_epc_payload(payload)
+        except PayloadError as e:
+            yield ParsedRecord(index, payload, None, e.reason, str(e))
+            continue
+        if dedupe:
+            # repeats are reported before validation: the first one already
+            # was. Exact repeats skip rebuilding the canonical payload.
+            raw = payload_digest(payload)
+            first = seen.setdefault(raw, index)
+            if first == index:
+                try:
+                    canonical = fields.payload()
+                except ValueError:  # bad amount, left to validate
+                    canonical = payload
+                if canonical != payload:
+                    first = seen[raw] = seen.setdefault(payload_digest(canonical), index)
+            if first != index:
+                yield ParsedRecord(index, payload, fields, duplicate_of=first)
+                continue
+        if validate:
+            problem = next(iter_epc_errors(fields), None)
+            if problem is not None:
+                yield ParsedRecord(index, payload, fields, problem[1], I18N[lang][problem[1]])
+                continue
+        yield ParsedRecord(index, payload, fields)
+
+
+def fields_row(fields: EpcFields) -> dict:
+    # epc_batch input row (short column names), empty fields left out
+    row = {"name": fields.name, "iban": fields.iban, "amount": fields.amount_eur, "bic": fields.bic,
+           "purpose": fields.purpose_code, "ref": fields.remittance_ref, "text": fields.remittance_text,
+           "info": fields.info, "version": fields.version, "charset": fields.charset}
+    return {key: value for key, value in row.items() if value is not None}
+
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Parse an archive of EPC payloads into batch rows.")
+    ap.add_argument("archive", type=Path, help="payload archive (.jsonl or plain text)")
+    ap.add_argument("--encoding", default="utf-8", help="text encoding of the archive file (default: utf-8)")
+    ap.add_argument("--out", default="-", help="JSON-lines rows for epc_batch.py (default: stdout)")
+    ap.add_argument("--validate", action="store_true", help="drop rows that fail the GUI field rules")
+    ap.add_argument("--dedupe", action="store_true", help="drop repeats of the same canonical payload")
+    ap.add_argument("--render", type=Path, metavar="DIR", help="render the good rows to PNGs in this folder")
+    ap.add_argument("--workers", type=int, default=1, help="render processes with --render (0 = one per CPU core)")
+    args = ap.parse_args(argv)
+
+    started = time.perf_counter()
+    counts = {"records": 0, "ok": 0, "invalid": 0, "duplicates": 0}
+
+    def good_rows() -> Iterator[dict]:
+        for rec in iter_records(iter_payloads(args.archive, args.encoding), args.validate, args.dedupe):
+            counts["records"] += 1
+            if rec.error:
+                counts["invalid"] += 1
+                print(f"record {rec.index}: {rec.error}: {rec.message}", file=sys.stderr)
+            elif rec.duplicate_of:
+                counts["duplicates"] += 1
+            else:
+                counts["ok"] += 1
+                yield {"id": f"{rec.index:06d}", **fields_row(rec.fields)}
+
+    if args.render:
+        from epc_batch import BatchOptions, iter_results
+
+        args.render.mkdir(parents=True, exist_ok=True)
+        workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+        for res in iter_results(good_rows(), BatchOptions(args.render), workers):
+            if res.path is None:
+                print(f"row {res.index}: {res.error}", file=sys.stderr)
+    else:
+        out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+        try:
+            for row in good_rows():
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    elapsed = time.perf_counter() - started
+    print(f"{counts['records']} payloads in {elapsed:.2f}s: {counts['ok']} ok, {counts['invalid']} invalid, "
+          f"{counts['duplicates']} duplicates", file=sys.stderr)
+    return 1 if counts["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# EPC (SEPA) QR – saved payees (name, IBAN, BIC), no Qt import
+# Two backends with the same interface:
+#   PayeeStore        JSON file (default, ~/.epc_qr_payees.json)
+#   SqlitePayeeStore  SQLite database, for large creditor master data
+# open_payee_store() picks the backend from the file extension.
+#
+# Lookups by name and IBAN are O(1) via in-memory indexes (JSON) or table
+# indexes (SQLite). JSON writes go to a temp file that replaces the original
+# in one step, so a crash mid-write never leaves a truncated payee file.
+
+from pathlib import Path
+from typing import Iterable
+import json
+import os
+import sqlite3
+import tempfile
+
+from epc_iban import normalize_iban
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = "utf-8") -> None:
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, newline="\n") as fh:
+            fh.write(text)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# ------------------ JSON backend ------------------
+class PayeeStore:
+    def __init__(self, path: Path, load: bool = True):
+        # load=False starts empty without touching the file (GUI fallback)
+        self.path = Path(path)
+        self.by_name: dict = {}  # name -> payee dict, in file order
+        self.by_iban: dict = {}  # normalized IBAN -> list of names
+        self.duplicates: list = []  # later entries with a name already taken, see load()
+        if load:
+            self.load()
+
+    @property
+    def data(self) -> dict:
+        return {"payees": list(self.by_name.values()) + self.duplicates}
+
+    def load(self):
+        self.by_name, self.by_iban, self.duplicates = {}, {}, []
+        try:
+            if self.path.exists():
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                for p in data.get("payees", []):
+                    # first entry wins for duplicate names, as with the old linear
+                    # get(); the others are kept (and saved again) in duplicates
+                    name = p.get("name", "")
+                    if name in self.by_name:
+                        self.duplicates.append(p)
+                    else:
+                        self.by_name[name] = p
+                for name, p in self.by_name.items():
+                    self._index_iban(name, p)
+            else:
+                self.save()
+        except Exception:
+            self.by_name, self.by_iban, self.duplicates = {}, {}, []
+
+    def save(self):
+        # no indent: json's C encoder is only used for compact output, which is
+        # several times faster than indent=2 for large payee lists
+        atomic_write_text(self.path, json.dumps(self.data, ensure_ascii=False))
+
+    def list_names(self):
+        return list(self.by_name)
+
+    def get(self, name: str):
+        return self.by_name.get(name)
+
+    def find_by_iban(self, iban: str) -> list:
+        return [self.by_name[n] for n in self.by_iban.get(normalize_iban(iban), [])]
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def upsert(self, payee: dict):
+        self._upsert(payee)
+        self.save()
+
+    def upsert_many(self, payees: Iterable[dict]):
+        # bulk import: index everything, write the file once
+        for payee in payees:
+            self._upsert(payee)
+        self.save()
+
+    def delete(self, name: str):
+        p = self.by_name.pop(name, None)
+        if p is not None:
+            self._unindex_iban(name, p)
+            # the next entry of that name (if the file has one) takes its place
+            for i, dup in enumerate(self.duplicates):
+                if dup.get("name", "") == name:
+                    self.by_name[name] = self.duplicates.pop(i)
+                    self._index_iban(name, self.by_name[name])
+                    break
+        self.save()
+
+    # ---------- index helpers ----------
+    def _upsert(self, payee: dict):
+        name = payee.get("name", "")
+        existing = self.by_name.get(name)
+        if existing is not None:
+            self._unindex_iban(name, existing)
+            existing.update(payee)
+        else:
+            existing = self.by_name[name] = dict(payee)
+        self._index_iban(name, existing)
+
+    def _index_iban(self, name: str, p: dict):
+        iban = normalize_iban(p.get("iban", ""))
+        if iban:
+            self.by_iban.setdefault(iban, []).append(name)
+
+    def _unindex_iban(self, name: str, p: dict):
+        iban = normalize_iban(p.get("iban", ""))
+        names = self.by_iban.get(iban)
+        if names and name in names:
+            names.remove(name)
+            if not names:
+                del self.by_iban[iban]
+
+
+# ------------------ SQLite backend ------------------
+class SqlitePayeeStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.duplicates: list = []  # names are the primary key, so always empty
+        # the GUI opens stores on a loader thread and then uses them on its own
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS payees ("
+                " name TEXT PRIMARY KEY, iban TEXT NOT NULL DEFAULT '',"
+                " bic TEXT NOT NULL DEFAULT '', extra TEXT NOT NULL DEFAULT '{}')"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS payees_iban ON payees(iban)")
+
+    def load(self):
+        pass  # rows are read on demand
+
+    def save(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def list_names(self):
+        return [r[0] for r in self.db.execute("SELECT name FROM payees ORDER BY rowid")]
+
+    def get(self, name: str):
+        row = self.db.execute(
+            "SELECT name, iban, bic, extra FROM payees WHERE name = ?", (name,)
+        ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def find_by_iban(self, iban: str) -> list:
+        rows = self.db.execute(
+            "SELECT name, iban, bic, extra FROM payees WHERE iban = ? ORDER BY rowid",
+            (normalize_iban(iban),),
+        )
+        return [self._to_dict(r) for r in rows]
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM payees").fetchone()[0]
+
+    def upsert(self, payee: dict):
+        self.upsert_many([payee])
+
+    def upsert_many(self, payees: Iterable[dict]):
+        with self.db:
+            for payee in payees:
+                existing = self.get(payee.get("name", "")) or {}
+                existing.update(payee)
+                self.db.execute(
+                    "INSERT INTO payees (name, iban, bic, extra) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(name) DO UPDATE SET iban = excluded.iban,"
+                    " bic = excluded.bic, extra = excluded.extra",
+                    self._to_row(existing),
+                )
+
+    def delete(self, name: str):
+        with self.db:
+            self.db.execute("DELETE FROM payees WHERE name = ?", (name,))
+
+    # ---------- row mapping ----------
+    @staticmethod
+    def _to_row(p: dict) -> tuple:
+        extra = {k: v for k, v in p.items() if k not in ("name", "iban", "bic")}
+        return (p.get("name", ""), normalize_iban(p.get("iban", "")), p.get("bic", "") or "",
+                json.dumps(extra, ensure_ascii=False))
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        name, iban, bic, extra = row
+        p = {"name": name, "iban": iban, "bic": bic}
+        p.update(json.loads(extra or "{}"))
+        return p
+
+
+def open_payee_store(path: Path):
+    path = Path(path)
+    if path.suffix.lower() in SQLITE_SUFFIXES:
+        return SqlitePayeeStore(path)
+    return PayeeStore(path)
@@ -0,0 +1,340 @@
+# EPC (SEPA) QR HTTP service – stdlib only, no Qt import
+# Renders codes in memory and returns the image bytes directly (nothing is
+# written under BASE_OUT).
+# Requirements:
+#   pip install qrcode[pil]
+# Run: python epc_server.py [--host 127.0.0.1] [--port 8080] [--workers 2] [--max-pending 32]
+#                           [--trace-log requests.jsonl]
+#
+# Endpoints:
+#   GET  /qr?name=..&iban=..&amount=..[&format=png|svg]   (same fields as epc_batch.py)
+#   POST /qr        JSON object with the same fields (Content-Length required, at most 64 KiB)
+#   GET  /metrics   Prometheus text format: request counters, latency histograms
+#   GET  /healthz
+# HEAD works wherever GET does.
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from epc_batch import row_to_fields
+from epc_cache import cache_key
+from epc_core import MIME_TYPES, render_bytes, validate_epc
+from epc_i18n import I18N
+import epc_trace
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+MAX_BODY = 64 * 1024
+
+
+# ------------------ Metrics ------------------
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot = +Inf
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.total += value
+        self.n += 1
+
+    def lines(self, name: str, labels: str = "") -> list:
+        out, cum = [], 0
+        sep = "," if labels else ""
+        for bound, count in zip(self.buckets, self.counts):
+            cum += count
+            out.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cum}')
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.n}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.total:.6f}")
+        out.append(f"{name}_count{suffix} {self.n}")
+        return out
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests: dict = {}  # (path, status) -> count
+        self.request_latency: dict = {}  # format -> Histogram
+        self.render_latency: dict = {}  # format -> Histogram
+        self.in_flight = 0
+        self.rejected = 0
+
+    def record(self, path: str, status: int, seconds: float, fmt: Optional[str] = None,
+               render_seconds: Optional[float] = None) -> None:
+        with self.lock:
+            key = (path, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if fmt is not None:
+                self.request_latency.setdefault(fmt, Histogram()).observe(seconds)
+                if render_seconds is not None:
+                    self.render_latency.setdefault(fmt, Histogram()).observe(render_seconds)
+
+    def render_text(self) -> str:
+        with self.lock:
+            lines = ["# TYPE epc_http_requests_total counter"]
+            for (path, status), n in sorted(self.requests.items()):
+                lines.append(f'epc_http_requests_total{{path="{path}",status="{status}"}} {n}')
+            lines.append("# TYPE epc_request_seconds histogram")
+            for fmt, hist in sorted(self.request_latency.items()):
+                lines.extend(hist.lines("epc_request_seconds", f'format="{fmt}"'))
+            lines.append("# TYPE epc_render_seconds histogram")
+            for fmt, hist in sorted(self.render_latency.items()):
+                lines.extend(hist.lines("epc_render_seconds", f'format="{fmt}"'))
+            lines.append("# TYPE epc_renders_in_flight gauge")
+            lines.append(f"epc_renders_in_flight {self.in_flight}")
+            lines.append("# TYPE epc_renders_rejected_total counter")
+            lines.append(f"epc_renders_rejected_total {self.rejected}")
+        return "\n".join(lines) + "\n"
+
+
+# ------------------ Bounded render executor ------------------
+class Overloaded(Exception):
+    pass
+
+
+def _timed_render(payload: str, fmt: str, trace: bool = False) -> tuple[bytes, float, Optional[dict]]:
+    # Runs in a worker; with trace the stage times come back with the result,
+    # since worker processes cannot reach the server's epc_trace hooks.
+    recorder = epc_trace.recorder() if trace else None
+    if recorder is not None:
+        recorder.start()
+    started = time.perf_counter()
+    data = render_bytes(payload, fmt)
+    return data, time.perf_counter() - started, recorder.stop() if recorder is not None else None
+
+
+class RenderPool:
+    # At most max_pending renders are queued or running; further requests
+    # wait up to queue_timeout and are then rejected (HTTP 503) instead of
+    # piling up unbounded work.
+    def __init__(self, executor: Executor, max_pending: int, metrics: Metrics,
+                 queue_timeout: float = 2.0):
+        self.executor = executor
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.metrics = metrics
+        self.queue_timeout = queue_timeout
+
+    def render(self, payload: str, fmt: str) -> tuple[bytes, float, Optional[dict]]:
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            with self.metrics.lock:
+                self.metrics.rejected += 1
+            raise Overloaded()
+        with self.metrics.lock:
+            self.metrics.in_flight += 1
+        try:
+            return self.executor.submit(_timed_render, payload, fmt, epc_trace.active).result()
+        finally:
+            with self.metrics.lock:
+                self.metrics.in_flight -= 1
+            self.slots.release()
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+# ------------------ HTTP handler ------------------
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    # If-None-Match: "*" or a comma-separated list of entity tags, compared
+    # whole and weakly (W/"x" matches "x")
+    for tag in (header or "").split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+
+class EpcRequestHandler(BaseHTTPRequestHandler):
+    server_version = "EPCQR/1.0"
+    pool: RenderPool  # set by make_server
+    metrics: Metrics
+    lang = "en"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/qr":
+            self.handle_qr(dict(parse_qsl(url.query)))
+        elif url.path == "/metrics":
+            self.send_body(200, self.metrics.render_text().encode("utf-8"),
+                           "text/plain; version=0.0.4; charset=utf-8")
+        elif url.path == "/healthz":
+            self.send_body(200, b"ok\n", "text/plain; charset=utf-8")
+        else:
+            self.send_error_json(404, "not_found", "Not found")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/qr":
+            self.send_error_json(404, "not_found", "Not found")
+            return
+        length = self.body_length()
+        if length is None:
+            return
+        try:
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError
+        except ValueError:
+            self.send_error_json(400, "bad_json", "Body must be a JSON object")
+            return
+        params.update(parse_qsl(url.query))
+        self.handle_qr(params)
+
+    def do_HEAD(self):
+        # same status and headers as GET; send_body leaves out the body
+        self.do_GET()
+
+    def body_length(self) -> Optional[int]:
+        # Content-Length of a POST, or None after an error reply. The body is
+        # not read in that case, so the connection is closed afterwards.
+        raw = self.headers.get("Content-Length")
+        error = None
+        if raw is None:
+            error = (411, "length_required", "Content-Length header required")
+        elif not (raw.isascii() and raw.isdigit()):
+            error = (400, "bad_length", "Content-Length must be a non-negative integer")
+        elif int(raw) > MAX_BODY:
+            error = (413, "too_large", f"Request body too large (max {MAX_BODY} bytes)")
+        if error is None:
+            return int(raw)
+        self.close_connection = True
+        self.send_error_json(*error, {"Connection": "close"})
+        return None
+
+    def handle_qr(self, params: dict):
+        if not epc_trace.active:
+            self._handle_qr(params)
+            return
+        recorder = epc_trace.recorder()
+        recorder.start()
+        self.status = 0
+        self.error_key = self.render_stages = None
+        fmt = str(params.get("format", "png")).lower()
+        started = time.perf_counter()
+        try:
+            self._handle_qr(params)
+        finally:
+            stages = recorder.stop()
+            stages.update(self.render_stages or {})
+            epc_trace.emit("item", time.perf_counter() - started, source="server", status=self.status,
+                           ok=self.status in (200, 304), error=self.error_key,
+                           format=fmt, stages=stages)
+
+    def _handle_qr(self, params: dict):
+        started = time.perf_counter()
+        fmt = str(params.pop("format", "png")).lower()
+        if fmt not in MIME_TYPES:
+            self.send_error_json(400, "bad_format", f"format must be one of {', '.join(MIME_TYPES)}")
+            return
+        fields = row_to_fields(params)
+        ok, key = validate_epc(fields)
+        if not ok:
+            self.send_error_json(400, key, I18N[self.lang][key])
+            return
+        payload = fields.payload()
+        etag = f'"{cache_key(payload, {"format": fmt})}"'
+        headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_body(304, b"", None, headers)
+            self.metrics.record("/qr", 304, time.perf_counter() - started, fmt)
+            return
+        try:
+            data, render_seconds, self.render_stages = self.pool.render(payload, fmt)
+        except Overloaded:
+            self.send_error_json(503, "overloaded", "Too many pending renders, retry later",
+                                 {"Retry-After": "1"})
+            return
+        except Exception as e:
+            self.send_error_json(500, "qr_error", str(e))
+            return
+        self.send_body(200, data, MIME_TYPES[fmt], headers)
+        self.metrics.record("/qr", 200, time.perf_counter() - started, fmt, render_seconds)
+
+    # ---------- responses ----------
+    def send_body(self, status: int, body: bytes, content_type: Optional[str],
+                  headers: Optional[dict] = None):
+        self.status = status
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:  # a 304 carries no entity headers
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_error_json(self, status: int, key: str, message: str, headers: Optional[dict] = None):
+        self.error_key = key
+        body = json.dumps({"error": key, "message": message}, ensure_ascii=False).encode("utf-8")
+        self.send_body(status, body, "application/json; charset=utf-8", headers)
+        self.metrics.record(urlsplit(self.path).path, status, 0.0)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8080, workers: int = 0,
+                max_pending: int = 32, executor: str = "process",
+                quiet: bool = False) -> ThreadingHTTPServer:
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    metrics = Metrics()
+    pool = RenderPool(pool_cls(max_workers=workers), max_pending, metrics)
+    handler = type("Handler", (EpcRequestHandler,), {"pool": pool, "metrics": metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.quiet = quiet
+    server.render_pool = pool
+    return server
+
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Serve EPC (SEPA) QR codes over HTTP.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--workers", type=int, default=0, help="render workers (default: one per CPU core)")
+    ap.add_argument("--max-pending", type=int, default=32,
+                    help="renders queued or running before requests get 503 (default: 32)")
+    ap.add_argument("--executor", choices=("process", "thread"), default="process")
+    ap.add_argument("--quiet", action="store_true", help="do not log every request")
+    ap.add_argument("--trace-log", type=Path, help="append one JSON line per /qr request with stage timings")
+    args = ap.parse_args(argv)
+
+    trace_log = epc_trace.add_hook(epc_trace.JsonLinesLogger(args.trace_log)) if args.trace_log else None
+
+    server = make_server(args.host, args.port, args.workers, args.max_pending,
+                         args.executor, args.quiet)
+    print(f"Serving EPC QR codes on http://{args.host}:{server.server_port}/qr")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.render_pool.shutdown()
+        if trace_log is not None:
+            trace_log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+# EPC (SEPA) QR print sheets – many codes per page, with captions, for cutting into slips
+# Requirements:
+#   pip install qrcode[pil]
+# Run:
+#   python epc_sheet.py payments.csv --out slips.pdf [--cols 3] [--rows 4] [--page a4|letter]
+#   python epc_sheet.py payments.csv --png-dir sheets/ [--dpi 300]
+#
+# Input is the same CSV/JSONL as epc_batch.py. Every code is drawn from its
+# QR module matrix (no PNG files are written or decoded), and pages are
+# written to disk as soon as they are full: a run over 10k+ codes only keeps
+# one page of codes in memory. The PDF uses the built-in Helvetica font, so no
+# font files are embedded.
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional
+import argparse
+import os
+import sys
+import time
+import zlib
+
+from epc_amount import format_cents, optional_cents
+from epc_batch import iter_chunk_results, iter_rows, row_to_fields
+from epc_core import QUIET_ZONE, pdf_fragment, qr_matrix, validate_epc
+from epc_i18n import I18N
+
+MM = 72 / 25.4
+PAGE_SIZES = {"a4": (210 * MM, 297 * MM), "letter": (612.0, 792.0)}
+# caption fonts tried for PNG sheets (Linux, Windows, macOS)
+PNG_FONTS = ("DejaVuSans.ttf", "arial.ttf", "/System/Library/Fonts/Helvetica.ttc")
+
+
+# ------------------ Slips ------------------
+class Slip(NamedTuple):
+    index: int
+    matrix: Optional[list]  # None if the row is invalid
+    captions: tuple = ()    # payee, amount, reference
+    error: str = ""
+
+
+def row_slip(index: int, row: dict) -> Slip:
+    # Never raises, so one broken row does not abort the sheet.
+    try:
+        fields = row_to_fields(row)
+        ok, key = validate_epc(fields)
+        if not ok:
+            return Slip(index, None, error=I18N["en"][key])
+        reference = (fields.remittance_ref or fields.remittance_text or "").strip()
+        cents = optional_cents(fields.amount_eur, fields.amount_cents)
+        captions = (fields.name.strip(), f"EUR {format_cents(cents)}", reference)
+        return Slip(index, qr_matrix(fields.payload()), captions)
+    except Exception as e:
+        return Slip(index, None, error=str(e) or e.__class__.__name__)
+
+
+def slip_chunk(chunk: list) -> list:
+    # Worker entry point: a list of (index, row) pairs -> list of Slips.
+    return [row_slip(index, row) for index, row in chunk]
+
+
+def iter_slips(rows: Iterable[dict], workers: int = 1, chunk_size: int = 64) -> Iterator[Slip]:
+    # In input order; with workers > 1 through the same bounded process-pool
+    # window as epc_batch.iter_results.
+    pairs = enumerate(rows, start=1)
+    if workers <= 1:
+        for index, row in pairs:
+            yield row_slip(index, row)
+        return
+    yield from iter_chunk_results(pairs, slip_chunk, (), lambda index, err: Slip(index, None, error=err),
+                                  workers, chunk_size)
+
+
+# ------------------ Layout ------------------
+@dataclass
+class SheetLayout:
+    # All sizes in PDF points (1/72 inch); origin top-left, y grows downwards.
+    width: float = PAGE_SIZES["a4"][0]
+    height: float = PAGE_SIZES["a4"][1]
+    cols: int = 3
+    rows: int = 4
+    margin: float = 10 * MM
+    padding: float = 3 * MM
+    font_size: float = 7.0
+    caption_lines: int = 3
+    cut_lines: bool = True
+
+    @property
+    def per_page(self) -> int:
+        return self.cols * self.rows
+
+    @property
+    def cell_size(self) -> tuple:
+        return ((self.width - 2 * self.margin) / self.cols,
+                (self.height - 2 * self.margin) / self.rows)
+
+    @property
+    def caption_height(self) -> float:
+        return self.caption_lines * self.font_size * 1.25
+
+    def cell_origin(self, slot: int) -> tuple:
+        cell_w, cell_h = self.cell_size
+        col, row = slot % self.cols, slot // self.cols
+        return self.margin + col * cell_w, self.margin + row * cell_h
+
+    def symbol_box(self, slot: int, modules: int) -> tuple:
+        # (x, y, module size) of the symbol's top-left corner; the quiet zone
+        # lies inside the cell, the captions below it
+        cell_w, cell_h = self.cell_size
+        x0, y0 = self.cell_origin(slot)
+        side = min(cell_w, cell_h - self.caption_height) - 2 * self.padding
+        module = side / (modules + 2 * QUIET_ZONE)
+        x = x0 + (cell_w - modules * module) / 2
+        y = y0 + self.padding + QUIET_ZONE * module
+        return x, y, module
+
+    def caption_origin(self, slot: int) -> tuple:
+        cell_w, cell_h = self.cell_size
+        x0, y0 = self.cell_origin(slot)
+        return x0 + self.padding, y0 + cell_h - self.padding - self.caption_height
+
+    def max_caption_chars(self) -> int:
+        # rough Helvetica average advance of 0.5 em
+        return max(4, int((self.cell_size[0] - 2 * self.padding) / (self.font_size * 0.5)))
+
+
+def fit_caption(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+# ------------------ PDF output ------------------
+def _pdf_text(text: str) -> bytes:
+    data = text.encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class PdfSheetWriter:
+    # Writes one PDF object after the other straight to the file; only the
+    # object offsets stay in memory until the trailer is written.
+    # Objects: 1 catalog, 2 page tree, 3 font, then page + content per page.
+    def __init__(self, fh: BinaryIO, layout: SheetLayout):
+        self.fh = fh
+        self.layout = layout
+        self.pos = 0
+        self.offsets = [0, 0, 0]
+        self.kids: list = []
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data: bytes) -> None:
+        self.fh.write(data)
+        self.pos += len(data)
+
+    def _object(self, num: int, body: bytes) -> None:
+        if num > len(self.offsets):
+            self.offsets.append(0)
+        self.offsets[num - 1] = self.pos
+        self._write(b"%d 0 obj\n" % num + body + b"\nendobj\n")
+
+    def page_content(self, slips: list) -> bytes:
+        lay = self.layout
+        h = lay.height
+        parts = []
+        if lay.cut_lines:
+            cell_w, cell_h = lay.cell_size
+            parts.append("q 0.8 G 0.3 w [2 2] 0 d")
+            for c in range(lay.cols + 1):
+                x = lay.margin + c * cell_w
+                parts.append(f"{x:.2f} {lay.margin:.2f} m {x:.2f} {h - lay.margin:.2f} l S")
+            for r in range(lay.rows + 1):
+                y = h - lay.margin - r * cell_h
+                parts.append(f"{lay.margin:.2f} {y:.2f} m {lay.width - lay.margin:.2f} {y:.2f} l S")
+            parts.append("Q")
+        limit = lay.max_caption_chars()
+        for slot, slip in enumerate(slips):
+            n = len(slip.matrix)
+            x, y, module = lay.symbol_box(slot, n)
+            # symbol_box is the top-left corner, pdf_fragment wants the lower-left one
+            parts.append(pdf_fragment(slip.matrix, x, h - y - n * module, module).decode("ascii").rstrip("\n"))
+            tx, ty = lay.caption_origin(slot)
+            parts.append(f"BT /F1 {lay.font_size:g} Tf {lay.font_size * 1.25:.2f} TL "
+                         f"{tx:.2f} {h - ty - lay.font_size:.2f} Td")
+            for i, text in enumerate(slip.captions[:lay.caption_lines]):
+                if i:
+                    parts.append("T*")
+                parts.append(f"({_pdf_text(fit_caption(text, limit)).decode('latin-1')}) Tj")
+            parts.append("ET")
+        return "\n".join(parts).encode("latin-1")
+
+    def add_page(self, slips: list) -> None:
+        page_no = len(self.offsets) + 1
+        content = zlib.compress(self.page_content(slips))
+        self._object(page_no, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.layout.width:.2f} {self.layout.height:.2f}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_no + 1} 0 R >>").encode("ascii"))
+        self._object(page_no + 1, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content)
+                     + content + b"\nendstream")
+        self.kids.append(page_no)
+
+    def close(self) -> None:
+        kids = " ".join(f"{k} 0 R" for k in self.kids)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.kids)} >>".encode("ascii"))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.pos
+        count = len(self.offsets) + 1
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % count)
+        self._write(b"".join(b"%010d 00000 n \n" % off for off in self.offsets))
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref))
+
+
+# ------------------ PNG output ------------------
+class PngSheetWriter:
+    # One PNG per page (sheet_0001.png, ...), each saved as soon as it is full.
+    def __init__(self, out_dir: Path, layout: SheetLayout, dpi: int = 300, font: Optional[str] = None):
+        from PIL import ImageFont
+
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.layout = layout
+        self.dpi = dpi
+        self.scale = dpi / 72
+        self.font = None
+        size = layout.font_size * self.scale
+        for name in ([font] if font else []) + list(PNG_FONTS):
+            try:
+                self.font = ImageFont.truetype(name, size)
+                break
+            except OSError:
+                continue
+        if self.font is None:
+            try:  # Pillow's built-in font has no umlauts, only used as a last resort
+                self.font = ImageFont.load_default(size=size)
+            except TypeError:  # Pillow < 10.1: fixed-size bitmap font
+                self.font = ImageFont.load_default()
+        self.pages = 0
+
+    def fit(self, text: str, max_width: float) -> str:
+        # the real glyph widths are known here, so cut exactly at the cell edge
+        limit = len(text)
+        while limit and self.font.getlength(fit_caption(text, limit)) > max_width:
+            limit -= 1
+        return fit_caption(text, limit) if limit else ""
+
+    def add_page(self, slips: list) -> Path:
+        from PIL import Image, ImageDraw
+
+        from epc_core import pack_matrix
+
+        lay, s = self.layout, self.scale
+        page = Image.new("L", (round(lay.width * s), round(lay.height * s)), 255)
+        draw = ImageDraw.Draw(page)
+        if lay.cut_lines:
+            cell_w, cell_h = lay.cell_size
+            for c in range(lay.cols + 1):
+                x = (lay.margin + c * cell_w) * s
+                draw.line([(x, lay.margin * s), (x, (lay.height - lay.margin) * s)], fill=200)
+            for r in range(lay.rows + 1):
+                y = (lay.margin + r * cell_h) * s
+                draw.line([(lay.margin * s, y), ((lay.width - lay.margin) * s, y)], fill=200)
+        max_width = (lay.cell_size[0] - 2 * lay.padding) * s
+        for slot, slip in enumerate(slips):
+            n = len(slip.matrix)
+            x, y, module = lay.symbol_box(slot, n)
+            px = max(1, int(module * s))  # whole pixels per module keep edges sharp
+            symbol = Image.frombytes("1", (n, n), pack_matrix(slip.matrix), "raw", "1;I")
+            symbol = symbol.resize((n * px, n * px), Image.NEAREST)
+            # center the (possibly slightly smaller) integer-pixel symbol in its box
+            offset = (module * s * n - n * px) / 2
+            page.paste(symbol, (round(x * s + offset), round(y * s + offset)))
+            tx, ty = lay.caption_origin(slot)
+            for i, text in enumerate(slip.captions[:lay.caption_lines]):
+                draw.text((tx * s, (ty + i * lay.font_size * 1.25) * s), self.fit(text, max_width),
+                          fill=0, font=self.font)
+        self.pages += 1
+        path = self.out_dir / f"sheet_{self.pages:04d}.png"
+        page.save(path, dpi=(self.dpi, self.dpi), optimize=False)
+        return path
+
+    def close(self) -> None:
+        pass
+
+
+# ------------------ Composer ------------------
+def compose(slips: Iterable[Slip], writer, on_error=None) -> dict:
+    # Fills pages slot by slot and hands every full page to the writer.
+    # on_error(slip) is called for rows that could not be rendered.
+    per_page = writer.layout.per_page
+    page: list = []
+    placed = failed = pages = 0
+    for slip in slips:
+        if slip.matrix is None:
+            failed += 1
+            if on_error is not None:
+                on_error(slip)
+            continue
+        page.append(slip)
+        placed += 1
+        if len(page) == per_page:
+            writer.add_page(page)
+            pages += 1
+            page = []
+    if page:
+        writer.add_page(page)
+        pages += 1
+    writer.close()
+    return {"codes": placed, "failed": failed, "pages": pages}
+
+
+def write_pdf_sheets(slips: Iterable[Slip], path: Path, layout: Optional[SheetLayout] = None,
+                     on_error=None) -> dict:
+    # written next to the target and moved into place when complete, so a run
+    # that fails half-way leaves no truncated PDF (and an older one intact)
+    path = Path(path)
+    part = path.with_name(f".{path.name}.part")
+    try:
+        with open(part, "wb") as fh:
+            stats = compose(slips, PdfSheetWriter(fh, layout or SheetLayout()), on_error)
+        os.replace(part, path)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    return stats
+
+
+def write_png_sheets(slips: Iterable[Slip], out_dir: Path, layout: Optional[SheetLayout] = None,
+                     dpi: int = 300, on_error=None, font: Optional[str] = None) -> dict:
+    return compose(slips, PngSheetWriter(out_dir, layout or SheetLayout(), dpi, font), on_error)
+
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Lay out EPC (SEPA) QR codes on print sheets (PDF or PNG).")
+    ap.add_argument("input", type=Path, help="CSV or JSONL file with one payment per row (as epc_batch.py)")
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", type=Path, help="multi-page PDF to write")
+    target.add_argument("--png-dir", type=Path, help="folder for one PNG per page")
+    ap.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from file extension)")
+    ap.add_argument("--page", choices=sorted(PAGE_SIZES), default="a4")
+    ap.add_argument("--landscape", action="store_true")
+    ap.add_argument("--cols", type=int, default=3)
+    ap.add_argument("--rows", type=int, default=4)
+    ap.add_argument("--margin-mm", type=float, default=10.0)
+    ap.add_argument("--font-size", type=float, default=7.0, help="caption size in points (default: 7)")
+    ap.add_argument("--no-cut-lines", action="store_true", help="do not draw dashed lines between slips")
+    ap.add_argument("--dpi", type=int, default=300, help="PNG sheet resolution (default: 300)")
+    ap.add_argument("--font", help="TrueType font file for PNG captions (default: DejaVu Sans / Arial)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="encoder processes; 1 = in-process, 0 = one per CPU core (default: 1)")
+    args = ap.parse_args(argv)
+
+    width, height = PAGE_SIZES[args.page]
+    if args.landscape:
+        width, height = height, width
+    layout = SheetLayout(width, height, max(1, args.cols), max(1, args.rows), args.margin_mm * MM,
+                         font_size=args.font_size, cut_lines=not args.no_cut_lines)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    def report(slip: Slip) -> None:
+        print(f"row {slip.index}: {slip.error}", file=sys.stderr)
+
+    started = time.perf_counter()
+    slips = iter_slips(iter_rows(args.input, args.format), workers)
+    if args.out:
+        stats = write_pdf_sheets(slips, args.out, layout, report)
+    else:
+        stats = write_png_sheets(slips, args.png_dir, layout, args.dpi, report, args.font)
+    elapsed = time.perf_counter() - started
+    print(f"{stats['codes']} codes on {stats['pages']} pages in {elapsed:.2f}s, "
+          f"{stats['failed']} failed -> {args.out or args.png_dir}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
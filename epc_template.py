@@ -0,0 +1,162 @@
+# Precompiled render templates for fixed-payee, variable-amount runs
+# A PayeeTemplate is built once per payee (e.g. from a PayeeStore entry). It
+# keeps the normalized header lines (BCD ... IBAN), their QR data segments and
+# the encoder settings, so per code only the amount/reference lines are
+# formatted and segmented before the matrix is generated.
+#
+# Matrix generation reuses a per-version symbol layout (function patterns and
+# the data module walk), so choosing the mask no longer re-runs qrcode's
+# makeImpl/map_data eight times. The result is module-for-module the same
+# symbol make_qr() produces for the same payload.
+# Benchmark: python benchmarks/bench_template.py
+
+from typing import TYPE_CHECKING, Optional
+
+from epc_amount import Amount
+from epc_core import (
+    AUTO_CHARSET, EPC_CHARSETS, EpcFields, encode_payload, epc_header_lines, epc_transfer_lines,
+    iter_epc_errors, render_qr,
+)
+from epc_trace import traced
+
+if TYPE_CHECKING:
+    import qrcode
+
+HEADER_FIELDS = ("name", "iban", "bic", "charset")
+SEGMENT_MINIMUM = 20  # same as qrcode's add_data() default
+
+
+def _blank_modules(version: int, error_correction: int, test: bool, mask: int) -> list:
+    # qrcode's makeImpl() without the data: function patterns + format/version info
+    import qrcode
+
+    qr = qrcode.QRCode(version=version, error_correction=error_correction)
+    n = qr.modules_count = version * 4 + 17
+    qr.modules = [[None] * n for _ in range(n)]
+    qr.setup_position_probe_pattern(0, 0)
+    qr.setup_position_probe_pattern(n - 7, 0)
+    qr.setup_position_probe_pattern(0, n - 7)
+    qr.setup_position_adjust_pattern()
+    qr.setup_timing_pattern()
+    qr.setup_type_info(test, mask)
+    if version >= 7:
+        qr.setup_type_number(test)
+    return qr.modules
+
+
+class SymbolLayout:
+    # Everything about a (version, ECC level) symbol that does not depend on the data.
+    def __init__(self, version: int, error_correction: int):
+        from qrcode import util
+
+        self.version = version
+        self.error_correction = error_correction
+        self.test_blank = _blank_modules(version, error_correction, True, 0)
+        self._final_blanks: dict = {}
+        # data module positions in placement order (the zig-zag walk of map_data)
+        n = len(self.test_blank)
+        cells = []
+        up = True
+        for col in range(n - 1, 0, -2):
+            if col <= 6:
+                col -= 1
+            for row in (range(n - 1, -1, -1) if up else range(n)):
+                for c in (col, col - 1):
+                    if self.test_blank[row][c] is None:
+                        cells.append((row, c))
+            up = not up
+        self.cells = cells
+        self.masks = [[int(mask_func(r, c)) for r, c in cells] for mask_func in map(util.mask_func, range(8))]
+
+    def final_blank(self, mask: int) -> list:
+        blank = self._final_blanks.get(mask)
+        if blank is None:
+            blank = self._final_blanks[mask] = _blank_modules(self.version, self.error_correction, False, mask)
+        return blank
+
+    def place(self, blank: list, bits: list, mask: int) -> list:
+        modules = [row[:] for row in blank]
+        for (r, c), bit, flip in zip(self.cells, bits, self.masks[mask]):
+            modules[r][c] = bit != flip
+        return modules
+
+
+class PayeeTemplate:
+    def __init__(self, name: str, iban: str, bic: Optional[str] = None,
+                 version: str = "002", charset: str = "1", ecc: str = "M"):
+        from qrcode import util
+        from epc_optimize import ecc_constants
+
+        if charset == AUTO_CHARSET:
+            # the header segments are encoded once, so the set cannot depend on the amount lines
+            raise ValueError("PayeeTemplate needs a fixed charset, not 'auto'")
+        self.codec = EPC_CHARSETS.get(charset, "utf-8")  # unknown sets: see header_errors()
+        self.fields = EpcFields(name=name, iban=iban, bic=bic, version=version, charset=charset)
+        self.header = "\n".join(epc_header_lines(name, iban, bic, version, charset)) + "\n"
+        self.ecc = ecc
+        self._error_correction = ecc_constants()[ecc]
+        segments = list(util.optimal_data_chunks(self.header.encode(self.codec), SEGMENT_MINIMUM))
+        # A trailing byte-mode chunk would merge with the first variable line,
+        # so it is carried over and re-segmented together with the tail; the
+        # segments then match what add_data() makes of the full payload.
+        self._carry = b""
+        if segments and segments[-1].mode == util.MODE_8BIT_BYTE:
+            self._carry = segments.pop().data
+        self._header_segments = segments
+        self._chunks = util.optimal_data_chunks
+        self._layouts: dict = {}
+
+    @classmethod
+    def from_payee(cls, payee: dict, **kwargs) -> "PayeeTemplate":
+        return cls(payee.get("name", ""), payee.get("iban", ""), payee.get("bic") or None, **kwargs)
+
+    def header_errors(self) -> list:
+        # (field, i18n key) problems of the payee part; check once per template
+        probe = EpcFields(**{**vars(self.fields), "amount_eur": "1"})
+        return [(f, k) for f, k in iter_epc_errors(probe) if f in HEADER_FIELDS]
+
+    @traced("payload", lambda result, *args, **kwargs: {"bytes": len(encode_payload(result, "replace"))})
+    def payload(self, amount_eur: Optional[Amount], purpose_code: Optional[str] = None,
+                remittance_ref: Optional[str] = None, remittance_text: Optional[str] = None,
+                info: Optional[str] = None, amount_cents: Optional[int] = None) -> str:
+        # Same result as build_epc_payload with this payee's fields.
+        return self.header + "\n".join(
+            epc_transfer_lines(amount_eur, purpose_code, remittance_ref, remittance_text, info, amount_cents))
+
+    @traced("matrix", lambda result, *args, **kwargs: {"version": result.version})
+    def make_qr(self, amount_eur: Optional[Amount], purpose_code: Optional[str] = None,
+                remittance_ref: Optional[str] = None, remittance_text: Optional[str] = None,
+                info: Optional[str] = None, amount_cents: Optional[int] = None) -> "qrcode.QRCode":
+        import qrcode
+        from qrcode import util
+
+        tail = "\n".join(
+            epc_transfer_lines(amount_eur, purpose_code, remittance_ref, remittance_text, info, amount_cents))
+        qr = qrcode.QRCode(error_correction=self._error_correction)
+        qr.data_list = self._header_segments + list(
+            self._chunks(self._carry + tail.encode(self.codec), SEGMENT_MINIMUM))
+        version = qr.best_fit()
+        layout = self._layouts.get(version)
+        if layout is None:
+            layout = self._layouts[version] = SymbolLayout(version, self._error_correction)
+
+        data = util.create_data(version, self._error_correction, qr.data_list)
+        bits = [(byte >> shift) & 1 for byte in data for shift in (7, 6, 5, 4, 3, 2, 1, 0)]
+        bits.extend([0] * (len(layout.cells) - len(bits)))
+        # same selection as QRCode.best_mask_pattern(): lowest penalty, first wins
+        best_mask, best_lost = 0, None
+        for mask in range(8):
+            lost = util.lost_point(layout.place(layout.test_blank, bits, mask))
+            if best_lost is None or lost < best_lost:
+                best_mask, best_lost = mask, lost
+
+        qr.modules = layout.place(layout.final_blank(best_mask), bits, best_mask)
+        qr.modules_count = len(qr.modules)
+        qr.data_cache = data
+        return qr
+
+    def render(self, amount_eur: Optional[Amount], purpose_code: Optional[str] = None,
+               remittance_ref: Optional[str] = None, remittance_text: Optional[str] = None,
+               info: Optional[str] = None, fmt: str = "png", amount_cents: Optional[int] = None) -> bytes:
+        return render_qr(
+            self.make_qr(amount_eur, purpose_code, remittance_ref, remittance_text, info, amount_cents), fmt)
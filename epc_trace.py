@@ -0,0 +1,172 @@
+# Instrumentation hooks for the render hot path
+# Core stages emit one event each:
+#   validate  validate_epc()              ok = input valid, error = i18n key
+#   payload   build_epc_payload()         bytes
+#   matrix    make_qr() (QR encode)       version
+#   encode    render_qr() (PNG/SVG/PDF)   format, bytes
+#   write     save_bytes()                bytes
+# and the GUI, batch and HTTP paths emit one "item" event per code with the
+# total latency, the outcome and the summed stage times ("stages").
+#
+# With no hook registered `active` is False and every traced call costs one
+# global lookup. Hooks get a dict and must be quick and must not raise
+# (exceptions are swallowed so telemetry never breaks a render).
+#
+#   import epc_trace
+#   epc_trace.add_hook(epc_trace.JsonLinesLogger("render.jsonl"))
+#   counters = epc_trace.add_hook(epc_trace.StageCounters())
+
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Iterable, Optional, Union
+import inspect
+import json
+import threading
+import time
+
+active = False
+_hooks: tuple = ()
+_lock = threading.Lock()
+
+
+def add_hook(hook: Callable[[dict], None]) -> Callable[[dict], None]:
+    global active, _hooks
+    with _lock:
+        _hooks = _hooks + (hook,)
+        active = True
+    return hook
+
+
+def remove_hook(hook: Callable[[dict], None]) -> None:
+    global active, _hooks
+    with _lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+        active = bool(_hooks)
+
+
+def emit(stage: str, seconds: float, **fields) -> None:
+    event = {"stage": stage, "ms": round(seconds * 1000, 3)}
+    event.update(fields)
+    for hook in _hooks:
+        try:
+            hook(event)
+        except Exception:
+            pass
+
+
+def traced(stage: str, describe: Optional[Callable] = None):
+    # Decorator for a stage function. describe(result, *args, **kwargs)
+    # returns extra event fields (it may also override "ok"/"error"). The
+    # call's arguments arrive as keywords by parameter name with defaults
+    # filled in, so describe works the same however the stage was called.
+    # Like a hook, a describe that raises only costs the extra fields.
+    def decorate(fn):
+        signature = inspect.signature(fn) if describe is not None else None
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not active:
+                return fn(*args, **kwargs)
+            started = perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                emit(stage, perf_counter() - started, ok=False, error=str(e) or e.__class__.__name__)
+                raise
+            fields = {"ok": True}
+            if describe is not None:
+                try:
+                    bound = signature.bind(*args, **kwargs)
+                    bound.apply_defaults()
+                    fields.update(describe(result, **bound.arguments))
+                except Exception:
+                    pass
+            emit(stage, perf_counter() - started, **fields)
+            return result
+        return wrapper
+    return decorate
+
+
+# ------------------ Hooks ------------------
+class StageRecorder:
+    # Sums stage times of the item the current thread is working on, e.g.
+    # inside a batch worker process, so they can travel with the result.
+    def __init__(self):
+        self.local = threading.local()
+
+    def __call__(self, event: dict) -> None:
+        stages = getattr(self.local, "stages", None)
+        if stages is not None and event["stage"] != "item":
+            stages[event["stage"]] = round(stages.get(event["stage"], 0.0) + event["ms"], 3)
+
+    def start(self) -> None:
+        self.local.stages = {}
+
+    def stop(self) -> dict:
+        stages = getattr(self.local, "stages", None) or {}
+        self.local.stages = None
+        return stages
+
+
+_recorder: Optional[StageRecorder] = None
+
+
+def recorder() -> StageRecorder:
+    # the process-wide StageRecorder, registered on first use
+    global _recorder, _hooks, active
+    if _recorder is None:
+        with _lock:
+            if _recorder is None:  # registered here, under the lock add_hook takes
+                _hooks = _hooks + (StageRecorder(),)
+                active = True
+                _recorder = _hooks[-1]
+    return _recorder
+
+
+class StageCounters:
+    # count / errors / total and max latency per stage, for dashboards and tests
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages: dict = {}
+
+    def __call__(self, event: dict) -> None:
+        with self.lock:
+            st = self.stages.get(event["stage"])
+            if st is None:
+                st = self.stages[event["stage"]] = {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            st["count"] += 1
+            st["errors"] += not event.get("ok", True)
+            st["total_ms"] += event["ms"]
+            if event["ms"] > st["max_ms"]:
+                st["max_ms"] = event["ms"]
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {name: dict(st) for name, st in self.stages.items()}
+
+
+class JsonLinesLogger:
+    # One JSON object per line with a wall-clock "ts". Only "item" events by
+    # default; pass stages=None to log every stage event as well.
+    def __init__(self, target: Union[str, Path, object], stages: Optional[Iterable[str]] = ("item",)):
+        if isinstance(target, (str, Path)):
+            self.fh = open(target, "a", encoding="utf-8", buffering=1)
+            self._owns = True
+        else:
+            self.fh = target
+            self._owns = False
+        self.stages = None if stages is None else frozenset(stages)
+        self.lock = threading.Lock()
+
+    def __call__(self, event: dict) -> None:
+        if self.stages is not None and event["stage"] not in self.stages:
+            return
+        line = json.dumps({"ts": round(time.time(), 3), **event}, ensure_ascii=False, default=str)
+        with self.lock:
+            self.fh.write(line + "\n")
+
+    def close(self) -> None:
+        remove_hook(self)
+        if self._owns:
+            self.fh.close()
@@ -0,0 +1,388 @@
+# Decode-and-verify for rendered codes – proves every PNG decodes back to its payload
+# A small local QR decoder for the symbols this project writes (axis-aligned,
+# whole or fractional pixels per module, no rotation/perspective): it samples
+# the module grid, reads format info, unmasks, checks the Reed-Solomon
+# codewords and parses the data segments. Nothing beyond qrcode[pil].
+# Requirements:
+#   pip install qrcode[pil]
+# Run: python epc_verify.py ./qr_out --source payments.csv [--sample 0.05] [--workers 0] [--report mismatches.jsonl]
+#      python epc_verify.py ~/Documents/EPC_QR            (no source: checks each code against its filename)
+#
+# Batch runs can verify while rendering: epc_batch.py ... --verify-sample 1.0
+
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zlib
+
+from epc_core import BASE_OUT, decode_payload
+
+# mode indicator -> character count bits for versions 1-9, 10-26, 27-40
+COUNT_BITS = {1: (10, 12, 14), 2: (9, 11, 13), 4: (8, 16, 16)}
+ALNUM = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_DARK = bytes(1 if value < 128 else 0 for value in range(256))
+# png_filename(): the stamp is the date, or with epc_batch.py --stable-names
+# the first STAMP_LEN (10) hex digits of the payload hash
+FILENAME_RE = (r"^(?:(?P<prefix>.+?)_)?(?P<amount>NA|\d+\.\d\d)_(?P<iban>[^_]*)_"
+               r"(?:\d{4}-\d\d-\d\d|[0-9a-f]{10})(?:_\d+)?\.png$")
+
+
+class DecodeError(ValueError):
+    # .reason is a short machine-readable cause for the mismatch report:
+    # image, size, format, ecc, segment, charset
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+# ------------------ Decoder ------------------
+_layouts: dict = {}  # (version, ECC constant) -> epc_template.SymbolLayout
+
+
+def _layout(version: int, error_correction: int):
+    layout = _layouts.get((version, error_correction))
+    if layout is None:
+        from epc_template import SymbolLayout
+
+        layout = _layouts[(version, error_correction)] = SymbolLayout(version, error_correction)
+    return layout
+
+
+def _format_info(matrix: list) -> tuple[int, int]:
+    # (ECC constant, mask) whose 15-bit BCH word is closest to the copy next
+    # to the top-left finder; the code corrects up to 3 bit errors
+    from qrcode import util
+
+    n = len(matrix)
+    rows = [i if i < 6 else i + 1 if i < 8 else n - 15 + i for i in range(15)]
+    read = sum(1 << i for i, r in enumerate(rows) if matrix[r][8])
+    best, best_dist = None, 4
+    for error_correction in range(4):
+        for mask in range(8):
+            dist = bin(read ^ util.BCH_type_info((error_correction << 3) | mask)).count("1")
+            if dist < best_dist:
+                best, best_dist = (error_correction, mask), dist
+    if best is None:
+        raise DecodeError("format", "format information unreadable")
+    return best
+
+
+def _ec_codewords(data: list, ec_count: int) -> list:
+    # Reed-Solomon check bytes exactly as qrcode.util.create_bytes computes them
+    from qrcode import LUT, base
+
+    if ec_count in LUT.rsPoly_LUT:
+        rs_poly = base.Polynomial(LUT.rsPoly_LUT[ec_count], 0)
+    else:
+        rs_poly = base.Polynomial([1], 0)
+        for i in range(ec_count):
+            rs_poly = rs_poly * base.Polynomial([1, base.gexp(i)], 0)
+    mod = base.Polynomial(data, len(rs_poly) - 1) % rs_poly
+    offset = len(mod) - ec_count
+    return [mod[i + offset] if i + offset >= 0 else 0 for i in range(ec_count)]
+
+
+def _data_codewords(codewords: list, version: int, error_correction: int) -> list:
+    # de-interleaves the blocks, verifies their check bytes and returns the
+    # data codewords in order
+    from qrcode import base
+
+    blocks = base.rs_blocks(version, error_correction)
+    data = [[] for _ in blocks]
+    ec = [[] for _ in blocks]
+    pos = 0
+    for i in range(max(b.data_count for b in blocks)):
+        for k, block in enumerate(blocks):
+            if i < block.data_count:
+                data[k].append(codewords[pos])
+                pos += 1
+    for i in range(max(b.total_count - b.data_count for b in blocks)):
+        for k, block in enumerate(blocks):
+            if i < block.total_count - block.data_count:
+                ec[k].append(codewords[pos])
+                pos += 1
+    for k, block in enumerate(blocks):
+        if _ec_codewords(data[k], block.total_count - block.data_count) != ec[k]:
+            raise DecodeError("ecc", f"Reed-Solomon check failed in block {k + 1} of {len(blocks)}")
+    return [byte for block in data for byte in block]
+
+
+def _parse_segments(data: list, version: int) -> bytes:
+    bits = "".join(f"{byte:08b}" for byte in data)
+    size = 0 if version < 10 else 1 if version < 27 else 2
+    out = bytearray()
+    pos = 0
+
+    def take(count: int) -> int:
+        nonlocal pos
+        if pos + count > len(bits):
+            raise DecodeError("segment", "data ends inside a segment")
+        pos += count
+        return int(bits[pos - count:pos], 2)
+
+    while len(bits) - pos >= 4:
+        mode = take(4)
+        if mode == 0:  # terminator
+            break
+        if mode == 7:  # ECI designator; the payload bytes are compared as-is
+            take(8)
+            continue
+        if mode not in COUNT_BITS:
+            raise DecodeError("segment", f"unsupported segment mode {mode}")
+        count = take(COUNT_BITS[mode][size])
+        if mode == 1:
+            while count >= 3:
+                out += f"{take(10):03d}".encode("ascii")
+                count -= 3
+            if count:
+                out += f"{take(7 if count == 2 else 4):0{count}d}".encode("ascii")
+        elif mode == 2:
+            while count >= 2:
+                value = take(11)
+                out += (ALNUM[value // 45] + ALNUM[value % 45]).encode("ascii")
+                count -= 2
+            if count:
+                out += ALNUM[take(6)].encode("ascii")
+        else:
+            out += bytes(take(8) for _ in range(count))
+    return bytes(out)
+
+
+def decode_matrix(matrix: list) -> bytes:
+    # Module matrix (rows of bools, no quiet zone) -> data bytes. Raises DecodeError.
+    n = len(matrix)
+    if n < 21 or (n - 17) % 4 or any(len(row) != n for row in matrix):
+        raise DecodeError("size", f"{n} modules is not a QR symbol size")
+    version = (n - 17) // 4
+    error_correction, mask = _format_info(matrix)
+    layout = _layout(version, error_correction)
+    bits = [matrix[r][c] != flip for (r, c), flip in zip(layout.cells, layout.masks[mask])]
+    from qrcode import base
+
+    total = sum(b.total_count for b in base.rs_blocks(version, error_correction))
+    codewords = [int("".join("1" if b else "0" for b in bits[i:i + 8]), 2) for i in range(0, total * 8, 8)]
+    return _parse_segments(_data_codewords(codewords, version, error_correction), version)
+
+
+def read_matrix(path: Path) -> list:
+    # Samples the module grid of a rendered code. The top-left finder pattern
+    # (7 modules wide) gives the module size, the top-right one the symbol width.
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            img = img.convert("L")
+            width, height = img.size
+            pixels = img.tobytes()
+    except Exception as e:
+        raise DecodeError("image", f"cannot read image: {e}")
+    dark = pixels.translate(_DARK)  # 1 = dark pixel
+    first = dark.find(1)
+    if first < 0:
+        raise DecodeError("image", "no dark pixels")
+    top, left = divmod(first, width)
+    right = dark.rfind(1, top * width, (top + 1) * width) - top * width
+    end = dark.find(0, first, (top + 1) * width)
+    module = ((end if end >= 0 else (top + 1) * width) - first) / 7
+    n = round((right - left + 1) / module)
+    if n < 21 or (n - 17) % 4 or top + n * module > height + 1:
+        raise DecodeError("size", "no QR symbol found")
+    module = (right - left + 1) / n
+    centers = [int((i + 0.5) * module) for i in range(n)]
+    return [[dark[(top + y) * width + left + x] == 1 for x in centers] for y in centers]
+
+
+def decode_png(path: Path) -> bytes:
+    return decode_matrix(read_matrix(path))
+
+
+# ------------------ Verification ------------------
+class VerifyResult(NamedTuple):
+    path: Path
+    ok: bool
+    reason: str = ""  # DecodeError reason, "mismatch", "filename", "worker" or "missing_source"
+    message: str = ""
+    decoded: Optional[str] = None
+
+
+def verify_file(path: Path, expected: Optional[str] = None) -> VerifyResult:
+    # Compares the decoded payload with expected; without one the code is
+    # checked against its own filename (amount and IBAN digits). Never raises.
+    try:
+        data = decode_png(path)
+        try:
+            decoded = decode_payload(data)  # in the character set the payload names
+        except UnicodeDecodeError as e:
+            raise DecodeError("charset", f"not valid {e.encoding}: {e}")
+    except DecodeError as e:
+        return VerifyResult(path, False, e.reason, str(e))
+    except Exception as e:
+        return VerifyResult(path, False, "image", str(e) or e.__class__.__name__)
+    if expected is not None:
+        if decoded != expected:
+            return VerifyResult(path, False, "mismatch", _first_difference(expected, decoded), decoded)
+        return VerifyResult(path, True, decoded=decoded)
+    problem = _filename_problem(path.name, decoded)
+    if problem:
+        return VerifyResult(path, False, "filename", problem, decoded)
+    return VerifyResult(path, True, decoded=decoded)
+
+
+def _first_difference(expected: str, decoded: str) -> str:
+    want, got = expected.split("\n"), decoded.split("\n")
+    for i in range(max(len(want), len(got))):
+        a = want[i] if i < len(want) else None
+        b = got[i] if i < len(got) else None
+        if a != b:
+            return f"line {i + 1}: expected {a!r}, decoded {b!r}"
+    return "payloads differ"
+
+
+def _filename_problem(name: str, decoded: str) -> str:
+    # png_filename() parts vs. the decoded EPC lines (7 = IBAN, 8 = amount)
+    m = re.match(FILENAME_RE, name)
+    lines = decoded.split("\n")
+    if lines[0] != "BCD" or len(lines) < 8:
+        return "not an EPC payload"
+    if m is None:
+        return ""  # not a generated name, nothing to compare
+    amount = lines[7][3:] if len(lines) > 7 and lines[7].startswith("EUR") else ""
+    if m["amount"] != "NA" and m["amount"] != amount:
+        return f"filename amount {m['amount']} but code says {amount or 'none'}"
+    digits = "".join(ch for ch in lines[6] if ch.isdigit())
+    if m["iban"] and not (digits[-10:] == m["iban"] or lines[6].endswith(m["iban"])):
+        return f"filename IBAN digits {m['iban']} but code has IBAN {lines[6]}"
+    return ""
+
+
+def sampled(key: str, rate: float, seed: int = 0) -> bool:
+    # Deterministic sample: the same key is always in or out for a given
+    # rate and seed, so a re-run checks the same files.
+    if rate >= 1.0:
+        return True
+    return zlib.crc32(f"{seed}:{key}".encode("utf-8")) < rate * 2 ** 32
+
+
+def file_prefix(name: str) -> str:
+    # "<id or row number>" of a batch output file "<prefix>_<amount>_...";
+    # the id itself may contain "_"
+    m = re.match(FILENAME_RE, name)
+    if m is None:
+        return name.split("_", 1)[0]
+    return m["prefix"] or ""
+
+
+def verify_chunk(chunk: list) -> list:
+    # Worker entry point: list of (path, expected payload or None).
+    return [verify_file(path, expected) for path, expected in chunk]
+
+
+def iter_verify(jobs: Iterable[tuple[Path, Optional[str]]], workers: int = 1,
+                chunk_size: int = 64) -> Iterator[VerifyResult]:
+    # Results in input order; with workers > 1 through the same bounded
+    # process-pool window as epc_batch.iter_results. The files of a chunk
+    # whose worker died are reported as failed, the run goes on.
+    if workers <= 1:
+        for path, expected in jobs:
+            yield verify_file(path, expected)
+        return
+    from epc_batch import iter_chunk_results
+
+    yield from iter_chunk_results(jobs, verify_chunk, (),
+                                  lambda path, err: VerifyResult(path, False, "worker", err), workers, chunk_size)
+
+
+def source_payloads(source: Path, prefixes: set) -> dict:
+    # file_prefix of the row's batch output file (row id or zero-padded row
+    # number) -> payload, only for the wanted prefixes; a row that no longer
+    # gives a payload maps to its ValueError
+    from epc_batch import iter_rows, row_filename, row_to_fields
+
+    out = {}
+    for index, row in enumerate(iter_rows(source), start=1):
+        fields = row_to_fields(row)
+        prefix = file_prefix(row_filename(index, row, fields))
+        if prefix in prefixes:
+            try:
+                out[prefix] = fields.payload()
+            except ValueError as e:
+                out[prefix] = e
+    return out
+
+
+def verify_dir(out_dir: Path, report, source: Optional[Path] = None, sample: float = 1.0,
+               seed: int = 0, workers: int = 1) -> dict:
+    # Writes one JSON line per failed file to report (plus a final summary
+    # record) and returns the summary.
+    started = time.perf_counter()
+    files = sorted(out_dir.glob("*.png"))
+    key = file_prefix if source is not None else (lambda name: name)
+    chosen = [p for p in files if sampled(key(p.name), sample, seed)]
+    expected = source_payloads(source, {file_prefix(p.name) for p in chosen}) if source else {}
+    jobs, unmatched = [], 0
+    for path in chosen:
+        if source is not None and file_prefix(path.name) not in expected:
+            unmatched += 1
+            report.write(json.dumps({"type": "mismatch", "path": str(path), "reason": "missing_source",
+                                     "message": "no source row for this file"}, ensure_ascii=False) + "\n")
+            continue
+        payload = expected.get(file_prefix(path.name)) if source else None
+        if isinstance(payload, ValueError):
+            unmatched += 1
+            report.write(json.dumps({"type": "mismatch", "path": str(path), "reason": "bad_source",
+                                     "message": f"source row has no valid payload: {payload}"},
+                                    ensure_ascii=False) + "\n")
+            continue
+        jobs.append((path, payload))
+    checked = failed = 0
+    for res in iter_verify(jobs, workers):
+        checked += 1
+        if not res.ok:
+            failed += 1
+            report.write(json.dumps({"type": "mismatch", "path": str(res.path), "reason": res.reason,
+                                     "message": res.message, "decoded": res.decoded},
+                                    ensure_ascii=False) + "\n")
+    summary = {"type": "summary", "files": len(files), "checked": checked, "ok": checked - failed,
+               "mismatches": failed + unmatched, "sample": sample,
+               "seconds": round(time.perf_counter() - started, 3)}
+    report.write(json.dumps(summary) + "\n")
+    return summary
+
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Decode rendered EPC QR codes and compare them with their payloads.")
+    ap.add_argument("out_dir", type=Path, nargs="?", default=BASE_OUT,
+                    help=f"folder with the PNG files (default: {BASE_OUT})")
+    ap.add_argument("--source", type=Path, help="the CSV/JSONL the batch was rendered from")
+    ap.add_argument("--sample", type=float, default=1.0,
+                    help="fraction of files to decode, e.g. 0.05 (default: 1.0 = all)")
+    ap.add_argument("--seed", type=int, default=0, help="picks a different sample")
+    ap.add_argument("--workers", type=int, default=1, help="decoder processes (0 = one per CPU core)")
+    ap.add_argument("--report", type=Path, help="write the JSON-lines mismatch report here instead of stdout")
+    args = ap.parse_args(argv)
+
+    if not args.out_dir.is_dir():
+        print(f"not a folder: {args.out_dir}", file=sys.stderr)
+        return 2
+    if not 0.0 < args.sample <= 1.0:
+        print("--sample must be in (0, 1]", file=sys.stderr)
+        return 2
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    out = open(args.report, "w", encoding="utf-8") if args.report else sys.stdout
+    try:
+        summary = verify_dir(args.out_dir, out, args.source, args.sample, args.seed, workers)
+    finally:
+        if args.report:
+            out.close()
+    print(f"Verified {summary['checked']} of {summary['files']} codes in {summary['seconds']:.2f}s, "
+          f"{summary['mismatches']} mismatches", file=sys.stderr)
+    return 1 if summary["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
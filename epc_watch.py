@@ -0,0 +1,282 @@
+# EPC (SEPA) QR watch-folder daemon – headless, no Qt import
+# Renders every CSV/JSONL payment file dropped into a folder, e.g. an ERP
+# export share. Each drop gets its own output folder <out>/<file name>_<mtime>/
+# with the epc_batch.py filenames and a resume manifest; when it is done the input
+# moves to <in>/processed/ (or <in>/failed/ if it could not be read at all).
+# Requirements:
+#   pip install qrcode[pil]
+# Run: python epc_watch.py ./incoming --out ./qr_out [--lanes 2] [--workers 1] [--poll]
+#
+# New files are seen through inotify on Linux (a file counts once it is closed
+# or moved in) and by polling elsewhere, or with --poll (network shares do not
+# deliver inotify events for writes from other machines): a file counts once
+# its size and mtime stay the same for --settle seconds.
+# Files are queued smallest first and --lanes files are rendered at a time, so
+# a small drop does not wait behind a large one. Rows are streamed, memory does
+# not grow with file size. Killing the daemon is safe: on restart, files still
+# in the folder are picked up again and finished rows are skipped (manifest).
+
+from dataclasses import replace
+from pathlib import Path
+from typing import Optional
+import argparse
+import ctypes
+import ctypes.util
+import itertools
+import os
+import queue
+import select
+import shutil
+import signal
+import struct
+import sys
+import threading
+import time
+
+from epc_batch import BatchOptions, run_batch
+from epc_core import BASE_OUT
+from epc_manifest import Manifest
+
+INPUT_SUFFIXES = (".csv", ".tsv", ".txt", ".jsonl", ".ndjson", ".json")
+PROCESSED_DIR = "processed"
+FAILED_DIR = "failed"
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def is_input(name: str) -> bool:
+    # skips hidden and temporary files (".~lock", "~$x.csv", "x.csv.part")
+    return not name.startswith((".", "~")) and name.lower().endswith(INPUT_SUFFIXES)
+
+
+# ------------------ Watchers ------------------
+# Both return the names of files that are complete, each name once per write.
+class InotifyWatcher:
+    IN_CLOSE_WRITE = 0x08
+    IN_MOVED_TO = 0x80
+    EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float) -> list:
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        names, pos = [], 0
+        while pos < len(data):
+            _, _, _, length = self.EVENT.unpack_from(data, pos)
+            pos += self.EVENT.size
+            name = data[pos:pos + length].rstrip(b"\0")
+            pos += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollWatcher:
+    def __init__(self, directory: Path, interval: float = 2.0, settle: float = 2.0):
+        self.directory = directory
+        self.interval = interval
+        self.settle = settle
+        self.seen: dict = {}  # name -> (size, mtime_ns, first seen like this, reported)
+
+    def wait(self, timeout: float) -> list:
+        time.sleep(min(timeout, self.interval))
+        now = time.monotonic()
+        ready, current = [], {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                sig = (st.st_size, st.st_mtime_ns)
+                old = self.seen.get(entry.name)
+                if old is not None and old[:2] == sig:
+                    current[entry.name] = old
+                    if not old[3] and now - old[2] >= self.settle:
+                        current[entry.name] = (*sig, old[2], True)
+                        ready.append(entry.name)
+                else:
+                    current[entry.name] = (*sig, now, False)
+        self.seen = current  # files that went away are forgotten
+        return ready
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(directory: Path, poll: bool, interval: float, settle: float):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:  # no inotify (e.g. some containers)
+            print(f"inotify unavailable ({e}), polling every {interval:g}s", file=sys.stderr)
+    return PollWatcher(directory, interval, settle)
+
+
+# ------------------ Work queue ------------------
+def drop_folder(path: Path) -> str:
+    # "<file name>_<mtime>": a.csv and a.jsonl, or the same name dropped again
+    # later, never share an output folder and manifest; a file left over from
+    # a killed run keeps its mtime, so a restart resumes in the same folder
+    mtime_ns = path.stat().st_mtime_ns
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(mtime_ns // 10 ** 9))
+    return f"{path.name}_{stamp}.{mtime_ns // 10 ** 6 % 1000:03d}"
+
+
+
+class WatchDaemon:
+    # Queues complete input files (smallest first) and renders them on
+    # `lanes` threads, each with its own epc_batch run and manifest.
+    def __init__(self, in_dir: Path, opts: BatchOptions, lanes: int = 2, workers: int = 1,
+                 chunk_size: int = 64):
+        self.in_dir = in_dir
+        self.opts = opts
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.queue: queue.PriorityQueue = queue.PriorityQueue()
+        self.queued: set = set()  # names waiting or being rendered
+        self.lock = threading.Lock()
+        self.order = itertools.count()  # keeps equal sizes first in, first out
+        self.stop = threading.Event()
+        self.lanes = [threading.Thread(target=self._lane, name=f"lane-{i + 1}", daemon=True)
+                      for i in range(max(1, lanes))]
+
+    def start(self) -> None:
+        for lane in self.lanes:
+            lane.start()
+
+    def submit(self, name: str) -> bool:
+        path = self.in_dir / name
+        if not is_input(name):
+            return False
+        try:
+            size = path.stat().st_size
+        except OSError:  # gone again (moved on by someone else)
+            return False
+        with self.lock:
+            if name in self.queued:
+                return False
+            self.queued.add(name)
+        self.queue.put((size, next(self.order), name))
+        return True
+
+    def scan(self) -> int:
+        # files already there at startup (or left over from a killed run)
+        names = sorted(entry.name for entry in os.scandir(self.in_dir) if entry.is_file())
+        return sum(self.submit(name) for name in names)
+
+    def _lane(self) -> None:
+        while not self.stop.is_set():
+            try:
+                _, _, name = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.process(name)
+            finally:
+                with self.lock:
+                    self.queued.discard(name)
+
+    def process(self, name: str) -> Optional[dict]:
+        path = self.in_dir / name
+        try:
+            out_dir = self.opts.out_dir / drop_folder(path)
+        except OSError:  # gone again
+            return None
+        out_dir.mkdir(parents=True, exist_ok=True)
+        manifest = Manifest(out_dir / MANIFEST_NAME)
+        try:
+            stats = run_batch(path, replace(self.opts, out_dir=out_dir), None, self.workers,
+                              self.chunk_size, manifest=manifest)
+        except Exception as e:  # unreadable file, not a row problem
+            print(f"{name}: {e}", file=sys.stderr)
+            self._move(path, FAILED_DIR)
+            return None
+        finally:
+            manifest.close()
+        self._move(path, PROCESSED_DIR)
+        print(f"{name}: {stats['ok']} rendered, {stats['failed']} failed, {stats['skipped']} already done, "
+              f"{stats['duplicates']} repeated in {stats['seconds']:.2f}s -> {out_dir}", flush=True)
+        return stats
+
+    def _move(self, path: Path, folder: str) -> None:
+        target_dir = self.in_dir / folder
+        target_dir.mkdir(exist_ok=True)
+        target = target_dir / path.name
+        if target.exists():  # same name dropped again: keep both
+            target = target_dir / f"{path.stem}_{time.strftime('%Y%m%d-%H%M%S')}{path.suffix}"
+        try:
+            shutil.move(str(path), str(target))
+        except OSError as e:
+            print(f"{path.name}: could not move to {folder}/ ({e})", file=sys.stderr)
+
+    def idle(self) -> bool:
+        with self.lock:
+            return not self.queued
+
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Watch a folder and render EPC QR PNGs for every payment file.")
+    ap.add_argument("input_dir", type=Path, help="folder the CSV/JSONL files are dropped into")
+    ap.add_argument("--out", type=Path, default=BASE_OUT,
+                    help=f"output folder, one subfolder per input file (default: {BASE_OUT})")
+    ap.add_argument("--lanes", type=int, default=2, help="input files rendered at the same time (default: 2)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="render processes per lane; 1 = in-process, 0 = one per CPU core (default: 1)")
+    ap.add_argument("--chunk-size", type=int, default=64, help="rows handed to a worker at a time (default: 64)")
+    ap.add_argument("--optimize", action="store_true",
+                    help="pick the smallest QR version over all ECC levels and segment encodings")
+    ap.add_argument("--poll", action="store_true", help="poll instead of inotify (network shares)")
+    ap.add_argument("--interval", type=float, default=2.0, help="poll interval in seconds (default: 2)")
+    ap.add_argument("--settle", type=float, default=2.0,
+                    help="with polling: seconds a file must stay unchanged before it is read (default: 2)")
+    ap.add_argument("--once", action="store_true", help="render the files present now, then exit")
+    args = ap.parse_args(argv)
+
+    if not args.input_dir.is_dir():
+        print(f"{args.input_dir} is not a folder", file=sys.stderr)
+        return 2
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    daemon = WatchDaemon(args.input_dir, BatchOptions(args.out, optimize=args.optimize), args.lanes, workers,
+                         max(1, args.chunk_size))
+    # watch before the first scan so nothing dropped in between is missed
+    watcher = None if args.once else make_watcher(args.input_dir, args.poll, args.interval, args.settle)
+    daemon.start()
+    # the poller reports files already there itself, once they are settled
+    queued = 0 if isinstance(watcher, PollWatcher) else daemon.scan()
+    print(f"Watching {args.input_dir} -> {args.out} ({queued} files queued, "
+          f"{type(watcher).__name__ if watcher else 'once'}); Ctrl+C to stop", file=sys.stderr)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop.set())
+    try:
+        while not daemon.stop.is_set():
+            if watcher is None:
+                if daemon.idle():
+                    break
+                time.sleep(0.2)
+                continue
+            for name in watcher.wait(1.0):
+                daemon.submit(name)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop.set()
+        if watcher is not None:
+            watcher.close()
+    # a file cut off here is finished from its manifest on the next start
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+# The modules are flat files in the repository root, not an installed package.
+# Run: python -m pytest -q
+
+from pathlib import Path
+import json
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PAYMENT = {"id": "a1", "name": "Stadtwerke", "iban": "DE89370400440532013000", "amount": "12.30"}
+
+
+@pytest.fixture
+def payment() -> dict:
+    # one valid batch row (a fresh copy per test)
+    return dict(PAYMENT)
+
+
+@pytest.fixture
+def write_rows(tmp_path):
+    # write_rows(name, rows) -> a JSONL input file in tmp_path
+    def write(name: str, rows: list) -> Path:
+        path = tmp_path / name
+        path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+        return path
+    return write
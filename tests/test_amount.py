@@ -0,0 +1,51 @@
+# Amount units: amount_eur is always euros, whatever its type and however it
+# reached EpcFields; cents only ever come from amount_cents.
+
+import pytest
+
+from epc_amount import AmountError, check_cents, optional_cents, parse_cents
+from epc_async import item_payload
+from epc_batch import row_to_fields
+from epc_core import EpcFields, iter_epc_errors, png_filename
+from epc_template import PayeeTemplate
+
+PAYEE = {"name": "Stadtwerke", "iban": "DE89370400440532013000"}
+
+
+def amount_line(payload: str) -> str:
+    return payload.split("\n")[7]
+
+
+def test_int_euros_match_their_string_form():
+    assert parse_cents(12) == parse_cents("12") == 1200
+    direct = item_payload(EpcFields(**PAYEE, amount_eur=12))
+    via_row = item_payload({**PAYEE, "amount": 12})
+    assert amount_line(direct) == amount_line(via_row) == "EUR12.00"
+
+
+def test_amount_cents_on_every_path():
+    fields = EpcFields(**PAYEE, amount_cents=1234)
+    assert amount_line(fields.payload()) == "EUR12.34"
+    assert row_to_fields({**PAYEE, "amount_cents": 1234}).payload() == fields.payload()
+    assert row_to_fields({**PAYEE, "cents": "1234"}).payload() == fields.payload()
+    assert PayeeTemplate(**PAYEE).payload(None, amount_cents=1234) == fields.payload()
+    assert png_filename(None, PAYEE["iban"], amount_cents=1234).startswith("12.34_")
+
+
+def test_euros_and_cents_together_are_rejected():
+    with pytest.raises(AmountError) as err:
+        optional_cents("12.34", 1234)
+    assert err.value.key == "err_amount_both"
+    errors = list(iter_epc_errors(EpcFields(**PAYEE, amount_eur="12.34", amount_cents=1234)))
+    assert errors == [("amount_eur", "err_amount_both")]
+
+
+@pytest.mark.parametrize("value, key", [
+    (0, "err_amount_pos"), (-5, "err_amount_pos"), ("12.34", "err_amount_pos"), (True, "err_amount_pos"),
+    (10 ** 11, "err_amount_max"),
+])
+def test_check_cents_rejects(value, key):
+    with pytest.raises(AmountError) as err:
+        check_cents(value)
+    assert err.value.key == key
+    assert list(iter_epc_errors(EpcFields(**PAYEE, amount_cents=value))) == [("amount_cents", key)]
@@ -0,0 +1,57 @@
+# Render cache: hardlinked outputs must never let a later write reach the
+# cache entry, and the LRU bookkeeping must follow actual use.
+
+from pathlib import Path
+import os
+import time
+
+from epc_batch import BatchOptions, row_to_fields, run_batch
+from epc_cache import RenderCache
+from epc_verify import decode_png
+
+
+def decoded_text(path: Path) -> str:
+    return decode_png(path).decode("utf-8").split("\n")[10]
+
+
+def test_plain_run_does_not_overwrite_cache_entry_through_hardlink(tmp_path, payment, write_rows):
+    out, cache_dir = tmp_path / "out", tmp_path / "cache"
+    rows_a = write_rows("a.jsonl", [dict(payment, text="Invoice A")])
+    rows_b = write_rows("b.jsonl", [dict(payment, text="Invoice B")])
+
+    run_batch(rows_a, BatchOptions(out, cache_dir=cache_dir))
+    run_batch(rows_b, BatchOptions(out))  # same output name, no cache
+    stats = run_batch(rows_a, BatchOptions(out, cache_dir=cache_dir))
+
+    assert stats["cache_hits"] == 1
+    (output,) = out.glob("*.png")
+    (entry,) = cache_dir.glob("*/*.png")
+    assert decoded_text(output) == "Invoice A"
+    assert decoded_text(entry) == "Invoice A"
+
+
+def test_memory_hit_refreshes_mtime_for_eviction(tmp_path):
+    cache = RenderCache(tmp_path)
+    path = cache.put("ab" * 32, b"png")
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    assert cache.get("ab" * 32) == b"png"
+    assert cache.memory_hits == 1
+    assert path.stat().st_mtime > old + 60
+
+
+def test_put_same_key_counts_bytes_once(tmp_path):
+    cache = RenderCache(tmp_path)
+    cache.put("cd" * 32, b"x" * 100)
+    cache.put("cd" * 32, b"x" * 120)
+    assert cache.disk_bytes == 120
+    assert cache.disk_bytes == RenderCache(tmp_path).disk_bytes
+
+
+def test_render_png_hit_matches_fresh_render(tmp_path, payment):
+    cache = RenderCache(tmp_path / "cache")
+    payload = row_to_fields(payment).payload()
+    first, hit1 = cache.render_png(payload, tmp_path / "1.png")
+    second, hit2 = cache.render_png(payload, tmp_path / "2.png")
+    assert (hit1, hit2) == (False, True)
+    assert first.read_bytes() == second.read_bytes()
@@ -0,0 +1,19 @@
+# Code packs: names stored in a pack must not steer --extract outside its folder.
+
+from epc_core import make_qr
+from epc_pack import PackWriter, main
+
+
+def test_extract_keeps_crafted_names_inside_folder(tmp_path):
+    pack = tmp_path / "codes.epcpack"
+    names = ["../escaped.png", str(tmp_path / "absolute.png"), "..", "ok_12.30.png", None]
+    with PackWriter(pack) as writer:
+        for i, name in enumerate(names):
+            payload = f"BCD\n002\n1\nSCT\n\nA\nDE89370400440532013000\nEUR{i + 1}.00\n\n\n"
+            meta = {"id": str(i)} if name is None else {"id": str(i), "name": name}
+            writer.add_qr(make_qr(payload), payload, meta)
+
+    out = tmp_path / "out"
+    assert main([str(pack), "--extract", str(out), "--format", "svg"]) == 1  # ".." is refused
+    assert sorted(p.name for p in out.iterdir()) == ["000004.svg", "absolute.svg", "escaped.svg", "ok_12.30.svg"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["codes.epcpack", "out"]
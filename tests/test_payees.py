@@ -0,0 +1,26 @@
+# Payee store: entries sharing a name are never dropped from the user's file.
+
+import json
+
+from epc_payees import PayeeStore
+
+
+def test_duplicate_names_survive_save(tmp_path):
+    path = tmp_path / "payees.json"
+    payees = [{"name": "Stadtwerke", "iban": "DE89370400440532013000"},
+              {"name": "Stadtwerke", "iban": "DE02120300000000202051"},
+              {"name": "Miete", "iban": "DE02500105170137075030"}]
+    path.write_text(json.dumps({"payees": payees}), encoding="utf-8")
+
+    store = PayeeStore(path)
+    assert store.list_names() == ["Stadtwerke", "Miete"]
+    assert store.get("Stadtwerke")["iban"] == "DE89370400440532013000"
+    assert [p["iban"] for p in store.duplicates] == ["DE02120300000000202051"]
+
+    store.upsert({"name": "Miete", "bic": "INGDDEFFXXX"})
+    assert len(json.loads(path.read_text(encoding="utf-8"))["payees"]) == 3
+
+    store.delete("Stadtwerke")  # the second one takes its place
+    assert store.get("Stadtwerke")["iban"] == "DE02120300000000202051"
+    assert store.find_by_iban("DE02 1203 0000 0000 2020 51") == [store.get("Stadtwerke")]
+    assert PayeeStore(path).duplicates == []
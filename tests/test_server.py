@@ -0,0 +1,101 @@
+# HTTP service: request bodies are only read with a valid Content-Length, and
+# HEAD answers like GET without a body.
+
+from http.client import HTTPConnection
+import json
+import threading
+
+import pytest
+
+from epc_server import MAX_BODY, make_server
+
+QUERY = "/qr?name=Stadtwerke&iban=DE89370400440532013000&amount=12.30"
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = make_server(port=0, workers=1, executor="thread", quiet=True)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    srv.render_pool.shutdown()
+
+
+def post(server, body: bytes, length=None):
+    # length: header value to send, None for none at all
+    conn = HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    conn.putrequest("POST", "/qr")
+    conn.putheader("Content-Type", "application/json")
+    if length is not None:
+        conn.putheader("Content-Length", length)
+    conn.endheaders(body)
+    resp = conn.getresponse()
+    result = resp.status, resp.getheader("Content-Type"), resp.read()
+    conn.close()
+    return result
+
+
+def test_post_renders(server, payment):
+    body = json.dumps(payment).encode()
+    status, ctype, data = post(server, body, str(len(body)))
+    assert (status, ctype) == (200, "image/png")
+    assert data.startswith(b"\x89PNG")
+
+
+@pytest.mark.parametrize("length, status, key", [
+    (None, 411, "length_required"),
+    ("abc", 400, "bad_length"),
+    ("-5", 400, "bad_length"),
+    ("1e3", 400, "bad_length"),
+    (str(MAX_BODY + 1), 413, "too_large"),
+])
+def test_post_rejects_bad_content_length(server, payment, length, status, key):
+    body = json.dumps(payment).encode()
+    got, ctype, data = post(server, body, length)
+    assert got == status
+    assert ctype.startswith("application/json")
+    assert json.loads(data)["error"] == key
+
+
+def test_head_matches_get_without_body(server):
+    query = QUERY
+    conn = HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    conn.request("GET", query)
+    get = conn.getresponse()
+    get_body = get.read()
+    conn.close()
+    conn = HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    conn.request("HEAD", query)
+    head = conn.getresponse()
+    assert head.status == get.status == 200
+    assert head.getheader("Content-Length") == str(len(get_body))
+    assert head.getheader("ETag") == get.getheader("ETag")
+    assert head.read() == b""
+    conn.close()
+
+
+def get_qr(server, if_none_match=None):
+    conn = HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    headers = {} if if_none_match is None else {"If-None-Match": if_none_match}
+    conn.request("GET", QUERY, headers=headers)
+    resp = conn.getresponse()
+    result = resp.status, dict(resp.getheaders()), resp.read()
+    conn.close()
+    return result
+
+
+@pytest.mark.parametrize("header", ["{etag}", 'W/{etag}', '"other", {etag}', "*"])
+def test_if_none_match_gives_bare_304(server, header):
+    etag = get_qr(server)[1]["ETag"]
+    status, headers, body = get_qr(server, header.format(etag=etag))
+    assert (status, body) == (304, b"")
+    assert headers["ETag"] == etag and "Cache-Control" in headers
+    assert "Content-Length" not in headers and "Content-Type" not in headers
+
+
+@pytest.mark.parametrize("header", ['"{tag}x"', '"x{tag}"', '{tag}', 'x"{tag}"', '"{tag}"x'])
+def test_if_none_match_compares_whole_tags(server, header):
+    tag = get_qr(server)[1]["ETag"].strip('"')
+    assert get_qr(server, header.format(tag=tag))[0] == 200
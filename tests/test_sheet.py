@@ -0,0 +1,42 @@
+# Print sheets: the --workers process-pool path must give the same slips and
+# the same PDF as the in-process path.
+
+import pytest
+
+from epc_sheet import iter_slips, main, write_pdf_sheets
+
+
+def payments(base: dict, count: int) -> list:
+    rows = [dict(base, id=str(i), name=f"Mieter {i}", amount=f"{i}.50", text=f"Miete {i}")
+            for i in range(1, count + 1)]
+    if count > 3:
+        rows[3]["iban"] = "DE00"  # one invalid row
+    return rows
+
+
+def test_worker_slips_match_in_process_slips(payment):
+    rows = payments(payment, 10)
+    single = list(iter_slips(rows, workers=1))
+    pooled = list(iter_slips(rows, workers=2, chunk_size=3))
+    assert [s.index for s in pooled] == list(range(1, 11))
+    assert pooled == single
+    assert pooled[3].matrix is None and pooled[3].error
+
+
+def test_workers_cli_writes_same_pdf(tmp_path, payment, write_rows):
+    source = write_rows("rows.jsonl", payments(payment, 14))
+    assert main([str(source), "--out", str(tmp_path / "one.pdf")]) == 1  # the invalid row
+    assert main([str(source), "--out", str(tmp_path / "two.pdf"), "--workers", "2"]) == 1
+    one, two = (tmp_path / "one.pdf").read_bytes(), (tmp_path / "two.pdf").read_bytes()
+    assert two == one
+    assert two.endswith(b"%%EOF\n") and b"/Count 2" in two
+
+
+def test_failed_run_leaves_no_pdf(tmp_path, payment):
+    def slips():
+        yield from iter_slips(payments(payment, 2))
+        raise RuntimeError("input went away")
+
+    with pytest.raises(RuntimeError):
+        write_pdf_sheets(slips(), tmp_path / "out.pdf")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,58 @@
+# Tracing must never change how a stage is called or what it returns.
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import pytest
+
+import epc_trace
+from epc_core import make_qr, render_qr, save_bytes
+
+
+@pytest.fixture
+def events():
+    seen = []
+    hook = epc_trace.add_hook(seen.append)
+    yield seen
+    epc_trace.remove_hook(hook)
+
+
+def test_keyword_call_is_traced(tmp_path, events):
+    path = tmp_path / "x.png"
+    assert save_bytes(data=b"x", path=path, overwrite=True) == path
+    assert save_bytes(b"yz", path, True) == path
+    writes = [e for e in events if e["stage"] == "write"]
+    assert [(e["ok"], e["bytes"], e["path"]) for e in writes] == [(True, 1, str(path)), (True, 2, str(path))]
+
+
+def test_defaults_reach_describe(events):
+    qr = make_qr("BCD")
+    render_qr(qr=qr)
+    render_qr(qr, fmt="svg")
+    assert [e["format"] for e in events if e["stage"] == "encode"] == ["png", "svg"]
+
+
+def test_failing_describe_keeps_result(events):
+    @epc_trace.traced("broken", lambda result, *args, **kwargs: {"n": 1 / 0})
+    def stage(value):
+        return value * 2
+
+    assert stage(value=21) == 42
+    assert events[-1]["stage"] == "broken" and events[-1]["ok"]
+
+
+def test_recorder_registers_once(monkeypatch):
+    monkeypatch.setattr(epc_trace, "_recorder", None)
+    monkeypatch.setattr(epc_trace, "_hooks", ())
+    monkeypatch.setattr(epc_trace, "active", False)
+    start = threading.Barrier(8)
+
+    def first_use(_):
+        start.wait()
+        return epc_trace.recorder()
+
+    with ThreadPoolExecutor(8) as pool:
+        recorders = set(map(id, pool.map(first_use, range(8))))
+    assert len(recorders) == 1
+    assert epc_trace._hooks == (epc_trace._recorder,)
+    assert epc_trace.active
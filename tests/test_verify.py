@@ -0,0 +1,70 @@
+# Verifier: files are matched to their source rows by the whole row id, stable
+# (hash-stamped) filenames are checked like dated ones, and a source row that
+# no longer builds a payload or a dead worker is reported, not raised.
+
+import io
+import json
+import re
+
+from pathlib import Path
+
+from epc_batch import BatchOptions, run_batch
+from epc_verify import FILENAME_RE, file_prefix, iter_verify, verify_dir
+import epc_verify
+
+def report_lines(report: io.StringIO) -> list:
+    return [json.loads(line) for line in report.getvalue().splitlines()]
+
+
+def test_filename_re_accepts_hash_stamp():
+    for name in ("a1_12.30_0532013000_2026-10-18.png", "a1_12.30_0532013000_3f9c0a7b12.png",
+                 "a1_12.30_0532013000_3f9c0a7b12_2.png"):
+        assert re.match(FILENAME_RE, name), name
+    assert not re.match(FILENAME_RE, "a1_12.30_0532013000_3f9c0a7.png")
+
+
+def test_stable_name_amount_mismatch_is_found(tmp_path, payment, write_rows):
+    out = tmp_path / "out"
+    run_batch(write_rows("rows.jsonl", [payment]), BatchOptions(out, stable_names=True))
+    (path,) = out.glob("*.png")
+    path.rename(path.with_name(path.name.replace("12.30", "99.00")))
+
+    report = io.StringIO()
+    summary = verify_dir(out, report)
+    assert summary["mismatches"] == 1
+    assert report_lines(report)[0]["reason"] == "filename"
+
+
+def test_invalid_source_row_is_reported(tmp_path, payment, write_rows):
+    out = tmp_path / "out"
+    run_batch(write_rows("rows.jsonl", [payment]), BatchOptions(out))
+    changed = write_rows("changed.jsonl", [dict(payment, amount="12,3,0")])
+
+    report = io.StringIO()
+    summary = verify_dir(out, report, changed)
+    assert summary["mismatches"] == 1 and summary["checked"] == 0
+    assert report_lines(report)[0]["reason"] == "bad_source"
+
+
+def test_underscored_ids_match_their_rows(tmp_path, payment, write_rows):
+    assert file_prefix("INV_001_12.30_0532013000_2026-10-18.png") == "INV_001"
+    rows = [dict(payment, id="INV_001"), dict(payment, id="INV_002", amount="7.00")]
+    source = write_rows("rows.jsonl", rows)
+    out = tmp_path / "out"
+    run_batch(source, BatchOptions(out))
+
+    report = io.StringIO()
+    summary = verify_dir(out, report, source)
+    assert (summary["checked"], summary["mismatches"]) == (2, 0)
+
+
+def _die(chunk):
+    raise MemoryError("worker killed")
+
+
+def test_dead_worker_fails_its_files_only(monkeypatch):
+    monkeypatch.setattr(epc_verify, "verify_chunk", _die)
+    jobs = [(Path(f"{i}.png"), None) for i in range(5)]
+    results = list(iter_verify(jobs, workers=2, chunk_size=2))
+    assert [r.path for r in results] == [path for path, _ in jobs]
+    assert all(not r.ok and r.reason == "worker" for r in results)
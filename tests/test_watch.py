@@ -0,0 +1,26 @@
+# Watch folder: every drop renders into its own folder with its own manifest.
+
+import os
+
+from epc_batch import BatchOptions
+from epc_watch import WatchDaemon
+
+
+def test_each_drop_gets_its_own_folder(tmp_path, payment, write_rows):
+    incoming, out = tmp_path / "in", tmp_path / "out"
+    incoming.mkdir()
+    daemon = WatchDaemon(incoming, BatchOptions(out))
+    first = write_rows("in/a.jsonl", [payment])
+    os.utime(first, ns=(1_700_000_000 * 10 ** 9, 1_700_000_000 * 10 ** 9))
+    assert daemon.process("a.jsonl")["ok"] == 1
+
+    (incoming / "a.csv").write_text("id,name,iban,amount\na1,Stadtwerke,DE89370400440532013000,12.30\n")
+    write_rows("in/a.jsonl", [payment])  # same name, dropped again later
+    assert daemon.process("a.csv")["ok"] == 1
+    stats = daemon.process("a.jsonl")
+    assert (stats["ok"], stats["skipped"], stats["duplicates"]) == (1, 0, 0)
+
+    folders = sorted(p.name for p in out.iterdir())
+    assert len(folders) == 3
+    assert all((out / f / "manifest.jsonl").exists() for f in folders)
+    assert len(list((incoming / "processed").iterdir())) == 3